@@ -0,0 +1,368 @@
+"""
+Offline benchmark suite for the ingest, list and summary paths, and the
+local extractive summarizer.
+
+NewsAPI and OpenAI are replaced by the local fake servers in
+articles/fakes.py, Celery runs tasks eagerly and the caches are private to the run, so
+a run needs no network and leaves no cache entries behind. Each scenario
+returns a dict of plain numbers; `flatten` and `compare` turn two runs
+into a list of regressions.
+"""
+import asyncio
+import contextlib
+import math
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from articles import chatgpt_service
+from articles.circuit_breaker import CircuitBreaker
+from articles.local_cache import LocalLRUCache, TierStats
+from articles.models import Article, FetchWatermark
+from articles.preprocessing import content_fingerprint
+from articles.services import fetch_and_store_articles, query_key
+from articles.summarizers import get_backend
+from articles.fakes import FakeNewsApiServer, FakeOpenAIServer, fake_text
+from news_summarizer.celery import app as celery_app
+
+BENCH_HOST = 'https://bench.example.com'
+INGEST_QUERY = 'benchmark'
+PAGE_SIZE = 10
+
+# Settings every scenario runs under: no SQL logging, private caches.
+BASE_SETTINGS = {
+    'DEBUG': False,
+    'ALLOWED_HOSTS': ['testserver'],
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+        'summaries': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-summaries'},
+    },
+}
+
+
+def latency_stats(samples):
+    """
+    :param samples: Latencies in seconds.
+    :return: A dict of p50/p95/p99/max in milliseconds and the sample count.
+    """
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)] * 1000
+
+    return {
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': ordered[-1] * 1000,
+        'samples': len(ordered),
+    }
+
+
+def _timed(func, repeat):
+    """
+    Call `func` once to warm up, then `repeat` times.
+
+    :return: latency_stats() of the timed calls.
+    """
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return latency_stats(samples)
+
+
+@contextlib.contextmanager
+def private_summary_caches():
+    """
+    Point the summary tiers at caches that live only for the block.
+    """
+    summary_cache = LocMemCache('benchmark-summaries', {})
+    replacements = {
+        'SUMMARY_CACHE': summary_cache,
+        'LOCAL_SUMMARY_CACHE': LocalLRUCache(settings.SUMMARY_LOCAL_CACHE_SIZE, settings.SUMMARY_LOCAL_CACHE_TTL),
+        'TIER_STATS': TierStats(),
+        'LLM_BREAKER': CircuitBreaker('openai', summary_cache),
+    }
+    originals = {name: getattr(chatgpt_service, name) for name in replacements}
+    summary_cache.clear()
+    for name, value in replacements.items():
+        setattr(chatgpt_service, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(chatgpt_service, name, value)
+
+
+@contextlib.contextmanager
+def eager_celery():
+    """
+    Run Celery tasks inline, so ingest needs no broker or worker.
+    """
+    previous = celery_app.conf.task_always_eager
+    celery_app.conf.task_always_eager = True
+    try:
+        yield
+    finally:
+        celery_app.conf.task_always_eager = previous
+
+
+def seed_articles(count, run_id, batch_size=2000):
+    """
+    Article factory: insert `count` articles of realistic size, one a minute
+    apart, in bulk. Near-duplicate signatures are left empty.
+
+    :param count: Articles to insert.
+    :param run_id: Marks the URLs of this run, see cleanup().
+    :return: The ids of the inserted articles, newest first.
+    """
+    now = timezone.now()
+    ids = []
+    for start in range(0, count, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, count)):
+            title = f'Seeded story {i}: {fake_text(f"title-{i}", 8)}'
+            content = fake_text(f'content-{i}', 150)
+            batch.append(Article(
+                title=title,
+                content=content,
+                url=f'{BENCH_HOST}/{run_id}/seed/{i}',
+                published_date=now - timedelta(minutes=i),
+                source=f'Source {i % 20}',
+                fingerprint=content_fingerprint(title, content),
+            ))
+        ids.extend(article.pk for article in Article.objects.bulk_create(batch))
+    return ids
+
+
+def cleanup(run_id):
+    """
+    Delete everything a run wrote to a database that outlives it.
+    """
+    Article.objects.filter(url__startswith=f'{BENCH_HOST}/{run_id}/').delete()
+    FetchWatermark.objects.filter(query_key=query_key({'q': INGEST_QUERY})).delete()
+
+
+def bench_ingest(count, run_id, newsapi_latency=0):
+    """
+    Time fetch_and_store_articles against a fake NewsAPI serving `count`
+    new articles, then a second run in which all of them are already known.
+
+    :return: A dict with 'cold' and 'repeat' runs: seconds, articles per second and counts.
+    """
+    server = FakeNewsApiServer(total_results=count, url_prefix=f'{BENCH_HOST}/{run_id}/ingest')
+    server.delay = newsapi_latency
+    server.start()
+    page_size = 100
+    try:
+        with override_settings(
+            NEWS_API_URL=server.url,
+            NEWS_API_KEY='benchmark',
+            NEWS_API_QUERIES=[INGEST_QUERY],
+            NEWS_API_PAGE_SIZE=page_size,
+            NEWS_API_MAX_PAGES=max(1, math.ceil(count / page_size)),
+            NEWS_API_BACKOFF_FACTOR=0,
+            SUMMARY_PRESUMMARIZE_ON_INGEST=False,
+        ), eager_celery():
+            results = {}
+            for run in ('cold', 'repeat'):
+                started = time.perf_counter()
+                counts = fetch_and_store_articles(wait=True)
+                elapsed = time.perf_counter() - started
+                results[run] = {
+                    'seconds': elapsed,
+                    # Articles served by the fake NewsAPI, new or not.
+                    'fetched_per_second': count / elapsed,
+                    'queued': counts['queued'],
+                    'created': counts['created'],
+                    'newsapi_requests': len(server.requests),
+                }
+                server.requests.clear()
+    finally:
+        server.stop()
+    return results
+
+
+def bench_list(article_ids, depths, repeat):
+    """
+    Time list pages at several depths, with cursors and with page numbers,
+    bypassing the page cache; a page-cache hit; and article details.
+
+    :param article_ids: Ids of the seeded articles.
+    :param depths: Page numbers (1-based) to measure.
+    :return: A dict of measurement name -> latency_stats().
+    """
+    client = Client()
+    bypass = {'HTTP_X_CACHE_BYPASS': '1'}
+    max_depth = len(article_ids) // PAGE_SIZE
+    depths = [depth for depth in depths if depth <= max_depth]
+
+    # Cursors are opaque: walk the `next` links once to find each depth's URL.
+    cursor_urls = {}
+    url = f'/articles/?page_size={PAGE_SIZE}'
+    for depth in range(1, max(depths, default=0) + 1):
+        if depth in depths:
+            cursor_urls[depth] = url
+        url = client.get(url, **bypass).json()['next']
+
+    results = {}
+    for depth in depths:
+        results[f'cursor_page_{depth}'] = _timed(lambda: client.get(cursor_urls[depth], **bypass), repeat)
+        results[f'numbered_page_{depth}'] = _timed(
+            lambda: client.get(f'/articles/?page={depth}&page_size={PAGE_SIZE}', **bypass), repeat
+        )
+    results['cached_page_1'] = _timed(lambda: client.get(f'/articles/?page_size={PAGE_SIZE}'), repeat)
+
+    sample = random.Random(0).sample(article_ids, min(repeat + 1, len(article_ids)))
+    details = iter(sample * 2)
+    results['detail'] = _timed(lambda: client.get(f'/articles/{next(details)}/'), repeat)
+    return results
+
+
+def bench_summary(article_ids, llm_latency, concurrency, repeat):
+    """
+    Time the summary endpoint against a fake LLM answering after `llm_latency` seconds:
+    - cold: articles never summarized, requested one after another;
+    - warm: the same articles again, served from the cache;
+    - stampede: `concurrency` simultaneous requests for one cold article.
+
+    :return: A dict of state -> latency_stats() plus the number of LLM calls made.
+    """
+    server = FakeOpenAIServer()
+    server.delay = llm_latency
+    server.start()
+    cold_ids = article_ids[:repeat]
+    stampede_id = article_ids[repeat]
+
+    async def run():
+        client = AsyncClient()
+
+        async def timed_get(pk):
+            started = time.perf_counter()
+            response = await client.get(f'/articles/{pk}/summary')
+            if response.status_code != 200:
+                raise RuntimeError(f"Summary of article {pk} answered {response.status_code}.")
+            return time.perf_counter() - started
+
+        results = {}
+        for state in ('cold', 'warm'):
+            llm_calls = len(server.requests)
+            samples = [await timed_get(pk) for pk in cold_ids]
+            results[state] = {**latency_stats(samples), 'llm_calls': len(server.requests) - llm_calls}
+
+        llm_calls = len(server.requests)
+        samples = await asyncio.gather(*(timed_get(stampede_id) for _ in range(concurrency)))
+        results['stampede'] = {**latency_stats(samples), 'llm_calls': len(server.requests) - llm_calls}
+        # The view's queries ran on sync_to_async's thread; release its connection.
+        await sync_to_async(connections.close_all)()
+        return results
+
+    try:
+        with override_settings(OPENAI_API_KEY='sk-benchmark', OPENAI_BASE_URL=server.base_url), \
+                private_summary_caches():
+            return asyncio.run(run())
+    finally:
+        server.stop()
+
+
+def bench_extractive(article_ids, repeat):
+    """
+    Time the extractive backend:
+    - batch: as many articles of twenty sentences as were seeded, summarized
+      in one call, as by a backfill;
+    - endpoint: GET /articles/{id}/summary?backend=extractive.
+
+    :return: A dict with the batch's seconds and articles per second, and the endpoint's latency_stats().
+    """
+    articles = [
+        (f'Batch story {i}', ' '.join(f'{fake_text(f"batch-{i}-{j}", 15)}.' for j in range(20)))
+        for i in range(len(article_ids))
+    ]
+    started = time.perf_counter()
+    get_backend('extractive').summarize_many(articles)
+    seconds = time.perf_counter() - started
+
+    client = Client()
+    ids = iter(article_ids * 2)
+    return {
+        'batch': {'articles': len(articles), 'seconds': seconds, 'articles_per_second': len(articles) / seconds},
+        'endpoint': _timed(lambda: client.get(f'/articles/{next(ids)}/summary?backend=extractive'), repeat),
+    }
+
+
+def run_suite(scenarios, articles, ingest_articles, depths, repeat, llm_latency, newsapi_latency, concurrency,
+              run_id):
+    """
+    Run the chosen scenarios against the current database.
+
+    :return: A dict of scenario -> results.
+    """
+    results = {}
+    with override_settings(**BASE_SETTINGS):
+        if 'ingest' in scenarios:
+            results['ingest'] = bench_ingest(ingest_articles, run_id, newsapi_latency)
+        if {'list', 'summary', 'extractive'} & set(scenarios):
+            article_ids = seed_articles(articles, run_id)
+            if 'list' in scenarios:
+                results['list'] = bench_list(article_ids, depths, repeat)
+            if 'summary' in scenarios:
+                results['summary'] = bench_summary(article_ids, llm_latency, concurrency, repeat)
+            if 'extractive' in scenarios:
+                results['extractive'] = bench_extractive(article_ids, repeat)
+    return results
+
+
+def flatten(results, prefix=''):
+    """
+    :return: A dict of dotted metric path -> number, e.g. 'list.cursor_page_1.p50_ms'.
+    """
+    flat = {}
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare a run with a baseline run. Latencies (`*_ms`, `seconds`) and
+    LLM call counts should not grow, throughputs (`*_per_second`) should not shrink.
+
+    :param results: Results of this run.
+    :param baseline: Results of the baseline run.
+    :param tolerance: Allowed relative change, e.g. 0.2 for 20%.
+    :return: A tuple of (dict of metric -> {'baseline', 'current', 'change'}, list of regressed metrics).
+    """
+    current, previous = flatten(results), flatten(baseline)
+    comparison, regressions = {}, []
+    for metric, value in current.items():
+        before = previous.get(metric)
+        name = metric.rsplit('.', 1)[-1]
+        if before is None or not (name.endswith(('_ms', 'seconds', 'per_second')) or name == 'llm_calls'):
+            continue
+        if before:
+            change = (value - before) / before
+            worse = -change if name.endswith('per_second') else change
+            regressed = worse > tolerance
+        else:
+            # Relative change is undefined; any growth from zero (e.g. LLM calls) regresses.
+            change = None
+            regressed = value > before
+        comparison[metric] = {'baseline': before, 'current': value, 'change': change}
+        if regressed:
+            regressions.append(metric)
+    return comparison, regressions
@@ -1,34 +1,316 @@
 """
 ChatGPT-based article summarization service.
 """
+import asyncio
 import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import caches
+from django.db import DatabaseError, connection
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
 import logging
 import openai
 
+from articles import extractive, metrics, rate_limit
+from articles.circuit_breaker import FAILURE, NEUTRAL, SUCCESS, CircuitBreaker, CircuitOpen
+from articles.local_cache import LocalLRUCache, TierStats
+from articles.models import Summary
+from articles.preprocessing import content_fingerprint, count_tokens, prepare_input
+
 
 logger = logging.getLogger(__name__)
 SUMMARY_CACHE = caches['summaries']
+# Per-process tier in front of SUMMARY_CACHE. Keys hash the article text, so
+# edited articles miss naturally; invalidate_local_summaries() covers the rest.
+LOCAL_SUMMARY_CACHE = LocalLRUCache(settings.SUMMARY_LOCAL_CACHE_SIZE, settings.SUMMARY_LOCAL_CACHE_TTL)
+LOCAL_VERSION_KEY = 'summary:local_version'
+TIER_STATS = TierStats()
+# Shared through SUMMARY_CACHE, so every process fails fast once OpenAI is down.
+LLM_BREAKER = CircuitBreaker('openai', SUMMARY_CACHE)
+
+# Bump whenever the prompts or the input preparation code change, so stored
+# summaries (cache keys and Summary rows) are not reused. Changes to the
+# input settings are covered by summary_version().
+PROMPT_VERSION = '1'
+SYSTEM_PROMPT = (
+    "You are an expert news summarizer. "
+    "Provide a concise, objective summary under 100 words."
+)
+# Map-reduce prompts for articles longer than SUMMARY_INPUT_TOKEN_BUDGET.
+CHUNK_PROMPT = (
+    "You are an expert news summarizer. "
+    "Summarize this part of a news article in two or three objective sentences."
+)
+MERGE_PROMPT = (
+    "You are an expert news summarizer. "
+    "Combine these summaries of consecutive parts of one article into a concise, "
+    "objective summary under 100 words."
+)
+# Prefixes of the strings returned instead of a real summary.
+FALLBACK_PREFIXES = ("**Extractive Summary:**", "OpenAI API Error:", "Rate limited:", "Unexpected summarization error:")
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+_async_client = None
+_async_client_key = None
+_local_version = None
+_local_version_checked_at = float('-inf')
+
+
+def get_openai_client(OpenAI, api_key):
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+
+    The client keeps an HTTP connection pool, so sharing it avoids a new
+    TLS handshake per summary. It is rebuilt if the key or client class changes.
+
+    :param OpenAI: The OpenAI client class.
+    :param api_key: The OpenAI API key.
+    :return: An OpenAI client instance.
+    """
+    global _client, _client_key
+    key = (OpenAI, api_key, settings.OPENAI_BASE_URL)
+    with _client_lock:
+        if _client is None or _client_key != key:
+            kwargs = {'api_key': api_key, 'max_retries': settings.OPENAI_MAX_RETRIES}
+            if settings.OPENAI_BASE_URL:
+                kwargs['base_url'] = settings.OPENAI_BASE_URL
+            _client = OpenAI(**kwargs)
+            _client_key = key
+        return _client
+
+def get_async_openai_client(AsyncOpenAI, api_key):
+    """
+    Return the process-wide async OpenAI client, creating it on first use.
+
+    An async client's connection pool belongs to the event loop it was used
+    on, so a new client is built when the running loop changes; under an
+    ASGI server that is once per process.
+
+    :param AsyncOpenAI: The async OpenAI client class.
+    :param api_key: The OpenAI API key.
+    :return: An AsyncOpenAI client instance.
+    """
+    global _async_client, _async_client_key
+    key = (AsyncOpenAI, api_key, settings.OPENAI_BASE_URL, asyncio.get_running_loop())
+    with _client_lock:
+        if _async_client is None or _async_client_key != key:
+            kwargs = {'api_key': api_key, 'max_retries': settings.OPENAI_MAX_RETRIES}
+            if settings.OPENAI_BASE_URL:
+                kwargs['base_url'] = settings.OPENAI_BASE_URL
+            _async_client = AsyncOpenAI(**kwargs)
+            _async_client_key = key
+        return _async_client
+
+def _fingerprint(title: str, content: str, fingerprint=None) -> str:
+    """
+    The article's stored fingerprint, or one computed from its text when
+    the caller has none (e.g. text that is not an Article row).
+    """
+    return fingerprint or content_fingerprint(title, content)
+
+def summary_version() -> str:
+    """
+    The version stored summaries are keyed by: PROMPT_VERSION plus a short
+    digest of the settings that decide what the model is sent and may
+    answer, so retuning any of them never serves summaries of the old input.
+    :return: A version string such as '1.3f9a0c1e'.
+    """
+    settings_part = (
+        settings.SUMMARY_INPUT_TOKEN_BUDGET, settings.SUMMARY_MAP_REDUCE, settings.SUMMARY_CHUNK_TOKENS,
+        settings.SUMMARY_MAX_CHUNKS, settings.SUMMARY_MAX_OUTPUT_TOKENS,
+    )
+    digest = hashlib.blake2b(repr(settings_part).encode('utf-8'), digest_size=4).hexdigest()
+    return f"{PROMPT_VERSION}.{digest}"
 
-def _generate_cache_key(title: str, content: str) -> str:
+def _generate_cache_key(fingerprint: str, model=None, prompt_version=None) -> str:
     """
     Generate a unique cache key for the article summary.
-    :param title: The title of the article.
-    :param content: The content of the article.
+    The key names the model and summary version, so changing either never
+    serves summaries made by the other, and takes constant time to build.
+    :param fingerprint: The article's content fingerprint.
+    :param model: Model name, defaults to OPENAI_MODEL.
+    :param prompt_version: Summary version, defaults to summary_version().
     :return: A unique cache key string.
     """
-    unique_string = f"{title}:{content}"
-    hash_key = hashlib.md5(unique_string.encode('utf-8')).hexdigest()
-    return f"summary:{hash_key}"
+    return f"summary:{model or settings.OPENAI_MODEL}:{prompt_version or summary_version()}:{fingerprint}"
 
-def summarize_article_with_chatgpt(title: str, content: str) -> str:
+def _completion_request(system_prompt: str, title: str, content: str) -> dict:
     """
-    Returns a summary of the article using ChatGPT.
+    Arguments of one chat completion call over (part of) an article.
+    """
+    return {
+        'model': settings.OPENAI_MODEL,
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Title: {title}\n\nContent:\n{content}"}
+        ],
+        'temperature': 0.3,
+        'max_tokens': settings.SUMMARY_MAX_OUTPUT_TOKENS,
+        'timeout': settings.OPENAI_TIMEOUT,
+    }
+
+def _token_budget(request: dict) -> int:
+    """
+    Most tokens a completion request can use: its prompt plus the output cap.
+    """
+    return sum(count_tokens(message['content']) for message in request['messages']) + request['max_tokens']
+
+def _retry_after(error) -> float:
+    """
+    Seconds a 429 asks callers to hold off: its Retry-After header, or RATE_LIMIT_BACKOFF.
+    """
+    try:
+        return float(error.response.headers['retry-after'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return settings.RATE_LIMIT_BACKOFF
+
+def _breaker_outcome(error) -> str:
+    """
+    How a failed OpenAI call counts toward LLM_BREAKER: connection errors,
+    timeouts and 5xx are failures, other API errors show the provider is up,
+    and 429s or our own limiter giving up say nothing about its health.
+    """
+    if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+        return FAILURE
+    if isinstance(error, openai.APIStatusError) and not isinstance(error, openai.RateLimitError):
+        return SUCCESS
+    return NEUTRAL
+
+def _latency_outcome(started: float) -> str:
+    """
+    How a successful OpenAI call started at `started` (monotonic) counts toward LLM_BREAKER.
+    """
+    return FAILURE if time.monotonic() - started > settings.LLM_BREAKER_SLOW_CALL_SECONDS else SUCCESS
+
+def _create(client, request: dict):
+    """
+    Send a completion request once the circuit breaker and the shared OpenAI
+    rate limiter allow it. The token budget is taken up front and settled
+    with the response's usage; a 429 holds off every worker for its Retry-After.
+
+    :raises CircuitOpen: If the circuit breaker is open.
+    :raises rate_limit.RateLimitExceeded: If the limiter had no capacity in time.
+    """
+    probe = LLM_BREAKER.before_call()
+    limiter = rate_limit.get_limiter('openai')
+    budget = _token_budget(request)
+    try:
+        limiter.acquire(tokens=budget)
+        started = time.monotonic()
+        response = client.chat.completions.create(**request)
+    except Exception as e:
+        LLM_BREAKER.record(_breaker_outcome(e), probe)
+        if isinstance(e, openai.RateLimitError):
+            limiter.block(_retry_after(e))
+        raise
+    LLM_BREAKER.record(_latency_outcome(started), probe)
+    if response.usage is not None:
+        limiter.adjust(response.usage.total_tokens - budget)
+    return response
+
+async def _acreate(client, request: dict, **kwargs):
+    """
+    Async variant of _create. Streamed responses carry no usage, so their
+    whole token budget stays spent; their latency counts until the response
+    headers arrive.
+    """
+    probe = await sync_to_async(LLM_BREAKER.before_call)()
+    limiter = rate_limit.get_limiter('openai')
+    budget = _token_budget(request)
+    try:
+        await limiter.aacquire(tokens=budget)
+        started = time.monotonic()
+        response = await client.chat.completions.create(**request, **kwargs)
+    except Exception as e:
+        await sync_to_async(LLM_BREAKER.record)(_breaker_outcome(e), probe)
+        if isinstance(e, openai.RateLimitError):
+            await sync_to_async(limiter.block)(_retry_after(e))
+        raise
+    await sync_to_async(LLM_BREAKER.record)(_latency_outcome(started), probe)
+    if getattr(response, 'usage', None) is not None:
+        await sync_to_async(limiter.adjust)(response.usage.total_tokens - budget)
+    return response
+
+def _complete(client, system_prompt: str, title: str, content: str) -> str:
+    """
+    Run one chat completion and return its text.
+    """
+    with metrics.timed(metrics.LLM_CALL_SECONDS, mode='complete'):
+        response = _create(client, _completion_request(system_prompt, title, content))
+    metrics.record_llm_usage(response.usage)
+    return response.choices[0].message.content.strip()
+
+async def _acomplete(client, system_prompt: str, title: str, content: str) -> str:
+    """
+    Async variant of _complete.
+    """
+    with metrics.timed(metrics.LLM_CALL_SECONDS, mode='complete'):
+        response = await _acreate(client, _completion_request(system_prompt, title, content))
+    metrics.record_llm_usage(response.usage)
+    return response.choices[0].message.content.strip()
+
+def _merge_input(partials) -> str:
+    """
+    Content of the merge call: the chunk summaries, in article order.
+    """
+    return "\n\n".join(f"Part {i}: {partial}" for i, partial in enumerate(partials, 1))
+
+def _extractive_summary(title: str, content: str) -> str:
+    """
+    Local extractive summary returned instead of a ChatGPT one, flagged so
+    it is neither cached nor persisted as one.
+    """
+    return f"**Extractive Summary:** {extractive.summarize_batch([(title, content)])[0]}"
+
+def _fallback_summary(title: str, content: str, missing_package: bool) -> str:
+    """
+    Summary returned when OpenAI cannot be called at all.
+
+    :param missing_package: Whether the OpenAI package failed to import.
+    """
+    if missing_package and settings.OPENAI_API_KEY:
+        logger.warning("OpenAI package not available — using fallback.")
+    else:
+        logger.warning("Missing API key — using fallback.")
+    return _extractive_summary(title, content)
+
+def _failure_summary(title: str, content: str, error: Exception, api_error=Exception) -> str:
+    """
+    Log why a summarization failed and return what to show instead. Call it
+    from the `except` block that caught `error`.
+
+    :param error: The exception that ended the summarization.
+    :param api_error: The OpenAI package's APIError class, if it imported.
+    :return: An extractive summary while the circuit is open, otherwise an error string.
+    """
+    if isinstance(error, CircuitOpen):
+        logger.warning("Summarization failing fast: %s", error)
+        return _extractive_summary(title, content)
+    if isinstance(error, rate_limit.RateLimitExceeded):
+        logger.warning("Summarization rate limited: %s", error)
+        return f"Rate limited: {error}"
+    if isinstance(error, api_error):
+        logger.error("OpenAI API Error: %s", error)
+        return f"OpenAI API Error: {error}"
+    logger.exception("Unexpected error during summarization")
+    return f"Unexpected summarization error: {error}"
+
+def generate_summary(title: str, content: str):
+    """
+    Summarize the article with ChatGPT and say whether that worked.
 
     :param title: The title of the article.
     :param content: The content of the article.
-    :return: A summary string.
+    :return: A tuple of (summary string, generated boolean). `generated` is
+        False when the summary is a fallback or error string, which must not
+        be cached or stored.
     """
     try:
         from openai import OpenAI, APIError 
@@ -38,59 +320,759 @@ def summarize_article_with_chatgpt(title: str, content: str) -> str:
         APIError = Exception
 
     if not settings.OPENAI_API_KEY or OpenAI is None:
-        if OpenAI is None and settings.OPENAI_API_KEY:
-            logger.warning("OpenAI package not available — using fallback.")
-        else:
-            logger.warning("Missing API key — using fallback.")
-        return f"**Mock Summary:** The article discusses {title}."
+        return _fallback_summary(title, content, OpenAI is None), False
 
     try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client(OpenAI, settings.OPENAI_API_KEY)
+        title, chunks = prepare_input(title, content)
+        if len(chunks) == 1:
+            return _complete(client, SYSTEM_PROMPT, title, chunks[0]), True
 
-        system_prompt = (
-            "You are an expert news summarizer. "
-            "Provide a concise, objective summary under 100 words."
-        )
+        # Map: summarize the chunks concurrently. Reduce: merge their summaries.
+        with ThreadPoolExecutor(max_workers=min(settings.SUMMARY_MAP_MAX_WORKERS, len(chunks))) as executor:
+            partials = list(executor.map(
+                rate_limit.with_current_priority(lambda chunk: _complete(client, CHUNK_PROMPT, title, chunk)), chunks
+            ))
+        return _complete(client, MERGE_PROMPT, title, _merge_input(partials)), True
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Title: {title}\n\nContent:\n{content}"}
-            ],
-            temperature=0.3,
-            timeout=30
-        )
+    except Exception as e:
+        return _failure_summary(title, content, e, APIError), False
 
-        return response.choices[0].message.content.strip()
+def summarize_article_with_chatgpt(title: str, content: str) -> str:
+    """
+    Returns a summary of the article using ChatGPT.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :return: A summary string, or a fallback or error string.
+    """
+    return generate_summary(title, content)[0]
+
+async def agenerate_summary(title: str, content: str):
+    """
+    Async variant of generate_summary: awaits the OpenAI call instead of
+    blocking a worker thread on it.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :return: A tuple of (summary string, generated boolean).
+    """
+    try:
+        from openai import AsyncOpenAI, APIError
+    except Exception:
+        AsyncOpenAI = None
+        APIError = Exception
+
+    if not settings.OPENAI_API_KEY or AsyncOpenAI is None:
+        return _fallback_summary(title, content, AsyncOpenAI is None), False
+
+    try:
+        client = get_async_openai_client(AsyncOpenAI, settings.OPENAI_API_KEY)
+        title, chunks = prepare_input(title, content)
+        if len(chunks) == 1:
+            return await _acomplete(client, SYSTEM_PROMPT, title, chunks[0]), True
+
+        partials = await asyncio.gather(*[_acomplete(client, CHUNK_PROMPT, title, chunk) for chunk in chunks])
+        return await _acomplete(client, MERGE_PROMPT, title, _merge_input(partials)), True
 
-    except APIError as e:
-        logger.error(f"OpenAI API Error: {e}")
-        return f"OpenAI API Error: {e}"
     except Exception as e:
-        logger.exception("Unexpected error during summarization")
-        return f"Unexpected summarization error: {e}"
+        return _failure_summary(title, content, e, APIError), False
 
+async def asummarize_article_with_chatgpt(title: str, content: str) -> str:
+    """
+    Async variant of summarize_article_with_chatgpt.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :return: A summary string, or a fallback or error string.
+    """
+    return (await agenerate_summary(title, content))[0]
 
 
-def get_article_summary_with_caching(title: str, content: str):
+
+async def _astream_completion(title: str, content: str):
+    """
+    Stream a summary of the article from ChatGPT as it is generated.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :return: An async iterator of (text chunk, error) tuples. `error` is
+        None while the completion streams. A failure, even partway through,
+        ends the stream with one last chunk: the same fallback or error
+        string as summarize_article_with_chatgpt, with the error's
+        description.
+    """
+    try:
+        from openai import AsyncOpenAI, APIError
+    except Exception:
+        AsyncOpenAI = None
+        APIError = Exception
+
+    if not settings.OPENAI_API_KEY or AsyncOpenAI is None:
+        yield _fallback_summary(title, content, AsyncOpenAI is None), "OpenAI is not configured."
+        return
+
+    try:
+        client = get_async_openai_client(AsyncOpenAI, settings.OPENAI_API_KEY)
+        title, chunks = prepare_input(title, content)
+        if len(chunks) == 1:
+            request = _completion_request(SYSTEM_PROMPT, title, chunks[0])
+        else:
+            # Only the merge step is streamed; the chunk summaries are its input.
+            partials = await asyncio.gather(*[_acomplete(client, CHUNK_PROMPT, title, chunk) for chunk in chunks])
+            request = _completion_request(MERGE_PROMPT, title, _merge_input(partials))
+        # Streamed responses carry no usage, so only their latency is recorded.
+        with metrics.timed(metrics.LLM_CALL_SECONDS, mode='stream'):
+            stream = await _acreate(client, request, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content, None
+
+    except Exception as e:
+        yield _failure_summary(title, content, e, APIError), f"{type(e).__name__}: {e}"
+
+
+def is_generated_summary(summary: str) -> bool:
+    """
+    Whether a summary served to a client looks like it came from the model
+    rather than an extractive or error fallback. Only used to decide HTTP
+    caching headers; what is cached or stored is decided by the outcome of
+    the call (generate_summary).
+    """
+    return not summary.startswith(FALLBACK_PREFIXES)
+
+
+def _load_persisted(article_ids, fingerprints):
+    """
+    Read stored summaries for the current model and prompt version.
+
+    :param article_ids: Article primary keys.
+    :param fingerprints: Content fingerprints of those articles.
+    :return: A dict of (article id, content fingerprint) -> summary text.
+    """
+    rows = Summary.objects.filter(
+        article_id__in=article_ids,
+        content_hash__in=fingerprints,
+        model_name=settings.OPENAI_MODEL,
+        prompt_version=summary_version(),
+    ).values_list('article_id', 'content_hash', 'text')
+    return {(article_id, fingerprint): text for article_id, fingerprint, text in rows}
+
+
+def _persist(summaries):
+    """
+    Write generated summaries through to Postgres. Fallback and error
+    strings must not be passed here.
+
+    :param summaries: A list of (article id, content fingerprint, summary text) tuples.
+    """
+    rows = [
+        Summary(
+            article_id=article_id,
+            content_hash=fingerprint,
+            model_name=settings.OPENAI_MODEL,
+            prompt_version=summary_version(),
+            text=text,
+        )
+        for article_id, fingerprint, text in summaries
+        if article_id is not None
+    ]
+    if not rows:
+        return
+    try:
+        Summary.objects.bulk_create(rows, ignore_conflicts=True)
+    except DatabaseError:
+        # The summary is still cached; losing the durable copy is not fatal.
+        logger.exception("Failed to persist summaries")
+
+
+def annotate_stored_summaries(queryset):
+    """
+    Annotate an Article queryset with `summary`: the stored summary of each
+    article's current text for the current model and prompt version, or None.
+    Near-duplicates get their canonical article's summary.
+    The lookup is a correlated subquery, so it stays a single query.
+    """
+    queryset = queryset.alias(
+        summary_article_id=Coalesce('canonical_id', 'pk'),
+        summary_fingerprint=Coalesce('canonical__fingerprint', 'fingerprint'),
+    )
+    return queryset.annotate(summary=Subquery(
+        Summary.objects.filter(
+            article=OuterRef('summary_article_id'),
+            content_hash=OuterRef('summary_fingerprint'),
+            model_name=settings.OPENAI_MODEL,
+            prompt_version=summary_version(),
+        ).values('text')[:1]
+    ))
+
+
+def _sync_local_cache() -> None:
+    """
+    Drop this process's local summaries if another process bumped the
+    version stamp. Redis is consulted at most once per
+    SUMMARY_LOCAL_CACHE_VERSION_INTERVAL seconds.
+    """
+    global _local_version, _local_version_checked_at
+    now = time.monotonic()
+    if now - _local_version_checked_at < settings.SUMMARY_LOCAL_CACHE_VERSION_INTERVAL:
+        return
+    _local_version_checked_at = now
+    version = SUMMARY_CACHE.get(LOCAL_VERSION_KEY, 0)
+    if _local_version is not None and version != _local_version:
+        LOCAL_SUMMARY_CACHE.clear()
+    _local_version = version
+
+
+def invalidate_local_summaries() -> None:
+    """
+    Make every worker drop its in-process summaries within
+    SUMMARY_LOCAL_CACHE_VERSION_INTERVAL seconds.
+    """
+    SUMMARY_CACHE.add(LOCAL_VERSION_KEY, 0, timeout=None)
+    SUMMARY_CACHE.incr(LOCAL_VERSION_KEY)
+    LOCAL_SUMMARY_CACHE.clear()
+
+
+def warm_stored_summaries(article_ids, fingerprints) -> int:
+    """
+    Copy stored summaries of the current model and prompt version into the
+    cache, without calling OpenAI.
+
+    :param article_ids: Article primary keys.
+    :param fingerprints: Content fingerprints of those articles.
+    :return: The number of summaries cached.
+    """
+    persisted = _load_persisted(article_ids, fingerprints)
+    _store_many({_generate_cache_key(fingerprint): text for (_, fingerprint), text in persisted.items()})
+    return len(persisted)
+
+
+def invalidate_summaries(fingerprints, model=None, prompt_version=None) -> None:
+    """
+    Delete the cached summaries of some articles for one model and prompt
+    version, defaulting to the current ones.
+
+    :param fingerprints: Content fingerprints of the articles.
+    :param model: Model name, defaults to OPENAI_MODEL.
+    :param prompt_version: Summary version, defaults to summary_version().
+    """
+    SUMMARY_CACHE.delete_many([
+        _generate_cache_key(fingerprint, model, prompt_version) for fingerprint in fingerprints
+    ])
+
+
+def claim_summaries(fingerprints, owner: str):
+    """
+    Claim the generation of some summaries for one task run, so a duplicate
+    task for the same articles (e.g. an ingest batch queued twice) skips
+    them, while a redelivery of the same task (same `owner`) keeps its claim.
+    The idempotency key is the summary's cache key: one per article text,
+    model and prompt version.
+
+    :param fingerprints: Content fingerprints of the articles.
+    :param owner: Identifies the claimant, e.g. the Celery task id.
+    :return: The fingerprints `owner` now holds, in input order.
+    """
+    held = []
+    for fingerprint in fingerprints:
+        claim_key = f"claim:{_generate_cache_key(fingerprint)}"
+        if (
+            SUMMARY_CACHE.add(claim_key, owner, timeout=settings.SUMMARY_TASK_CLAIM_TIMEOUT)
+            or SUMMARY_CACHE.get(claim_key) == owner
+        ):
+            held.append(fingerprint)
+    return held
+
+
+def release_summary_claims(fingerprints, owner: str) -> None:
+    """
+    Give up claims taken by claim_summaries, unless they expired and someone else holds them now.
+    """
+    claim_keys = [f"claim:{_generate_cache_key(fingerprint)}" for fingerprint in fingerprints]
+    current = SUMMARY_CACHE.get_many(claim_keys)
+    SUMMARY_CACHE.delete_many([key for key in claim_keys if current.get(key) == owner])
+
+
+def _record_lookup(tier: str, hit: bool) -> None:
+    """
+    Count a lookup in one summary tier, for summary_cache_stats() and /metrics.
+    """
+    TIER_STATS.record(tier, hit)
+    metrics.record_cache_lookup(tier, hit)
+
+
+def _local_get(cache_key: str):
+    """
+    Look a summary up in the in-process tier.
+
+    :return: The summary string, or None.
+    """
+    _sync_local_cache()
+    summary = LOCAL_SUMMARY_CACHE.get(cache_key)
+    _record_lookup('local', summary is not None)
+    return summary
+
+
+def _remember_locally(cache_key: str, entry) -> None:
+    """
+    Copy a fresh cache entry into the in-process tier, no longer than it stays fresh.
+    """
+    if isinstance(entry, dict):
+        LOCAL_SUMMARY_CACHE.set(cache_key, entry['summary'], expires_at=entry['fresh_until'])
+    else:
+        LOCAL_SUMMARY_CACHE.set(cache_key, entry)
+
+
+def summary_cache_stats() -> dict:
+    """
+    Hit/miss counters and hit rate per summary tier for this process.
+
+    :return: A dict of tier -> {'hits', 'misses', 'hit_rate'}.
+    """
+    return TIER_STATS.snapshot()
+
+
+def _cache_entry(summary: str) -> dict:
+    """
+    Wrap a summary with the time until which it counts as fresh.
+    Entries outlive their freshness by SUMMARY_STALE_TTL so they can still be
+    served while a single worker regenerates them.
+    """
+    return {'summary': summary, 'fresh_until': time.time() + settings.SUMMARY_CACHE_TIMEOUT}
+
+
+def _entry_timeout() -> int:
+    """
+    Cache timeout of a summary entry: fresh period plus stale window.
+    """
+    return settings.SUMMARY_CACHE_TIMEOUT + settings.SUMMARY_STALE_TTL
+
+
+def _read_entry(entry):
+    """
+    :param entry: A value read from SUMMARY_CACHE.
+    :return: A tuple of (summary string, is_fresh boolean).
+    """
+    if isinstance(entry, dict):
+        return entry['summary'], entry['fresh_until'] > time.time()
+    # Plain strings were written before entries carried a freshness stamp.
+    return entry, True
+
+
+def _store_summary(cache_key: str, summary: str) -> None:
+    """
+    Write a generated or stored summary to the cache. Fallback and error
+    strings must not be passed here, so the next request tries again.
+    """
+    entry = _cache_entry(summary)
+    SUMMARY_CACHE.set(cache_key, entry, timeout=_entry_timeout())
+    _remember_locally(cache_key, entry)
+
+
+def _store_many(summaries: dict) -> None:
+    """
+    Write several summaries to the cache with one set_many.
+
+    :param summaries: A dict of cache key -> generated or stored summary string.
+    """
+    entries = {key: _cache_entry(summary) for key, summary in summaries.items()}
+    SUMMARY_CACHE.set_many(entries, timeout=_entry_timeout())
+    for key, entry in entries.items():
+        _remember_locally(key, entry)
+
+
+def _acquire_lock(cache_key: str):
+    """
+    Try to become the single worker that generates the summary for a key.
+    `add` is atomic (SET NX on Redis), so exactly one caller wins across processes.
+
+    :return: The lock token if acquired, otherwise None.
+    """
+    token = uuid.uuid4().hex
+    if SUMMARY_CACHE.add(f"lock:{cache_key}", token, timeout=settings.SUMMARY_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def _release_lock(cache_key: str, token: str) -> None:
+    """
+    Release the generation lock, unless it expired and someone else holds it now.
+    """
+    lock_key = f"lock:{cache_key}"
+    if SUMMARY_CACHE.get(lock_key) == token:
+        SUMMARY_CACHE.delete(lock_key)
+
+
+def _save_generated(cache_key: str, summary: str, fingerprint: str, article_id=None) -> None:
+    """
+    Write a newly generated summary to the cache and through to Postgres.
+    Only call it when the summary came from the model.
+    """
+    _store_summary(cache_key, summary)
+    _persist([(article_id, fingerprint, summary)])
+
+
+def _generate_and_store(cache_key: str, token: str, title: str, content: str, fingerprint: str,
+                        article_id=None) -> str:
+    """
+    Generate a summary while holding the lock identified by `token`, then
+    write it to the cache and through to Postgres.
+    """
+    try:
+        summary, generated = generate_summary(title, content)
+        if generated:
+            _save_generated(cache_key, summary, fingerprint, article_id)
+        return summary
+    finally:
+        _release_lock(cache_key, token)
+
+
+def _refresh_in_background(cache_key: str, token: str, title: str, content: str, fingerprint: str,
+                           article_id=None) -> None:
+    """
+    Thread target regenerating a stale summary. The caller was already
+    served the stale copy, so the refresh yields to interactive requests.
+    """
+    try:
+        with rate_limit.priority(rate_limit.BACKGROUND):
+            _generate_and_store(cache_key, token, title, content, fingerprint, article_id)
+    except Exception:
+        logger.exception("Background refresh failed for %s", cache_key)
+    finally:
+        connection.close()
+
+
+def _check_pending(cache_key: str):
+    """
+    Check on a summary another worker is generating.
+
+    :return: A tuple of (summary or None, whether the generating worker still holds the lock).
+    """
+    entry = SUMMARY_CACHE.get(cache_key)
+    if entry is not None:
+        return _read_entry(entry)[0], False
+    return None, SUMMARY_CACHE.get(f"lock:{cache_key}") is not None
+
+
+def _wait_for_summary(cache_key: str):
+    """
+    Poll the cache while another worker generates the summary.
+
+    :return: The summary, or None if it did not appear in time.
+    """
+    deadline = time.monotonic() + settings.SUMMARY_LOCK_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(settings.SUMMARY_LOCK_POLL_INTERVAL)
+        summary, locked = _check_pending(cache_key)
+        if not locked:
+            # Either the summary landed or the generating worker gave up.
+            return summary
+    return None
+
+
+async def _await_summary(cache_key: str):
+    """
+    Async variant of _wait_for_summary that sleeps without holding a thread.
+
+    :return: The summary, or None if it did not appear in time.
+    """
+    deadline = time.monotonic() + settings.SUMMARY_LOCK_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.SUMMARY_LOCK_POLL_INTERVAL)
+        summary, locked = await sync_to_async(_check_pending)(cache_key)
+        if not locked:
+            return summary
+    return None
+
+
+def _find_stored(cache_key: str, title: str, content: str, fingerprint: str, article_id=None):
+    """
+    Look a summary up in the in-process LRU, Redis and (when `article_id` is
+    given) the Summary table. An expired summary is returned as-is while one
+    caller refreshes it in the background.
+
+    :return: The summary string, or None if it has to be generated.
+    """
+    local = _local_get(cache_key)
+    if local is not None:
+        return local
+
+    entry = SUMMARY_CACHE.get(cache_key)
+    stale_summary = None
+    if entry is not None:
+        summary, fresh = _read_entry(entry)
+        if fresh:
+            _record_lookup('redis', True)
+            logger.info("Cache HIT for %s", cache_key)
+            _remember_locally(cache_key, entry)
+            return summary
+        stale_summary = summary
+    _record_lookup('redis', False)
+
+    if article_id is not None:
+        persisted = _load_persisted([article_id], [fingerprint]).get((article_id, fingerprint))
+        _record_lookup('database', persisted is not None)
+        if persisted is not None:
+            logger.info("Database HIT for %s", cache_key)
+            _store_summary(cache_key, persisted)
+            return persisted
+
+    if stale_summary is not None:
+        token = _acquire_lock(cache_key)
+        if token is not None:
+            logger.info("Cache STALE for %s. Refreshing in the background.", cache_key)
+            threading.Thread(
+                target=_refresh_in_background,
+                args=(cache_key, token, title, content, fingerprint, article_id),
+                daemon=True,
+            ).start()
+        return stale_summary
+
+    return None
+
+
+def get_stored_summary(title: str, content: str, article_id=None, fingerprint=None):
+    """
+    Get an article summary only if it is already stored somewhere; never calls ChatGPT.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :param article_id: Primary key of the article, enabling the Postgres tier.
+    :param fingerprint: The article's stored content fingerprint, if known.
+    :return: The summary string, or None.
+    """
+    fingerprint = _fingerprint(title, content, fingerprint)
+    return _find_stored(_generate_cache_key(fingerprint), title, content, fingerprint, article_id)
+
+
+def get_article_summary_with_caching(title: str, content: str, article_id=None, fingerprint=None):
     """
     Get article summary with caching.
+
+    Lookup order is the in-process LRU, Redis, the Summary table (when
+    `article_id` is given), then ChatGPT; generated summaries are written
+    through to every tier.
+    Concurrent misses for the same article are coalesced: the first caller
+    takes a short lock and generates the summary while the others wait for
+    it to land in the cache. An expired summary is served as-is for
+    SUMMARY_STALE_TTL seconds while one caller refreshes it in the background.
+
     :param title: The title of the article.
     :param content: The content of the article.
+    :param article_id: Primary key of the article, enabling the Postgres tier.
+    :param fingerprint: The article's stored content fingerprint, if known.
     :return: A tuple of (summary string, from_cache boolean).
     """
-    cache_key = _generate_cache_key(title, content)
+    fingerprint = _fingerprint(title, content, fingerprint)
+    cache_key = _generate_cache_key(fingerprint)
+    stored = _find_stored(cache_key, title, content, fingerprint, article_id)
+    if stored is not None:
+        return stored, True
 
-    cached = SUMMARY_CACHE.get(cache_key)
-    if cached is not None:
-        logger.info(f"Cache HIT for {cache_key}")
-        return cached, True
+    token = _acquire_lock(cache_key)
+    if token is None:
+        logger.info("Cache MISS for %s. Waiting for another worker to generate it.", cache_key)
+        summary = _wait_for_summary(cache_key)
+        if summary is not None:
+            return summary, True
+        token = _acquire_lock(cache_key)
 
-    logger.info(f"Cache MISS for {cache_key}. Generating new summary.")
-    new_summary = summarize_article_with_chatgpt(title, content)
+    logger.info("Cache MISS for %s. Generating new summary.", cache_key)
+    if token is None:
+        # Still locked after waiting: generate without the lock rather than fail.
+        new_summary, generated = generate_summary(title, content)
+        if generated:
+            _save_generated(cache_key, new_summary, fingerprint, article_id)
+    else:
+        new_summary = _generate_and_store(cache_key, token, title, content, fingerprint, article_id)
 
-    # Store in cache for 24 hours
-    SUMMARY_CACHE.set(cache_key, new_summary, timeout=86400)
+    return new_summary, False
+
+
+async def aget_article_summary_with_caching(title: str, content: str, article_id=None, fingerprint=None):
+    """
+    Async variant of get_article_summary_with_caching for ASGI views.
+
+    Cache and database lookups run on a worker thread; waiting for another
+    worker and calling ChatGPT are awaited, so a slow completion holds no thread.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :param article_id: Primary key of the article, enabling the Postgres tier.
+    :param fingerprint: The article's stored content fingerprint, if known.
+    :return: A tuple of (summary string, from_cache boolean).
+    """
+    fingerprint = _fingerprint(title, content, fingerprint)
+    cache_key = _generate_cache_key(fingerprint)
+    stored = await sync_to_async(_find_stored)(cache_key, title, content, fingerprint, article_id)
+    if stored is not None:
+        return stored, True
+
+    token = await sync_to_async(_acquire_lock)(cache_key)
+    if token is None:
+        logger.info("Cache MISS for %s. Waiting for another worker to generate it.", cache_key)
+        summary = await _await_summary(cache_key)
+        if summary is not None:
+            return summary, True
+        token = await sync_to_async(_acquire_lock)(cache_key)
+
+    logger.info("Cache MISS for %s. Generating new summary.", cache_key)
+    try:
+        new_summary, generated = await agenerate_summary(title, content)
+        if generated:
+            await sync_to_async(_save_generated)(cache_key, new_summary, fingerprint, article_id)
+    finally:
+        if token is not None:
+            await sync_to_async(_release_lock)(cache_key, token)
 
     return new_summary, False
+
+
+async def astream_article_summary(title: str, content: str, article_id=None, fingerprint=None):
+    """
+    Stream an article summary for Server-Sent Events.
+
+    A stored summary is yielded whole. Otherwise the caller that wins the
+    single-flight lock forwards ChatGPT's tokens as they arrive and, once
+    the stream completes, writes the assembled summary to every tier.
+    Callers that lose the lock wait for that summary and get it whole.
+    A stream cut short (e.g. the client went away) stores nothing, and
+    neither does one that fails: its last chunk is the fallback or error
+    string, and its `error` says what went wrong.
+
+    :param title: The title of the article.
+    :param content: The content of the article.
+    :param article_id: Primary key of the article, enabling the Postgres tier.
+    :param fingerprint: The article's stored content fingerprint, if known.
+    :return: An async iterator of (text chunk, from_cache boolean, error)
+        tuples; `error` is None except on the last chunk of a failed stream.
+    """
+    fingerprint = _fingerprint(title, content, fingerprint)
+    cache_key = _generate_cache_key(fingerprint)
+    stored = await sync_to_async(_find_stored)(cache_key, title, content, fingerprint, article_id)
+    if stored is not None:
+        yield stored, True, None
+        return
+
+    token = await sync_to_async(_acquire_lock)(cache_key)
+    if token is None:
+        summary = await _await_summary(cache_key)
+        if summary is not None:
+            yield summary, True, None
+            return
+        token = await sync_to_async(_acquire_lock)(cache_key)
+
+    logger.info("Cache MISS for %s. Streaming new summary.", cache_key)
+    chunks, failed = [], False
+    try:
+        async for chunk, error in _astream_completion(title, content):
+            failed = failed or error is not None
+            chunks.append(chunk)
+            yield chunk, False, error
+        if not failed:
+            await sync_to_async(_save_generated)(cache_key, ''.join(chunks).strip(), fingerprint, article_id)
+    finally:
+        if token is not None:
+            await sync_to_async(_release_lock)(cache_key, token)
+
+
+def summarize_articles(articles, article_ids=None, fingerprints=None):
+    """
+    Summarize many articles at once; see summarize_articles_with_status.
+
+    :param articles: A list of (title, content) pairs.
+    :param article_ids: Optional list of the articles' primary keys, in the same order.
+    :param fingerprints: Optional list of the articles' stored content fingerprints, in the same order.
+    :return: A list of (summary string, from_cache boolean) tuples, in input order.
+    """
+    return [
+        (summary, cached)
+        for summary, cached, _ in summarize_articles_with_status(articles, article_ids, fingerprints)
+    ]
+
+
+def summarize_articles_with_status(articles, article_ids=None, fingerprints=None):
+    """
+    Summarize many articles at once, saying which summaries are stored.
+
+    Cache keys are resolved with one get_many, and remaining misses with one
+    query against the Summary table. Only what is still missing (or expired)
+    is sent to ChatGPT, concurrently on a bounded thread pool, and written
+    back with one set_many and one bulk insert. Identical articles are
+    summarized once.
+
+    :param articles: A list of (title, content) pairs.
+    :param article_ids: Optional list of the articles' primary keys, in the same order.
+    :param fingerprints: Optional list of the articles' stored content fingerprints, in the same order.
+    :return: A list of (summary string, from_cache boolean, stored boolean)
+        tuples, in input order. `stored` is False for fallback and error
+        strings, which were neither cached nor written to the Summary table.
+    """
+    if article_ids is None:
+        article_ids = [None] * len(articles)
+    if fingerprints is None:
+        fingerprints = [None] * len(articles)
+    fingerprints = [
+        _fingerprint(title, content, fingerprint) for (title, content), fingerprint in zip(articles, fingerprints)
+    ]
+    keys = [_generate_cache_key(fingerprint) for fingerprint in fingerprints]
+    results = {}
+    for key in set(keys):
+        local = _local_get(key)
+        if local is not None:
+            results[key] = (local, True, True)
+
+    remote_keys = [key for key in set(keys) if key not in results]
+    if remote_keys:
+        for key, entry in SUMMARY_CACHE.get_many(remote_keys).items():
+            summary, fresh = _read_entry(entry)
+            if fresh:
+                results[key] = (summary, True, True)
+                _remember_locally(key, entry)
+        for key in remote_keys:
+            _record_lookup('redis', key in results)
+
+    misses = {}
+    for key, (title, content), article_id, fingerprint in zip(keys, articles, article_ids, fingerprints):
+        if key not in results and key not in misses:
+            misses[key] = (title, content, article_id, fingerprint)
+
+    known_ids = [miss[2] for miss in misses.values() if miss[2] is not None]
+    if known_ids:
+        persisted = _load_persisted(known_ids, [miss[3] for miss in misses.values()])
+        from_db = {
+            key: persisted[(article_id, fingerprint)]
+            for key, (_, _, article_id, fingerprint) in misses.items()
+            if (article_id, fingerprint) in persisted
+        }
+        for key in misses:
+            _record_lookup('database', key in from_db)
+        if from_db:
+            _store_many(from_db)
+            for key, summary in from_db.items():
+                results[key] = (summary, True, True)
+                del misses[key]
+
+    logger.info(
+        "Batch summary: %s requested, %s stored, %s to generate.", len(keys), len(results), len(misses),
+    )
+
+    if misses:
+        max_workers = min(settings.SUMMARY_BATCH_MAX_WORKERS, len(misses))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(executor.map(
+                rate_limit.with_current_priority(lambda miss: generate_summary(miss[0], miss[1])),
+                misses.values(),
+            ))
+        generated = {key: summary for key, (summary, ok) in zip(misses, outcomes) if ok}
+        _store_many(generated)
+        _persist([
+            (article_id, fingerprint, generated[key])
+            for key, (_, _, article_id, fingerprint) in misses.items()
+            if key in generated
+        ])
+        for key, (summary, ok) in zip(misses, outcomes):
+            results[key] = (summary, False, ok)
+
+    return [results[key] for key in keys]
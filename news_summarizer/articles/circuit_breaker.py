@@ -0,0 +1,130 @@
+"""
+Circuit breaker around calls to the LLM provider.
+
+When OpenAI is down or degraded, every summary would otherwise sit out a
+timeout (and the client's retries) before returning an error, tying up web
+workers and Celery slots. The breaker counts failed calls (connection
+errors, timeouts, 5xx responses, and calls slower than
+LLM_BREAKER_SLOW_CALL_SECONDS) in a shared cache, so every web and Celery
+process sees the same state. LLM_BREAKER_FAILURE_THRESHOLD failures within
+LLM_BREAKER_WINDOW seconds open the circuit: calls then fail at once with
+CircuitOpen and callers serve a cheap fallback instead.
+
+After LLM_BREAKER_OPEN_SECONDS the circuit is half-open: one probe call,
+across all processes, is let through while the others keep failing fast.
+A successful probe closes the circuit; a failed one opens it again. When
+the cache itself fails, calls are let through.
+"""
+import logging
+import time
+
+from django.conf import settings
+
+from articles import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes of a call, as passed to CircuitBreaker.record(). A neutral
+# outcome (e.g. a 429) says nothing about the provider's health.
+SUCCESS = 'success'
+FAILURE = 'failure'
+NEUTRAL = 'neutral'
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling a provider whose circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Failure count and open/half-open/closed state of one provider, kept in a Django cache.
+    """
+    def __init__(self, name, cache):
+        """
+        :param name: Name of the provider, e.g. 'openai'.
+        :param cache: The Django cache shared by every process.
+        """
+        self.name = name
+        self.cache = cache
+        self.failures_key = f'breaker:{name}:failures'
+        self.open_until_key = f'breaker:{name}:open_until'
+        self.probe_key = f'breaker:{name}:probe'
+
+    def state(self):
+        """
+        :return: CLOSED, OPEN or HALF_OPEN.
+        """
+        open_until = self.cache.get(self.open_until_key)
+        if open_until is None:
+            return CLOSED
+        return OPEN if open_until > time.time() else HALF_OPEN
+
+    def before_call(self):
+        """
+        Let a call through, or refuse it while the circuit is open.
+
+        :return: Whether the call is the half-open probe, to pass on to record().
+        :raises CircuitOpen: If the circuit is open, or half-open with a probe under way.
+        """
+        try:
+            open_until = self.cache.get(self.open_until_key)
+            if open_until is None:
+                return False
+            remaining = open_until - time.time()
+            # The probe key outlives a probe whose process died, so another
+            # probe is let through one open period later.
+            if remaining <= 0 and self.cache.add(self.probe_key, 1, timeout=settings.LLM_BREAKER_OPEN_SECONDS):
+                logger.info("Circuit %s half-open, probing.", self.name)
+                return True
+        except Exception as e:
+            logger.warning("Circuit breaker %s unavailable, letting the call through: %s", self.name, e)
+            return False
+        metrics.CIRCUIT_BREAKER_REJECTIONS.labels(name=self.name).inc()
+        if remaining > 0:
+            raise CircuitOpen(f"{self.name} circuit open for another {remaining:.0f}s.")
+        raise CircuitOpen(f"{self.name} circuit half-open, probe under way.")
+
+    def record(self, outcome, probe=False):
+        """
+        Count the outcome of a call let through by before_call().
+
+        :param outcome: SUCCESS, FAILURE or NEUTRAL.
+        :param probe: What before_call() returned for the call.
+        """
+        try:
+            if outcome == FAILURE:
+                self._record_failure(probe)
+            elif probe and outcome == SUCCESS:
+                self._close()
+            elif probe:
+                # Let the next caller probe instead.
+                self.cache.delete(self.probe_key)
+        except Exception as e:
+            logger.warning("Circuit breaker %s unavailable: %s", self.name, e)
+
+    def _record_failure(self, probe):
+        if probe:
+            self._open()
+            return
+        self.cache.add(self.failures_key, 0, timeout=settings.LLM_BREAKER_WINDOW)
+        failures = self.cache.incr(self.failures_key)
+        if failures >= settings.LLM_BREAKER_FAILURE_THRESHOLD and self.cache.get(self.open_until_key) is None:
+            self._open()
+
+    def _open(self):
+        # No timeout: the circuit stays open (then half-open) until a probe succeeds.
+        self.cache.set(self.open_until_key, time.time() + settings.LLM_BREAKER_OPEN_SECONDS, timeout=None)
+        self.cache.delete_many([self.failures_key, self.probe_key])
+        metrics.CIRCUIT_BREAKER_TRANSITIONS.labels(name=self.name, state=OPEN).inc()
+        logger.warning("Circuit %s opened for %ss.", self.name, settings.LLM_BREAKER_OPEN_SECONDS)
+
+    def _close(self):
+        self.cache.delete_many([self.open_until_key, self.failures_key, self.probe_key])
+        metrics.CIRCUIT_BREAKER_TRANSITIONS.labels(name=self.name, state=CLOSED).inc()
+        logger.info("Circuit %s closed.", self.name)
@@ -0,0 +1,212 @@
+"""
+Local fake NewsAPI and OpenAI servers. The benchmark suite (run_benchmarks)
+runs against them, so they ship with the app; the test suite uses them too.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST /v1/chat/completions like the OpenAI API. The reply is
+    "Summary of <title>", where <title> is read from the user message;
+    requests with `stream` get it word by word as server-sent events.
+    """
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+        with server.lock:
+            server.requests.append(payload)
+            status = server.failures.pop(0) if server.failures else 200
+        time.sleep(server.delay)
+
+        if status != 200:
+            body = {'error': {'message': 'fake failure', 'type': 'server_error', 'code': None}}
+        else:
+            user_message = payload['messages'][-1]['content']
+            title = user_message.split('\n', 1)[0].replace('Title: ', '', 1)
+            if payload.get('stream'):
+                self._stream(payload, f'Summary of {title}')
+                return
+            body = {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion',
+                'created': 0,
+                'model': payload.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': f'Summary of {title}'},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+            }
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status != 200 and server.retry_after is not None:
+            self.send_header('Retry-After', server.retry_after)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, payload, text):
+        """
+        Send `text` word by word as chat.completion.chunk events, server.chunk_delay apart.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        words = text.split(' ')
+        for i, word in enumerate(words):
+            chunk = {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion.chunk',
+                'created': 0,
+                'model': payload.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if i == 0 else f' {word}'},
+                    'finish_reason': None,
+                }],
+            }
+            try:
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading.
+                return
+            time.sleep(self.server.chunk_delay)
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Runs FakeOpenAIHandler on a random local port.
+
+    Attributes that tune the responses:
+    - delay: seconds to sleep before answering each request.
+    - failures: HTTP status codes returned, in order, before answering normally.
+    - chunk_delay: seconds between the words of a streamed answer.
+    - retry_after: Retry-After header value sent with failures, if any.
+    """
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeOpenAIHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.failures = []
+        self.delay = 0
+        self.chunk_delay = 0
+        self.retry_after = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v1'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+_SYLLABLES = ('ba', 'ker', 'lo', 'mi', 'nar', 'po', 'ret', 'sa', 'ti', 'ven', 'dor', 'gal')
+
+
+def fake_text(seed, words):
+    """
+    :return: `words` pseudo-words, the same for the same `seed`.
+    """
+    rng = random.Random(seed)
+    return ' '.join(''.join(rng.choices(_SYLLABLES, k=rng.randint(1, 3))) for _ in range(words))
+
+
+class FakeNewsApiHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /v2/everything like NewsAPI, with `server.total_results`
+    articles per query, newest first. Article URLs embed the query and
+    `server.url_prefix`, so separate runs can ingest disjoint articles.
+    """
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        server = self.server
+        with server.lock:
+            server.requests.append(params)
+        time.sleep(server.delay)
+
+        page, page_size = int(params['page']), int(params['pageSize'])
+        first = (page - 1) * page_size
+        last = min(first + page_size, server.total_results)
+        body = {
+            'status': 'ok',
+            'totalResults': server.total_results,
+            'articles': [server.article(params.get('q'), i) for i in range(first, last)],
+        }
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeNewsApiServer(ThreadingHTTPServer):
+    """
+    Runs FakeNewsApiHandler on a random local port.
+
+    Attributes that tune the responses:
+    - total_results: articles available per query.
+    - delay: seconds to sleep before answering each request.
+    - url_prefix: prefix of every article URL.
+    """
+    newest = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    def __init__(self, total_results=0, url_prefix='https://example.com'):
+        super().__init__(('127.0.0.1', 0), FakeNewsApiHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.total_results = total_results
+        self.delay = 0
+        self.url_prefix = url_prefix
+
+    def article(self, query, i):
+        """
+        :return: The i-th newest article of `query`, shaped like a NewsAPI result.
+        Texts are pseudo-random, so articles are not near-duplicates of each other.
+        """
+        return {
+            'source': {'id': None, 'name': f'Source {i % 20}'},
+            'title': f'{query} story {i}: {fake_text(f"{query}-title-{i}", 8)}',
+            'description': fake_text(f'{query}-description-{i}', 25),
+            'content': fake_text(f'{query}-content-{i}', 150) + '… [+1200 chars]',
+            'url': f'{self.url_prefix}/{query}/{i}',
+            'publishedAt': (self.newest - timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/v2/everything'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
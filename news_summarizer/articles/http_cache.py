@@ -0,0 +1,118 @@
+"""
+HTTP validators and cache headers for the article endpoints.
+
+Responses carry an ETag (and Last-Modified where a date bounds the data) built
+from values already loaded for the request, so a repeat request whose
+If-None-Match still matches is answered 304 Not Modified before anything is
+serialized. Cache-Control lets a CDN or reverse proxy serve repeats without
+reaching Django at all.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts, weak=False):
+    """
+    :param parts: Values identifying the representation; str() of each is hashed.
+    :param weak: Whether the ETag only promises semantically equivalent bodies.
+    :return: A quoted ETag header value.
+    """
+    digest = hashlib.blake2b('\0'.join(str(part) for part in parts).encode('utf-8'), digest_size=16)
+    etag = quote_etag(digest.hexdigest())
+    return f'W/{etag}' if weak else etag
+
+
+def article_etag(article):
+    """
+    :param article: An article row (dict) with id, fingerprint, published_date, source and canonical_id.
+    :return: The ETag of the article's detail representation.
+    """
+    return make_etag(
+        article['id'], article['fingerprint'], article['published_date'].isoformat(), article['source'],
+        article['canonical_id'],
+    )
+
+
+def page_etag(path, articles, *extra):
+    """
+    ETag of one page of a list. The page's max id and max published date
+    change whenever articles are added to it; the rows' fingerprints, dates
+    and sources change when an article on it is re-ingested with new text.
+
+    :param path: The request path with its query string (cursor, filters, include).
+    :param articles: The article rows (dicts) on the page.
+    :param extra: Further values the page depends on, e.g. the total count.
+    :return: A quoted ETag header value.
+    """
+    rows = [
+        (article['id'], article['fingerprint'], article['published_date'].isoformat(), article['source'],
+         article.get('summary') is not None)
+        for article in articles
+    ]
+    return make_etag(
+        path,
+        max((article['id'] for article in articles), default=0),
+        max((article['published_date'] for article in articles), default=''),
+        rows,
+        *extra,
+    )
+
+
+def summary_etag(article, model, prompt_version):
+    """
+    Weak ETag of an article's summary: a summary regenerated from the same
+    text, model and prompt may differ in wording but is equivalent.
+
+    :param article: The Article the summary is generated from (the canonical copy).
+    :param model: The model name.
+    :param prompt_version: The prompt version.
+    :return: A quoted weak ETag header value.
+    """
+    return make_etag(article.pk, article.fingerprint, model, prompt_version, weak=True)
+
+
+def _timestamp(last_modified):
+    """
+    :return: `last_modified` (an aware datetime or None) as a Unix timestamp.
+    """
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def set_cache_headers(response, etag, last_modified=None, max_age=None, vary=('Accept',)):
+    """
+    Add validators and Cache-Control to a response.
+
+    :param response: The response to update.
+    :param etag: The quoted ETag.
+    :param last_modified: Optional datetime for Last-Modified.
+    :param max_age: Seconds shared caches may serve the response, defaults to ARTICLE_HTTP_MAX_AGE.
+    :param vary: Request headers the representation depends on.
+    :return: The response.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    patch_cache_control(response, public=True, max_age=settings.ARTICLE_HTTP_MAX_AGE if max_age is None else max_age)
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
+
+
+def not_modified(request, etag, last_modified=None, max_age=None, vary=('Accept',)):
+    """
+    Answer a conditional GET whose validators still match.
+
+    :param request: The request, possibly with If-None-Match / If-Modified-Since.
+    :param etag: The current quoted ETag.
+    :param last_modified: Optional datetime the data last changed.
+    :param max_age: As for set_cache_headers.
+    :param vary: As for set_cache_headers.
+    :return: A 304 (or 412) response carrying the cache headers, or None to build the full response.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is None:
+        return None
+    return set_cache_headers(response, etag, last_modified, max_age, vary)
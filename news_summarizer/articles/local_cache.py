@@ -0,0 +1,114 @@
+"""
+Per-process LRU cache placed in front of the Redis summary cache.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class LocalLRUCache:
+    """
+    Thread-safe, size- and TTL-bounded LRU cache living in one worker process.
+
+    Entries also expire at their own `expires_at` if that comes first, so an
+    entry never outlives the freshness of the value it mirrors.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: The cache key.
+        :return: The cached value, or None if absent or expired.
+        """
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        """
+        :param key: The cache key.
+        :param value: The value to cache.
+        :param expires_at: Optional epoch time after which the value is stale.
+        """
+        if self.maxsize <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """
+        :param key: The cache key to drop.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every entry.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TierStats:
+    """
+    Hit and miss counters per cache tier, for this process.
+    """
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, hit: bool):
+        """
+        :param tier: Name of the cache tier, e.g. 'local' or 'redis'.
+        :param hit: Whether the lookup was a hit.
+        """
+        with self._lock:
+            self._counts[(tier, hit)] += 1
+
+    def snapshot(self):
+        """
+        :return: A dict of tier -> {'hits', 'misses', 'hit_rate'}.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        tiers = {tier for tier, _ in counts}
+        stats = {}
+        for tier in sorted(tiers):
+            hits = counts.get((tier, True), 0)
+            misses = counts.get((tier, False), 0)
+            stats[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return stats
+
+    def reset(self):
+        """
+        Zero all counters.
+        """
+        with self._lock:
+            self._counts.clear()
@@ -0,0 +1,141 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from articles.models import Article
+from articles.services import UPSERT_UPDATE_FIELDS
+
+# Indexes added for the list and per-source query patterns. url lookups and
+# upserts use the unique btree on url, which is never dropped.
+BENCHMARKED_INDEXES = (
+    'article_published_id_idx',
+    'article_source_published_idx',
+)
+
+
+class _Rollback(Exception):
+    """
+    Raised to undo the seeded rows and dropped indexes.
+    """
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a table of articles and times list and upsert queries with and without '
+        'the article indexes. Everything runs in one transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help="Articles to seed.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        results = {}
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                results['with_indexes'] = self._measure(options['repeat'])
+
+                indexes = [index for index in Article._meta.indexes if index.name in BENCHMARKED_INDEXES]
+                with connection.schema_editor() as schema_editor:
+                    for index in indexes:
+                        schema_editor.remove_index(Article, index)
+                self._analyze()
+                results['without_indexes'] = self._measure(options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'query':<28}{'without (ms)':>14}{'with (ms)':>12}")
+        for name, with_ms in results['with_indexes'].items():
+            without_ms = results['without_indexes'][name]
+            self.stdout.write(f"{name:<28}{without_ms:>14.3f}{with_ms:>12.3f}")
+
+    def _seed(self, rows):
+        """
+        Insert `rows` articles spread over 50 sources and one year.
+        """
+        self.stderr.write(f"Seeding {rows} articles...")
+        now = timezone.now()
+        batch = []
+        for i in range(rows):
+            batch.append(Article(
+                title=f"Seeded article {i}",
+                content=f"Seeded content {i} " * 20,
+                url=f"https://bench.example.com/{i:09d}/{'x' * 80}",
+                published_date=now - timedelta(minutes=i * 5),
+                source=f"Source {i % 50}",
+            ))
+            if len(batch) == 5000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Article.objects.bulk_create(batch)
+        self._analyze()
+
+    def _analyze(self):
+        """
+        Refresh planner statistics after bulk changes.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Article._meta.db_table}')
+
+    def _measure(self, repeat):
+        """
+        :return: A dict of query name -> median latency in milliseconds.
+        """
+        total = Article.objects.count()
+        deep_date = Article.objects.order_by('-published_date', '-id').values_list(
+            'published_date', flat=True
+        )[total - 20]
+        known_urls = list(Article.objects.values_list('url', flat=True)[:100])
+        fields = ('id', 'title', 'url', 'published_date', 'source')
+
+        def upsert():
+            now = timezone.now()
+            # Half of the rows already exist, half are new.
+            rows = [
+                Article(title="Upserted", content="Upserted content", url=url, published_date=now, source="Source 1")
+                for url in known_urls[:50]
+            ] + [
+                Article(title="Upserted", content="Upserted content",
+                        url=f"https://bench.example.com/new/{time.perf_counter_ns()}/{i}",
+                        published_date=now, source="Source 1")
+                for i in range(50)
+            ]
+            Article.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['url'], update_fields=UPSERT_UPDATE_FIELDS
+            )
+
+        queries = {
+            'list_first_page': lambda: list(Article.objects.values(*fields)[:10]),
+            'list_deep_keyset_page': lambda: list(
+                Article.objects.filter(published_date__lt=deep_date).values(*fields)[:10]
+            ),
+            'list_by_source': lambda: list(
+                Article.objects.filter(source='Source 7').order_by('-published_date').values(*fields)[:10]
+            ),
+            'url_lookup_100': lambda: list(Article.objects.filter(url__in=known_urls).values_list('pk', flat=True)),
+            'upsert_100': upsert,
+        }
+
+        timings = {}
+        for name, query in queries.items():
+            query()
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = statistics.median(samples)
+        return timings
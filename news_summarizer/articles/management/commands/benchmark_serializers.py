@@ -0,0 +1,116 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from articles.models import Article
+from articles.renderers import FastJSONRenderer
+from articles.serializers import (
+    ArticleDetailRowSerializer, ArticleDetailSerializer, ArticleListRowSerializer, ArticleListSerializer
+)
+
+
+class _Rollback(Exception):
+    """
+    Raised to undo the seeded rows.
+    """
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a page of articles and times loading, serializing and rendering it with the '
+        'ModelSerializer path and with the values()/orjson fast path. The rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help="Articles per page.")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed runs per variant.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._seed(options['rows'])
+                results = self._measure(options['rows'], options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'page':<10}{'model (ms)':>12}{'fast (ms)':>12}{'speedup':>10}{'identical':>11}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10}{result['model_ms']:>12.3f}{result['fast_ms']:>12.3f}"
+                f"{result['model_ms'] / result['fast_ms']:>9.1f}x{str(result['identical']):>11}"
+            )
+
+    def _seed(self, rows):
+        """
+        Insert `rows` articles with realistic field sizes, some non-ASCII text and a near-duplicate link.
+        """
+        now = timezone.now()
+        articles = Article.objects.bulk_create([
+            Article(
+                title=f"Seeded headline {i}: markets, élections and the économie",
+                content=f"Seeded paragraph {i} with some reporting. " * 40,
+                url=f"https://bench.example.com/{i:09d}/{'x' * 60}",
+                published_date=now - timedelta(minutes=i, microseconds=i),
+                source=f"Source {i % 10}",
+            )
+            for i in range(rows)
+        ])
+        articles[-1].canonical = articles[0]
+        articles[-1].save(update_fields=['canonical'])
+
+    def _measure(self, rows, repeat):
+        """
+        :return: A dict of page name -> {'model_ms', 'fast_ms', 'identical'} for one page of `rows` articles.
+        """
+        ordered = Article.objects.order_by('-published_date', '-id')
+
+        def model_path(serializer_class, queryset):
+            return JSONRenderer().render(serializer_class(list(queryset[:rows]), many=True).data)
+
+        def fast_path(serializer_class):
+            page = list(ordered.values(*serializer_class.row_fields())[:rows])
+            return FastJSONRenderer().render(serializer_class(page, many=True).data)
+
+        variants = {
+            'list': (
+                lambda: model_path(ArticleListSerializer, ordered),
+                lambda: fast_path(ArticleListRowSerializer),
+            ),
+            'detail': (
+                lambda: model_path(ArticleDetailSerializer, ordered),
+                lambda: fast_path(ArticleDetailRowSerializer),
+            ),
+        }
+
+        results = {}
+        for name, (model, fast) in variants.items():
+            results[name] = {
+                'model_ms': self._time(model, repeat),
+                'fast_ms': self._time(fast, repeat),
+                'identical': model() == fast(),
+            }
+        return results
+
+    def _time(self, func, repeat):
+        """
+        :return: The median latency of `func` in milliseconds.
+        """
+        func()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
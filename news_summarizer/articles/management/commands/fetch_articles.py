@@ -7,18 +7,33 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Fetches articles from the News API and stores them in the database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-wait',
+            action='store_true',
+            help="Queue the batches and return without waiting for the Celery workers.",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS("Starting the article fetching task..."))
         
         try:
-            articles_count = fetch_and_store_articles()
-            
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ Success! {articles_count} new articles were saved.')
-            )
+            result = fetch_and_store_articles(wait=not options['no_wait'])
+
+            if result['created'] is None:
+                self.stdout.write(
+                    self.style.SUCCESS(f"✅ Success! {result['queued']} articles were queued for saving.")
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"✅ Success! {result['created']} new articles were saved, "
+                        f"{result['updated']} existing articles were updated."
+                    )
+                )
             
         except Exception as e:
-            logger.error(f"❌ Error while running the article fetching task: {e}")
+            logger.error("❌ Error while running the article fetching task: %s", e)
             self.stdout.write(
                 self.style.ERROR(f'❌ Error while running the article fetching task: {e}')
             )
@@ -0,0 +1,109 @@
+import json
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from articles import benchmarks
+
+SCENARIOS = ('ingest', 'list', 'summary', 'extractive')
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the offline benchmark suite (ingest throughput, list/detail latency by page depth, '
+        'summary latency at cold, warm and stampede cache states, extractive summarizer throughput) '
+        'in a throwaway database and prints the results as JSON, optionally compared with a baseline run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"Comma-separated scenarios to run, from {', '.join(SCENARIOS)}.",
+        )
+        parser.add_argument('--articles', type=int, default=10_000, help="Articles seeded for list and summary.")
+        parser.add_argument('--ingest-articles', type=int, default=1000, help="Articles served by the fake NewsAPI.")
+        parser.add_argument(
+            '--depths', default='1,10,100', help="Comma-separated list page depths to measure.",
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per measurement.")
+        parser.add_argument('--llm-latency', type=float, default=0.2, help="Seconds the fake LLM takes to answer.")
+        parser.add_argument('--newsapi-latency', type=float, default=0.0, help="Seconds the fake NewsAPI takes to answer.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Simultaneous requests in the stampede.")
+        parser.add_argument('--output', help="Write the results to this file instead of stdout.")
+        parser.add_argument('--baseline', help="Results file of an earlier run to compare with.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown, e.g. 0.2.")
+        parser.add_argument(
+            '--fail-on-regression', action='store_true', help="Exit with an error if any metric regressed.",
+        )
+        parser.add_argument(
+            '--use-existing-db', action='store_true',
+            help="Run against the configured database instead of a throwaway copy; seeded rows are deleted after.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}.")
+        if 'summary' in scenarios and options['articles'] <= options['repeat']:
+            raise CommandError("--articles must exceed --repeat for the summary scenario.")
+
+        run_id = uuid.uuid4().hex[:12]
+        suite_args = dict(
+            scenarios=scenarios,
+            articles=options['articles'],
+            ingest_articles=options['ingest_articles'],
+            depths=[int(depth) for depth in options['depths'].split(',') if depth.strip()],
+            repeat=options['repeat'],
+            llm_latency=options['llm_latency'],
+            newsapi_latency=options['newsapi_latency'],
+            concurrency=options['concurrency'],
+            run_id=run_id,
+        )
+
+        if options['use_existing_db']:
+            try:
+                results = benchmarks.run_suite(**suite_args)
+            finally:
+                benchmarks.cleanup(run_id)
+        else:
+            results = self._in_scratch_database(suite_args)
+
+        report = {'options': {key: value for key, value in suite_args.items() if key != 'run_id'}, 'results': results}
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            report['comparison'], regressions = benchmarks.compare(
+                results, baseline.get('results', baseline), options['tolerance']
+            )
+            report['regressions'] = regressions
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stderr.write(f"Results written to {options['output']}.")
+        else:
+            self.stdout.write(output)
+
+        if regressions:
+            message = f"{len(regressions)} metrics regressed beyond {options['tolerance']:.0%}: {', '.join(regressions)}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stderr.write(message)
+
+    def _in_scratch_database(self, suite_args):
+        """
+        Run the suite in a freshly migrated copy of the database, dropped afterwards.
+        """
+        old_name = connection.settings_dict['NAME']
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_settings['NAME'] = f"benchmark_{old_name}"
+        self.stderr.write(f"Creating scratch database {test_settings['NAME']}...")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            return benchmarks.run_suite(**suite_args)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
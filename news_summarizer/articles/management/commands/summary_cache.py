@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from articles import chatgpt_service
+from articles.models import Article, Summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-warms the summary cache for the current model and prompt version, or '
+        'invalidates the cached summaries of one model and prompt version.'
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        prewarm = subparsers.add_parser('prewarm', help="Cache summaries of the most recent articles.")
+        prewarm.add_argument('--limit', type=int, default=1000, help="Most recent articles to warm.")
+        prewarm.add_argument('--batch-size', type=int, default=100, help="Articles per batch.")
+        prewarm.add_argument(
+            '--stored-only', action='store_true',
+            help="Only copy summaries stored in Postgres; never call OpenAI.",
+        )
+
+        invalidate = subparsers.add_parser('invalidate', help="Delete cached summaries of one version.")
+        invalidate.add_argument(
+            '--prompt-version', default=None,
+            help="Summary version to invalidate, e.g. 1.3f9a0c1e (default: the current one).",
+        )
+        invalidate.add_argument('--model', default=None, help="Model to invalidate (default: OPENAI_MODEL).")
+        invalidate.add_argument('--batch-size', type=int, default=1000, help="Keys deleted per round-trip.")
+        invalidate.add_argument(
+            '--purge-stored', action='store_true',
+            help="Also delete the summaries of that version stored in Postgres.",
+        )
+
+    def handle(self, *args, **options):
+        if options['action'] == 'prewarm':
+            self._prewarm(options['limit'], options['batch_size'], options['stored_only'])
+        else:
+            self._invalidate(
+                options['model'] or settings.OPENAI_MODEL,
+                options['prompt_version'] or chatgpt_service.summary_version(),
+                options['batch_size'], options['purge_stored'],
+            )
+
+    def _prewarm(self, limit, batch_size, stored_only):
+        """
+        Warm the cache for the `limit` most recent canonical articles.
+        Near-duplicates share their canonical article's summary.
+        """
+        articles = list(
+            Article.objects.filter(canonical__isnull=True)
+            .order_by('-published_date', '-id')
+            .values_list('pk', 'title', 'content', 'fingerprint')[:limit]
+        )
+        warmed = 0
+        for start in range(0, len(articles), batch_size):
+            batch = articles[start:start + batch_size]
+            article_ids = [row[0] for row in batch]
+            fingerprints = [row[3] for row in batch]
+            if stored_only:
+                warmed += chatgpt_service.warm_stored_summaries(article_ids, fingerprints)
+            else:
+                chatgpt_service.summarize_articles(
+                    [(title, content) for _, title, content, _ in batch],
+                    article_ids=article_ids,
+                    fingerprints=fingerprints,
+                )
+                warmed += len(batch)
+        self.stdout.write(f"Warmed {warmed} summaries of {len(articles)} articles.")
+
+    def _invalidate(self, model, prompt_version, batch_size, purge_stored):
+        """
+        Delete the cache keys of every article for `model` and `prompt_version`.
+        Keys are rebuilt from the stored fingerprints, so no key scan is needed.
+        """
+        fingerprints = Article.objects.exclude(fingerprint='').values_list('fingerprint', flat=True)
+        batch, invalidated = [], 0
+        for fingerprint in fingerprints.iterator(chunk_size=batch_size):
+            batch.append(fingerprint)
+            if len(batch) == batch_size:
+                chatgpt_service.invalidate_summaries(batch, model, prompt_version)
+                invalidated += len(batch)
+                batch = []
+        if batch:
+            chatgpt_service.invalidate_summaries(batch, model, prompt_version)
+            invalidated += len(batch)
+        chatgpt_service.invalidate_local_summaries()
+        self.stdout.write(f"Invalidated {invalidated} cache keys for {model}, prompt v{prompt_version}.")
+
+        if purge_stored:
+            deleted, _ = Summary.objects.filter(model_name=model, prompt_version=prompt_version).delete()
+            self.stdout.write(f"Deleted {deleted} stored summaries.")
@@ -0,0 +1,247 @@
+"""
+Prometheus metrics for the ingest, cache, summary and request paths.
+
+prometheus_client is optional: without it every metric below is a no-op
+and the /metrics endpoint answers 503. Under a multi-process server
+(gunicorn, uvicorn workers) set PROMETHEUS_MULTIPROC_DIR so each worker
+writes its samples where the scraped process can aggregate them.
+"""
+import contextlib
+import contextvars
+import logging
+import os
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+try:
+    import prometheus_client
+    from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets, in seconds, for calls to other services.
+REMOTE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Latency buckets, in seconds, for work done in this process and the database.
+LOCAL_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class _NoopMetric:
+    """
+    Stands in for a metric when prometheus_client is not installed.
+    """
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, amount):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def time(self):
+        return contextlib.nullcontext()
+
+
+def _metric(kind, name, documentation, labelnames=(), **kwargs):
+    """
+    :return: A prometheus_client metric of class `kind` (by name), or a no-op.
+    """
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+
+NEWSAPI_FETCH_SECONDS = _metric(
+    'Histogram', 'newsapi_fetch_seconds', "Latency of one NewsAPI page request.", ['outcome'],
+    buckets=REMOTE_BUCKETS,
+)
+INGEST_BATCH_SECONDS = _metric(
+    'Histogram', 'ingest_batch_seconds', "Time to save one batch of fetched articles.", ['outcome'],
+    buckets=LOCAL_BUCKETS,
+)
+DB_UPSERT_SECONDS = _metric(
+    'Histogram', 'article_upsert_seconds', "Latency of the bulk INSERT ... ON CONFLICT of a batch.",
+    buckets=LOCAL_BUCKETS,
+)
+LLM_CALL_SECONDS = _metric(
+    'Histogram', 'llm_call_seconds', "Latency of one chat completion, streamed ones until the last chunk.",
+    ['mode', 'outcome'], buckets=REMOTE_BUCKETS,
+)
+LLM_TOKENS = _metric('Counter', 'llm_tokens', "Tokens billed by the LLM.", ['kind'])
+CIRCUIT_BREAKER_TRANSITIONS = _metric(
+    'Counter', 'circuit_breaker_transitions', "Times a circuit breaker opened or closed.", ['name', 'state'],
+)
+CIRCUIT_BREAKER_REJECTIONS = _metric(
+    'Counter', 'circuit_breaker_rejections', "Calls refused by an open circuit breaker.", ['name'],
+)
+SUMMARY_CACHE_LOOKUPS = _metric(
+    'Counter', 'summary_cache_lookups', "Summary lookups per cache tier.", ['tier', 'result'],
+)
+CELERY_TASK_SECONDS = _metric(
+    'Histogram', 'celery_task_seconds', "Run time of Celery tasks.", ['task', 'state'],
+    buckets=REMOTE_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = _metric(
+    'Histogram', 'http_request_seconds', "Time to produce a response, per view.", ['view', 'method', 'status'],
+    buckets=LOCAL_BUCKETS + (10, 30),
+)
+HTTP_REQUEST_DB_QUERIES = _metric(
+    'Histogram', 'http_request_db_queries', "Database queries run per request, per view.", ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+
+@contextlib.contextmanager
+def timed(histogram, **labels):
+    """
+    Observe the duration of the block, labelled with `labels` and an
+    `outcome` of 'ok' or 'error'. A generator closed early is not an error.
+    """
+    outcome = 'ok'
+    started = time.perf_counter()
+    try:
+        yield
+    except GeneratorExit:
+        raise
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        histogram.labels(**labels, outcome=outcome).observe(time.perf_counter() - started)
+
+
+def record_cache_lookup(tier: str, hit: bool) -> None:
+    """
+    :param tier: Name of the cache tier, e.g. 'local' or 'redis'.
+    :param hit: Whether the lookup was a hit.
+    """
+    SUMMARY_CACHE_LOOKUPS.labels(tier=tier, result='hit' if hit else 'miss').inc()
+
+
+def record_llm_usage(usage) -> None:
+    """
+    :param usage: The `usage` of a chat completion response, or None.
+    """
+    if usage is None:
+        return
+    LLM_TOKENS.labels(kind='prompt').inc(usage.prompt_tokens or 0)
+    LLM_TOKENS.labels(kind='completion').inc(usage.completion_tokens or 0)
+
+
+# Queries run by the current request, counted by every connection it uses.
+# The counter is a one-item list so threads started by sync_to_async, which
+# run in a copy of the context, add to the same total.
+_query_count = contextvars.ContextVar('query_count', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+connection_created.connect(_install_query_counter)
+
+
+def start_query_count():
+    """
+    Start counting the queries of the current context.
+
+    :return: A token for stop_query_count().
+    """
+    return _query_count.set([0])
+
+
+def stop_query_count(token) -> int:
+    """
+    :param token: The token returned by start_query_count().
+    :return: The number of queries run since.
+    """
+    count = _query_count.get()[0]
+    _query_count.reset(token)
+    return count
+
+
+class QueueDepthCollector:
+    """
+    Reports the messages waiting in each queue of METRICS_CELERY_QUEUES,
+    read from the broker at scrape time.
+    """
+    def describe(self):
+        # Lets the registry learn the metric name without reaching the broker.
+        yield self._gauge()
+
+    def collect(self):
+        queues = settings.METRICS_CELERY_QUEUES
+        gauge = self._gauge()
+        if queues:
+            from news_summarizer.celery import app
+
+            try:
+                with app.connection_for_read() as connection:
+                    connection.ensure_connection(max_retries=1)
+                    channel = connection.default_channel
+                    for queue in queues:
+                        declared = channel.queue_declare(queue=queue, passive=True)
+                        gauge.add_metric([queue], declared.message_count)
+            except Exception as e:
+                logger.warning("Could not read Celery queue depths: %s", e)
+        yield gauge
+
+    def _gauge(self):
+        return GaugeMetricFamily('celery_queue_depth', "Messages waiting in a Celery queue.", labels=['queue'])
+
+
+if prometheus_client is not None:
+    REGISTRY.register(QueueDepthCollector())
+
+
+def registry():
+    """
+    :return: The registry to expose: this process's, or under
+        PROMETHEUS_MULTIPROC_DIR the samples of all worker processes.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    combined = CollectorRegistry()
+    multiprocess.MultiProcessCollector(combined)
+    combined.register(QueueDepthCollector())
+    return combined
+
+
+def render_latest():
+    """
+    :return: A tuple of (exposition body, content type), or None without prometheus_client.
+    """
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+# task id -> perf_counter() at task_prerun, until task_postrun.
+_task_starts = {}
+
+
+@task_prerun.connect
+def _task_started(task_id=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_starts.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_SECONDS.labels(task=task.name, state=state or 'UNKNOWN').observe(time.perf_counter() - started)
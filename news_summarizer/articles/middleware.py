@@ -0,0 +1,46 @@
+"""
+Middleware for the article API.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from articles import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Records how long each request takes and how many database queries it
+    runs, labelled by the resolved view name. Works under WSGI and ASGI; for
+    streamed responses only the time to the first byte is measured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, token = time.perf_counter(), metrics.start_query_count()
+        response = self.get_response(request)
+        self._record(request, response, started, token)
+        return response
+
+    async def __acall__(self, request):
+        started, token = time.perf_counter(), metrics.start_query_count()
+        response = await self.get_response(request)
+        self._record(request, response, started, token)
+        return response
+
+    def _record(self, request, response, started, token):
+        queries = metrics.stop_query_count(token)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            view=view, method=request.method, status=response.status_code,
+        ).observe(time.perf_counter() - started)
+        metrics.HTTP_REQUEST_DB_QUERIES.labels(view=view).observe(queries)
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_alter_article_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_key', models.CharField(max_length=64, unique=True)),
+                ('query', models.JSONField()),
+                ('last_published_date', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='content',
+            field=models.TextField(blank=True, null=True, validators=[django.core.validators.MinLengthValidator(20, 'Content must be at least 20 characters long.')]),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='title',
+            field=models.CharField(max_length=512, validators=[django.core.validators.MinLengthValidator(5, 'Title must be at least 5 characters long.')]),
+        ),
+    ]
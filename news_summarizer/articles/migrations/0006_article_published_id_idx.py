@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:57
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0005_summary'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='article',
+            options={'ordering': ['-published_date', '-id']},
+        ),
+        AddIndexConcurrently(
+            model_name='article',
+            index=models.Index(fields=['-published_date', '-id'], name='article_published_id_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0006_article_published_id_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='article',
+            index=models.Index(fields=['source', 'published_date'], name='article_source_published_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='article',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['url'], name='article_url_hash_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:01
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0007_article_source_published_idx_article_url_hash_idx'),
+    ]
+
+    operations = [
+        # NOT an online migration. Adding a stored generated column makes
+        # Postgres rewrite all of articles_article under an ACCESS EXCLUSIVE
+        # lock, blocking reads and writes for as long as the rewrite takes;
+        # only the GIN index below is built concurrently. Run it in a
+        # maintenance window on large tables.
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('content', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        AddIndexConcurrently(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+    ]
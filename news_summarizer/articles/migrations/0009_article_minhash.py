@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:08
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0008_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='canonical',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='articles.article'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='minhash',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='minhash_bands',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, null=True, size=None),
+        ),
+        AddIndexConcurrently(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['minhash_bands'], name='article_minhash_bands_idx'),
+        ),
+    ]
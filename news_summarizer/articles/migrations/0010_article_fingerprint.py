@@ -0,0 +1,92 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:16
+
+import hashlib
+import html
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# A frozen copy of articles.preprocessing.clean_text and content_fingerprint
+# as they were when this migration was written. Replaying the migration must
+# give the fingerprints it gave then, whatever the cleaning rules become.
+_SCRIPT_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_TRUNCATION_MARKER_RE = re.compile(r'\s*…?\s*\[\+\d+ chars\]\s*$')
+_BOILERPLATE_RE = re.compile(
+    r'^\s*(advertisement|read more|continue reading|click here|subscribe\b|sign up\b|'
+    r'follow us\b|share this\b|all rights reserved|copyright\b|©).*(\n|$)',
+    re.IGNORECASE | re.MULTILINE,
+)
+_SPACES_RE = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+def _clean_text(text):
+    if not text:
+        return ''
+    text = _SCRIPT_RE.sub(' ', text)
+    text = html.unescape(_TAG_RE.sub(' ', text))
+    text = _TRUNCATION_MARKER_RE.sub('', text)
+    text = _BOILERPLATE_RE.sub('', text)
+    text = _SPACES_RE.sub(' ', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    return '\n'.join(line.strip() for line in text.strip().split('\n'))
+
+
+def _content_fingerprint(title, content):
+    text = f"{_clean_text(title)}\0{_clean_text(content)}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """
+    Fingerprint existing articles and re-key their stored summaries, which
+    were keyed by an MD5 of "title:content", so they stay reachable.
+    """
+    Article = apps.get_model('articles', 'Article')
+    Summary = apps.get_model('articles', 'Summary')
+
+    batch = []
+    for article in Article.objects.only('title', 'content').iterator(chunk_size=BATCH_SIZE):
+        article.fingerprint = _content_fingerprint(article.title, article.content)
+        batch.append(article)
+        if len(batch) == BATCH_SIZE:
+            _save_batch(Article, Summary, batch)
+            batch = []
+    if batch:
+        _save_batch(Article, Summary, batch)
+
+
+def _save_batch(Article, Summary, articles):
+    Article.objects.bulk_update(articles, ['fingerprint'])
+    legacy_hashes = {
+        article.pk: hashlib.md5(f"{article.title}:{article.content}".encode('utf-8')).hexdigest()
+        for article in articles
+    }
+    fingerprints = {article.pk: article.fingerprint for article in articles}
+    summaries = list(Summary.objects.filter(article_id__in=legacy_hashes).only('article_id', 'content_hash'))
+    current = [summary for summary in summaries if summary.content_hash == legacy_hashes[summary.article_id]]
+    for summary in current:
+        summary.content_hash = fingerprints[summary.article_id]
+    Summary.objects.bulk_update(current, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    # Commit the backfill batch by batch instead of in one long transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0009_article_minhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 05:10
+
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # DROP INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('articles', '0010_article_fingerprint'),
+    ]
+
+    operations = [
+        # The unique btree on url already serves url lookups; the hash index only slowed down upserts.
+        RemoveIndexConcurrently(
+            model_name='article',
+            name='article_url_hash_idx',
+        ),
+    ]
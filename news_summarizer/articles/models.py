@@ -1,9 +1,14 @@
 """
 Article model for storing news articles.
 """
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 from django.core.validators import MinLengthValidator
 
+from articles.preprocessing import content_fingerprint
+
 
 class Article(models.Model):
     """Article object."""
@@ -20,16 +25,96 @@ class Article(models.Model):
     url = models.URLField(unique=True,max_length=2000)
     published_date = models.DateTimeField()
     source = models.CharField(max_length=255)
-
+    # Maintained by Postgres on every insert/update, so searches never build it per query.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('content', weight='B', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # MinHash signature of title and content, and its LSH band keys; see articles.dedup.
+    minhash = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    minhash_bands = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    # Earlier article this one is a near-duplicate of (e.g. a syndicated copy).
+    canonical = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
+    # Hash of the cleaned title and content; keys the article's summaries.
+    fingerprint = models.CharField(max_length=32, blank=True, editable=False)
 
     class Meta:
         """
         Meta data for Article model.
         """
-        ordering = ["-published_date"]
+        ordering = ["-published_date", "-id"]
+        indexes = [
+            # Serves the default ordering and keyset pagination.
+            models.Index(fields=['-published_date', '-id'], name='article_published_id_idx'),
+            # Per-source listings, newest first.
+            models.Index(fields=['source', 'published_date'], name='article_source_published_idx'),
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+            # Near-duplicate candidates share at least one band key (array overlap).
+            GinIndex(fields=['minhash_bands'], name='article_minhash_bands_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Refresh the fingerprint from the current text before saving.
+        Bulk ingest sets it in ArticleService.normalize_article instead.
+        """
+        self.fingerprint = content_fingerprint(self.title, self.content)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
         String representation of the Article object.
         """
-        return self.title
\ No newline at end of file
+        return self.title
+
+
+class FetchWatermark(models.Model):
+    """
+    High-water mark of the newest article fetched for one NewsAPI query.
+    """
+    query_key = models.CharField(max_length=64, unique=True)
+    query = models.JSONField()
+    last_published_date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        String representation of the FetchWatermark object.
+        """
+        return f"{self.query} @ {self.last_published_date.isoformat()}"
+
+
+class Summary(models.Model):
+    """
+    A generated article summary, kept durably behind the Redis summary cache.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='summaries')
+    # Article.fingerprint of the text the summary was generated from.
+    content_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=100)
+    prompt_version = models.CharField(max_length=32)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """
+        Meta data for Summary model.
+        """
+        constraints = [
+            models.UniqueConstraint(
+                fields=['article', 'content_hash', 'model_name', 'prompt_version'],
+                name='unique_article_summary_version',
+            ),
+        ]
+
+    def __str__(self):
+        """
+        String representation of the Summary object.
+        """
+        return f"Summary of {self.article_id} ({self.model_name}, prompt v{self.prompt_version})"
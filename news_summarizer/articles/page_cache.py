@@ -0,0 +1,68 @@
+"""
+Cache of rendered article list pages.
+
+Pages are kept in the default cache under the scheme and host they were
+requested through (their `next`/`previous` links are absolute), their
+normalized query string and a global "articles generation". Every write to the articles table bumps the
+generation (ingest once per batch), which makes all cached pages unreachable
+with a single INCR: nothing stale is served, and old pages simply expire.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+GENERATION_KEY = 'articles:generation'
+KEY_PREFIX = 'articles:page:'
+# Request header that skips the page cache, for debugging.
+BYPASS_HEADER = 'X-Cache-Bypass'
+
+
+def articles_generation():
+    """
+    :return: The current articles generation.
+    """
+    return cache.get(GENERATION_KEY, 0)
+
+
+def bump_articles_generation():
+    """
+    Invalidate every cached list page. Call after articles are written.
+    """
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Never set, or evicted. Restart from the clock rather than 0, so pages
+        # cached under an earlier generation cannot become reachable again.
+        cache.add(GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def page_cache_key(generation, origin, params, media_type):
+    """
+    :param generation: The articles generation the page is rendered from.
+    :param origin: The scheme and host the page was requested through, e.g.
+        "https://news.example.com"; the body's links are built from them.
+    :param params: The request's query parameters (a QueryDict).
+    :param media_type: The negotiated media type of the rendered body.
+    :return: The cache key of the page.
+    """
+    query = urlencode(sorted((name, sorted(values)) for name, values in params.lists()), doseq=True)
+    digest = hashlib.blake2b(f"{media_type} {origin}?{query}".encode('utf-8'), digest_size=16).hexdigest()
+    return f"{KEY_PREFIX}{generation}:{digest}"
+
+
+def get_page(key):
+    """
+    :param key: A key from page_cache_key().
+    :return: A tuple of (body bytes, content type, ETag, last modified datetime), or None.
+    """
+    return cache.get(key)
+
+
+def store_page(key, body, content_type, etag, last_modified):
+    """
+    Cache a rendered page for ARTICLE_PAGE_CACHE_TIMEOUT seconds.
+    """
+    cache.set(key, (body, content_type, etag, last_modified), timeout=settings.ARTICLE_PAGE_CACHE_TIMEOUT)
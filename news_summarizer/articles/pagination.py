@@ -1,7 +1,7 @@
 """
 Pagination settings for article listings.
 """ 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class StandardResultsSetPagination(PageNumberPagination):
     """
@@ -9,4 +9,28 @@ class StandardResultsSetPagination(PageNumberPagination):
     """ 
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class ArticleCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by (-published_date, -id).
+    DRF's cursor only keys on the first ordering field: a page starts with a
+    range condition on published_date, served by the (published_date, id)
+    index, and articles sharing the boundary date are skipped by an offset
+    carried in the cursor. Deep pages cost about the same as the first unless
+    many articles share one publish date, and no COUNT(*) is issued. `-id`
+    only makes the order deterministic.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-published_date', '-id')
+
+
+class ArticleSearchPagination(ArticleCursorPagination):
+    """
+    Cursor pagination over search results, best match first. The cursor
+    keys on rank; ties in rank are skipped by offset.
+    """
+    ordering = ('-rank', '-published_date', '-id')
@@ -0,0 +1,216 @@
+"""
+Prepares article text before it is sent to ChatGPT.
+
+Markup and boilerplate are stripped, the remaining text is measured in
+tokens, and long articles are either truncated to SUMMARY_INPUT_TOKEN_BUDGET
+or cut into chunks for map-reduce summarization, so the cost and latency of
+one summary are bounded whatever the article length.
+"""
+import hashlib
+import html
+import logging
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in English text, used when tiktoken is unavailable.
+CHARS_PER_TOKEN = 4
+
+_SCRIPT_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+# NewsAPI truncates `content` and appends e.g. "… [+2345 chars]".
+TRUNCATION_MARKER_RE = re.compile(r'\s*…?\s*\[\+\d+ chars\]\s*$')
+_BOILERPLATE_RE = re.compile(
+    r'^\s*(advertisement|read more|continue reading|click here|subscribe\b|sign up\b|'
+    r'follow us\b|share this\b|all rights reserved|copyright\b|©).*(\n|$)',
+    re.IGNORECASE | re.MULTILINE,
+)
+_SPACES_RE = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def clean_text(text):
+    """
+    Strip HTML, NewsAPI's truncation marker and boilerplate lines, and normalize whitespace.
+
+    :param text: Raw article text, may be None.
+    :return: The cleaned text.
+    """
+    if not text:
+        return ''
+    text = _SCRIPT_RE.sub(' ', text)
+    text = html.unescape(_TAG_RE.sub(' ', text))
+    text = TRUNCATION_MARKER_RE.sub('', text)
+    text = _BOILERPLATE_RE.sub('', text)
+    text = _SPACES_RE.sub(' ', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    return '\n'.join(line.strip() for line in text.strip().split('\n'))
+
+
+def split_sentences(text):
+    """
+    :param text: Raw article text, may be None.
+    :return: The sentences of the cleaned text, with whitespace collapsed.
+    """
+    return [sentence for sentence in _SENTENCE_END_RE.split(' '.join(clean_text(text).split())) if sentence]
+
+
+def lead_sentences(title, content):
+    """
+    Extractive stand-in for a summary: the first SUMMARY_EXTRACTIVE_SENTENCES
+    sentences of the cleaned content, within SUMMARY_EXTRACTIVE_MAX_WORDS words.
+
+    :param title: The title of the article, returned when there is no content.
+    :param content: The content of the article, may be None.
+    :return: The lead text.
+    """
+    max_words = settings.SUMMARY_EXTRACTIVE_MAX_WORDS
+    lead, words = [], 0
+    for sentence in split_sentences(content):
+        sentence_words = sentence.split()
+        if len(lead) == settings.SUMMARY_EXTRACTIVE_SENTENCES or words + len(sentence_words) > max_words:
+            if not lead:
+                lead.append(' '.join(sentence_words[:max_words]) + '…')
+            break
+        lead.append(sentence)
+        words += len(sentence_words)
+    return ' '.join(lead) or clean_text(title)
+
+
+def content_fingerprint(title, content):
+    """
+    Fingerprint of an article's cleaned text, stored on Article at ingest.
+    Texts differing only in markup, boilerplate or whitespace share one fingerprint.
+
+    :param title: The title of the article.
+    :param content: The content of the article, may be None.
+    :return: A 32-character hex digest.
+    """
+    text = f"{clean_text(title)}\0{clean_text(content)}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    """
+    :return: The tiktoken encoding for `model`, or None to fall back to a character estimate.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        # The encoding files could not be loaded (e.g. no network on first use).
+        logger.warning("tiktoken encoding unavailable, estimating token counts.")
+        return None
+
+
+def count_tokens(text):
+    """
+    :param text: Text to measure.
+    :return: The number of tokens `text` costs with the configured model.
+    """
+    encoding = _encoding(settings.OPENAI_MODEL)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text, budget):
+    """
+    Cut `text` to at most `budget` tokens, at a word boundary where possible.
+
+    :param text: Text to truncate.
+    :param budget: Maximum number of tokens to keep.
+    :return: The truncated text.
+    """
+    encoding = _encoding(settings.OPENAI_MODEL)
+    if encoding is None:
+        limit = budget * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+        return cut.rsplit(' ', 1)[0] if ' ' in cut else cut
+    tokens = encoding.encode(text)
+    if len(tokens) <= budget:
+        return text
+    return encoding.decode(tokens[:budget]).rsplit(' ', 1)[0]
+
+
+def split_into_chunks(text, chunk_tokens):
+    """
+    Split `text` into pieces of at most `chunk_tokens` tokens, breaking between
+    paragraphs or sentences where possible.
+
+    :param text: Text to split.
+    :param chunk_tokens: Maximum number of tokens per chunk.
+    :return: A list of text chunks.
+    """
+    pieces = []
+    for paragraph in text.split('\n\n'):
+        if count_tokens(paragraph) <= chunk_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END_RE.split(paragraph):
+            while count_tokens(sentence) > chunk_tokens:
+                head = truncate_to_tokens(sentence, chunk_tokens)
+                if not head:
+                    break
+                pieces.append(head)
+                sentence = sentence[len(head):].lstrip()
+            if sentence:
+                pieces.append(sentence)
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append(' '.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def prepare_input(title, content):
+    """
+    Turn an article into the input actually sent to ChatGPT.
+
+    Content within SUMMARY_INPUT_TOKEN_BUDGET is sent whole. Longer content
+    is split into chunks of SUMMARY_CHUNK_TOKENS (at most SUMMARY_MAX_CHUNKS)
+    for map-reduce when SUMMARY_MAP_REDUCE is on, and truncated to the
+    budget otherwise.
+
+    :param title: The title of the article.
+    :param content: The content of the article, may be None.
+    :return: A tuple of (cleaned title, tuple of content chunks).
+    """
+    return _prepare(
+        title, content, settings.OPENAI_MODEL, settings.SUMMARY_INPUT_TOKEN_BUDGET,
+        settings.SUMMARY_MAP_REDUCE, settings.SUMMARY_CHUNK_TOKENS, settings.SUMMARY_MAX_CHUNKS,
+    )
+
+
+# Settings are part of the key so a changed budget is never served from the cache.
+@lru_cache(maxsize=256)
+def _prepare(title, content, model, budget, map_reduce, chunk_tokens, max_chunks):
+    title = clean_text(title)
+    content = clean_text(content)
+    if count_tokens(content) <= budget:
+        return title, (content,)
+    if map_reduce:
+        return title, tuple(split_into_chunks(content, chunk_tokens)[:max_chunks])
+    return title, (truncate_to_tokens(content, budget),)
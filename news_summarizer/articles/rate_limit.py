@@ -0,0 +1,312 @@
+"""
+Client-side rate limits for outbound OpenAI and NewsAPI calls.
+
+Each limited service has a token bucket per dimension (requests and, for
+the LLM, tokens) kept in Redis, so every web and Celery process draws on
+one shared quota. A bucket holds up to a minute's quota and refills
+continuously, so callers get the provider's full sustained rate and a
+burst of at most a minute's worth, instead of a 429 storm followed by
+error summaries.
+
+Callers have a priority. Background work (pre-summarization, refreshes of
+stale summaries) may not take the last RATE_LIMIT_INTERACTIVE_RESERVE of a
+bucket and stands aside while any interactive caller is waiting, so a user
+waiting on a summary is served ahead of a backlog of batch work.
+
+Buckets are updated in a WATCH/MULTI transaction, retried on conflict, so
+they need no server-side scripting. Without a django-redis cache (local
+development, tests) or when Redis fails, calls are not limited.
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from redis.exceptions import WatchError
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+KEY_PREFIX = 'ratelimit:'
+# Longest sleep between two attempts, so a waiter notices freed capacity.
+MAX_POLL_INTERVAL = 0.5
+# Seconds an interactive waiter's mark lives if its process dies while waiting.
+WAITER_TTL = 30
+
+_priority = contextvars.ContextVar('rate_limit_priority', default=INTERACTIVE)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when no capacity became available within the caller's wait limit.
+    """
+
+
+@contextlib.contextmanager
+def priority(level):
+    """
+    Run the block's outbound calls at `level` (INTERACTIVE or BACKGROUND).
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """
+    :return: The priority of outbound calls made from the current context.
+    """
+    return _priority.get()
+
+
+def with_current_priority(func):
+    """
+    Wrap `func` to run at the caller's priority, e.g. on an executor thread,
+    which does not inherit the caller's context.
+    """
+    level = current_priority()
+
+    def wrapper(*args, **kwargs):
+        with priority(level):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _redis():
+    """
+    :return: The Redis client of RATE_LIMIT_CACHE_ALIAS, or None if that cache is not django-redis.
+    """
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection(settings.RATE_LIMIT_CACHE_ALIAS)
+    except (ImportError, NotImplementedError):
+        return None
+
+
+class RateLimiter:
+    """
+    Shared token buckets for one outbound service.
+    """
+    def __init__(self, name, client, requests_per_minute=None, tokens_per_minute=None):
+        """
+        :param name: Name of the service, e.g. 'openai'.
+        :param client: A redis-py client, or None to not limit.
+        :param requests_per_minute: Request quota, or None for no request limit.
+        :param tokens_per_minute: Token quota, or None for no token limit.
+        """
+        self.name = name
+        self.client = client
+        self.limits = {
+            dimension: per_minute
+            for dimension, per_minute in (('requests', requests_per_minute), ('tokens', tokens_per_minute))
+            if per_minute
+        }
+        self.waiters_key = f'{KEY_PREFIX}{name}:interactive_waiters'
+        self.blocked_key = f'{KEY_PREFIX}{name}:blocked_until'
+
+    @property
+    def enabled(self):
+        return self.client is not None and bool(self.limits)
+
+    def _bucket_key(self, dimension):
+        return f'{KEY_PREFIX}{self.name}:{dimension}'
+
+    def _amounts(self, requests, tokens):
+        """
+        :return: A dict of limited dimension -> amount to take, capped at the bucket size.
+        """
+        wanted = {'requests': requests, 'tokens': tokens}
+        return {dimension: min(wanted[dimension], limit) for dimension, limit in self.limits.items()}
+
+    def _level(self, state, limit, now):
+        """
+        :return: The bucket's level at `now`, refilled since it was last written.
+        """
+        if not state:
+            return float(limit)
+        level, updated = float(state[b'level']), float(state[b'updated'])
+        return min(float(limit), level + (now - updated) * limit / 60)
+
+    def try_acquire(self, requests=1, tokens=0, level=None):
+        """
+        Take capacity from every bucket at once, or from none.
+
+        :param requests: Requests to take.
+        :param tokens: Tokens to take.
+        :param level: INTERACTIVE or BACKGROUND, defaults to the current priority.
+        :return: 0 if the capacity was taken, otherwise the seconds to wait before trying again.
+        """
+        if not self.enabled:
+            return 0
+        level = level or current_priority()
+        amounts = self._amounts(requests, tokens)
+        keys = [self._bucket_key(dimension) for dimension in amounts]
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*keys, self.blocked_key, self.waiters_key)
+                    now = time.time()
+                    blocked_until = float(pipe.get(self.blocked_key) or 0)
+                    if blocked_until > now:
+                        pipe.unwatch()
+                        return blocked_until - now
+                    if level == BACKGROUND and int(pipe.get(self.waiters_key) or 0) > 0:
+                        pipe.unwatch()
+                        return MAX_POLL_INTERVAL
+
+                    levels, wait = {}, 0
+                    for dimension, amount in amounts.items():
+                        limit = self.limits[dimension]
+                        levels[dimension] = self._level(pipe.hgetall(self._bucket_key(dimension)), limit, now)
+                        floor = limit * settings.RATE_LIMIT_INTERACTIVE_RESERVE if level == BACKGROUND else 0
+                        missing = amount + floor - levels[dimension]
+                        if missing > 0:
+                            wait = max(wait, missing * 60 / limit)
+                    if wait:
+                        pipe.unwatch()
+                        return wait
+
+                    pipe.multi()
+                    for dimension, amount in amounts.items():
+                        key = self._bucket_key(dimension)
+                        pipe.hset(key, mapping={'level': levels[dimension] - amount, 'updated': now})
+                        pipe.expire(key, 120)
+                    pipe.execute()
+                    return 0
+                except WatchError:
+                    continue
+
+    def acquire(self, requests=1, tokens=0, level=None, timeout=None):
+        """
+        Wait until capacity is available and take it.
+
+        :param requests: Requests to take.
+        :param tokens: Tokens to take.
+        :param level: INTERACTIVE or BACKGROUND, defaults to the current priority.
+        :param timeout: Seconds to wait at most, defaults to RATE_LIMIT_MAX_WAIT for the level.
+        :raises RateLimitExceeded: If no capacity became available in time.
+        """
+        level = level or current_priority()
+        deadline = time.monotonic() + (settings.RATE_LIMIT_MAX_WAIT[level] if timeout is None else timeout)
+        waiting = False
+        try:
+            while True:
+                wait = self._attempt(requests, tokens, level)
+                if not wait:
+                    return
+                if level == INTERACTIVE and not waiting:
+                    waiting = self._mark_waiting(1)
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise RateLimitExceeded(f"No {self.name} capacity within {remaining:.1f}s (needs {wait:.1f}s).")
+                time.sleep(min(wait, MAX_POLL_INTERVAL))
+        finally:
+            if waiting:
+                self._mark_waiting(-1)
+
+    async def aacquire(self, requests=1, tokens=0, level=None, timeout=None):
+        """
+        Async variant of acquire that sleeps without holding a thread.
+        """
+        level = level or current_priority()
+        deadline = time.monotonic() + (settings.RATE_LIMIT_MAX_WAIT[level] if timeout is None else timeout)
+        waiting = False
+        try:
+            while True:
+                wait = await sync_to_async(self._attempt)(requests, tokens, level)
+                if not wait:
+                    return
+                if level == INTERACTIVE and not waiting:
+                    waiting = await sync_to_async(self._mark_waiting)(1)
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise RateLimitExceeded(f"No {self.name} capacity within {remaining:.1f}s (needs {wait:.1f}s).")
+                await asyncio.sleep(min(wait, MAX_POLL_INTERVAL))
+        finally:
+            if waiting:
+                await sync_to_async(self._mark_waiting)(-1)
+
+    def _attempt(self, requests, tokens, level):
+        """
+        try_acquire that lets the call through when Redis fails, rather than stop all traffic.
+        """
+        try:
+            return self.try_acquire(requests, tokens, level)
+        except Exception as e:
+            logger.warning("Rate limiter %s unavailable, not limiting: %s", self.name, e)
+            return 0
+
+    def _mark_waiting(self, delta):
+        """
+        Count an interactive caller in or out of the waiters background callers yield to.
+
+        :return: Whether the count was updated.
+        """
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.incrby(self.waiters_key, delta)
+                pipe.expire(self.waiters_key, WAITER_TTL)
+                pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("Rate limiter %s unavailable: %s", self.name, e)
+            return False
+
+    def adjust(self, tokens):
+        """
+        Settle the difference between the tokens taken up front and those
+        actually used: a positive `tokens` takes more (the bucket may go into
+        debt), a negative one gives the rest back.
+        """
+        if not self.enabled or 'tokens' not in self.limits or not tokens:
+            return
+        key, limit = self._bucket_key('tokens'), self.limits['tokens']
+        try:
+            with self.client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(key)
+                        now = time.time()
+                        level = self._level(pipe.hgetall(key), limit, now)
+                        pipe.multi()
+                        pipe.hset(key, mapping={'level': min(float(limit), level - tokens), 'updated': now})
+                        pipe.expire(key, 120)
+                        pipe.execute()
+                        return
+                    except WatchError:
+                        continue
+        except Exception as e:
+            logger.warning("Rate limiter %s unavailable: %s", self.name, e)
+
+    def block(self, seconds):
+        """
+        Stop every process from calling the service for `seconds`, e.g. after
+        a 429 with Retry-After, so one throttled call does not set off a storm.
+        """
+        if not self.enabled or seconds <= 0:
+            return
+        try:
+            self.client.set(self.blocked_key, time.time() + seconds, px=int(seconds * 1000) + 1)
+        except Exception as e:
+            logger.warning("Rate limiter %s unavailable: %s", self.name, e)
+
+
+def get_limiter(name):
+    """
+    :param name: A key of RATE_LIMITS, e.g. 'openai' or 'newsapi'.
+    :return: The RateLimiter for that service; it does not limit without a quota or Redis.
+    """
+    quota = settings.RATE_LIMITS.get(name, {})
+    return RateLimiter(
+        name,
+        _redis() if quota else None,
+        requests_per_minute=quota.get('requests_per_minute'),
+        tokens_per_minute=quota.get('tokens_per_minute'),
+    )
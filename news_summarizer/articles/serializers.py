@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Article
+from .summarizers import UnknownBackend, get_backend
 
 class ArticleListSerializer(serializers.ModelSerializer):
     """
@@ -10,13 +12,88 @@ class ArticleListSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'url', 'published_date', 'source')
 
 
+class ArticleListWithSummarySerializer(ArticleListSerializer):
+    """
+    Serializer to display a list of articles together with their stored summaries.
+    """
+    summary = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(ArticleListSerializer.Meta):
+        fields = ArticleListSerializer.Meta.fields + ('summary',)
+
+
 class ArticleDetailSerializer(serializers.ModelSerializer):
     """
     Serializer to display single article details (including full content).
+    `canonical` is the id of the article this one nearly duplicates, or null.
     # """
     class Meta:
         model = Article
-        fields = ('id', 'title', 'content', 'url', 'published_date', 'source')
+        fields = ('id', 'title', 'content', 'url', 'published_date', 'source', 'canonical')
+
+
+class ArticleRowSerializer:
+    """
+    Read-only serializer for rows from `QuerySet.values()`.
+
+    Produces exactly the output of `model_serializer` without model instances
+    or per-row field objects: values are copied in its field order and only
+    dates are formatted, by one shared DRF field.
+    """
+    model_serializer = None
+    _datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+        self.many = many
+        self._keys = list(zip(self.model_serializer.Meta.fields, self.row_fields()))
+
+    @classmethod
+    def row_fields(cls):
+        """
+        :return: The keys each row must hold, for `QuerySet.values()`.
+        """
+        # Foreign keys come out of values() under their column name.
+        return tuple('canonical_id' if field == 'canonical' else field for field in cls.model_serializer.Meta.fields)
+
+    def to_representation(self, row):
+        """
+        :param row: A dict holding at least row_fields().
+        :return: The serialized article.
+        """
+        data = {field: row[key] for field, key in self._keys}
+        data['published_date'] = self._datetime_field.to_representation(data['published_date'])
+        return data
+
+    @property
+    def data(self):
+        """
+        :return: The serialized row, or a list of them when `many` is set.
+        """
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+
+class ArticleListRowSerializer(ArticleRowSerializer):
+    """
+    Fast path of ArticleListSerializer.
+    """
+    model_serializer = ArticleListSerializer
+
+
+class ArticleListWithSummaryRowSerializer(ArticleRowSerializer):
+    """
+    Fast path of ArticleListWithSummarySerializer.
+    """
+    model_serializer = ArticleListWithSummarySerializer
+
+
+class ArticleDetailRowSerializer(ArticleRowSerializer):
+    """
+    Fast path of ArticleDetailSerializer.
+    """
+    model_serializer = ArticleDetailSerializer
 
 
 class ArticleSummarySerializer(serializers.Serializer):
@@ -24,4 +101,32 @@ class ArticleSummarySerializer(serializers.Serializer):
     Serializer to display article summary.
     """
     summary = serializers.CharField()
-    cached = serializers.BooleanField()
\ No newline at end of file
+    cached = serializers.BooleanField()
+
+
+class BulkSummaryRequestSerializer(serializers.Serializer):
+    """
+    Serializer to validate the article ids of a bulk summaries request.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.SUMMARY_BULK_MAX_IDS,
+    )
+    backend = serializers.CharField(required=False)
+
+    def validate_backend(self, value):
+        """
+        Resolve the backend name to a summarizer backend.
+        """
+        try:
+            return get_backend(value)
+        except UnknownBackend as e:
+            raise serializers.ValidationError(str(e))
+
+
+class ArticleBulkSummarySerializer(ArticleSummarySerializer):
+    """
+    Serializer to display one article's summary in a bulk response.
+    """
+    id = serializers.IntegerField()
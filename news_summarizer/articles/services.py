@@ -1,101 +1,480 @@
 """
 Handles the external news fetching logic.
 """
+import hashlib
+import json
 import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone as dt_timezone
 import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
-from articles.models import Article
-from articles.tasks import process_and_save_article_task
+from urllib3.util.retry import Retry
+from articles import metrics, rate_limit
+from articles.dedup import link_near_duplicates, signature_fields
+from articles.models import Article, FetchWatermark
+from articles.page_cache import bump_articles_generation
+from articles.preprocessing import content_fingerprint
+from articles.tasks import advance_watermarks_task, save_articles_batch_task
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Fields refreshed on an existing row when the same URL is ingested again.
+UPSERT_UPDATE_FIELDS = ['title', 'content', 'published_date', 'source', 'fingerprint', 'minhash', 'minhash_bands']
+
+
+def parse_published_at(raw_date):
+    """
+    Parse a NewsAPI `publishedAt` timestamp.
+
+    :param raw_date: An ISO 8601 string such as '2024-01-01T12:00:00Z'.
+    :return: An aware datetime, or None if the value is missing or malformed.
+    """
+    if not raw_date:
+        return None
+    try:
+        return timezone.datetime.fromisoformat(raw_date.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def query_key(query):
+    """
+    Stable identifier of a NewsAPI query, used to key its watermark.
+
+    :param query: A dict of NewsAPI filter params.
+    :return: A hex digest string.
+    """
+    return hashlib.sha1(json.dumps(query, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RecentUrlIndex:
+    """
+    Hashes of recently ingested article URLs, kept in the default cache with a TTL.
+    Lets the ingester drop already-known articles before they reach Celery or the DB.
+    """
+    KEY_PREFIX = 'ingest:url:'
+
+    def _key(self, url):
+        return self.KEY_PREFIX + hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()
+
+    def filter_new(self, urls):
+        """
+        :param urls: Article URLs.
+        :return: The set of URLs that are not in the index.
+        """
+        keys = {self._key(url): url for url in urls}
+        known = cache.get_many(list(keys))
+        return {url for key, url in keys.items() if key not in known}
+
+    def add(self, urls):
+        """
+        :param urls: Article URLs that were just stored.
+        """
+        cache.set_many({self._key(url): 1 for url in urls}, timeout=settings.NEWS_API_SEEN_URL_TTL)
+
+
 class NewsApiClient:
     """
-    Docstring for NewsApiClient
+    Client for the NewsAPI `everything` endpoint.
+
+    Walks every page of every configured query. Queries run concurrently on a
+    bounded thread pool that shares one pooled HTTP session, and 429/5xx
+    responses are retried with exponential backoff. Requests draw on the
+    'newsapi' rate limit shared by every worker.
     """
-    def __init__(self):
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, queries=None, watermarks=None):
         self.api_url = settings.NEWS_API_URL
         self.api_key = settings.NEWS_API_KEY
-        self.query = settings.NEWS_API_QUERY
-    
-    def fetch_articles(self):
+        self.queries = [
+            {'q': query} if isinstance(query, str) else dict(query)
+            for query in (queries if queries is not None else settings.NEWS_API_QUERIES)
+        ]
+        self.page_size = settings.NEWS_API_PAGE_SIZE
+        self.max_pages = settings.NEWS_API_MAX_PAGES
+        self.max_workers = settings.NEWS_API_MAX_WORKERS
+        # query_key -> newest publishedAt stored on a previous run
+        self.watermarks = watermarks or {}
+        # query_key -> newest publishedAt seen, when the walk left no gap behind it
+        self.new_watermarks = {}
+        self.session = self._build_session()
+        self.limiter = rate_limit.get_limiter('newsapi')
+
+    def _build_session(self):
         """
-        Docstring for fetch_articles
-        
-        :param self: Description
+        Build a requests session whose connection pool fits the worker count.
+
+        :return: A configured requests.Session.
+        """
+        retry = Retry(
+            total=settings.NEWS_API_MAX_RETRIES,
+            backoff_factor=settings.NEWS_API_BACKOFF_FACTOR,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """
+        Release the pooled connections.
+        """
+        self.session.close()
+
+    def fetch_page(self, query, page, since=None):
+        """
+        Fetch a single page of results for one query.
+
+        :param query: A dict of NewsAPI filter params (q, sources, domains, ...).
+        :param page: The 1-based page number.
+        :param since: Optional datetime; only articles published from then on are requested.
+        :return: The decoded JSON response.
         """
         params = {
-            'q': self.query,
             'language': 'en',
             'sortBy': 'publishedAt',
+            **query,
+            'page': page,
+            'pageSize': self.page_size,
             'apiKey': self.api_key,
         }
-
-        try:
-            response = requests.get(self.api_url, params=params, timeout=10)
+        if since is not None:
+            params['from'] = since.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+        # Ingest is never interactive, but there is no batch work to yield to either.
+        self.limiter.acquire(timeout=settings.RATE_LIMIT_MAX_WAIT[rate_limit.BACKGROUND])
+        with metrics.timed(metrics.NEWSAPI_FETCH_SECONDS):
+            response = self.session.get(self.api_url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            return data.get('articles', [])
-        except RequestException as e:
-            logger.error(f"Error calling News API: {e}")
-            return []
+            return response.json()
+
+    def iter_query_pages(self, query, stop=None):
+        """
+        Yield the articles of each page of one query, in page order.
+
+        Results come newest first, so the walk stops at the first article that
+        is not newer than the query's watermark. The newest date seen is
+        recorded in `new_watermarks` when the walk completes: it reached the
+        watermark, a short page or the end of totalResults. A walk that fails
+        or runs into NEWS_API_MAX_PAGES before reaching an existing watermark
+        records nothing, so the next run fills the gap. A first walk has no
+        gap to leave, so it records the newest date however far it got:
+        whatever lies past the page cap (or NewsAPI's own result cap) is out
+        of every later run's reach too. A stopped walk records nothing.
+
+        :param query: A dict of NewsAPI filter params.
+        :param stop: Optional threading.Event that ends the walk early.
+        :return: A generator of article lists.
+        """
+        key = query_key(query)
+        since = self.watermarks.get(key)
+        newest = None
+        complete = False
+
+        for page in range(1, self.max_pages + 1):
+            if stop is not None and stop.is_set():
+                return
+            try:
+                data = self.fetch_page(query, page, since=since)
+            except (RequestException, rate_limit.RateLimitExceeded) as e:
+                logger.error("Error calling News API for %s page %s: %s", query, page, e)
+                break
+
+            articles = data.get('articles', [])
+            reached_seen = False
+            fresh = []
+            for article in articles:
+                published_date = parse_published_at(article.get('publishedAt'))
+                if since is not None and published_date is not None and published_date <= since:
+                    reached_seen = True
+                    break
+                if published_date is not None and (newest is None or published_date > newest):
+                    newest = published_date
+                fresh.append(article)
+
+            if fresh:
+                yield fresh
+            total_results = data.get('totalResults', 0)
+            if reached_seen or len(articles) < self.page_size or page * self.page_size >= total_results:
+                complete = True
+                break
+
+        if not complete and since is not None:
+            logger.warning("Stopped %s before reaching its watermark; keeping the watermark.", query)
+        elif newest is not None:
+            self.new_watermarks[key] = newest
+
+    def iter_keyed_pages(self):
+        """
+        Yield article pages from all queries as soon as each one arrives.
+
+        Pages from different queries interleave, so a consumer can start
+        storing results while slower queries are still in flight.
+
+        :return: A generator of (query_key, article list) tuples.
+        """
+        pages = queue.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def walk(query):
+            key = query_key(query)
+            try:
+                for articles in self.iter_query_pages(query, stop=stop):
+                    pages.put((key, articles))
+            finally:
+                pages.put(finished)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for query in self.queries:
+                executor.submit(walk, query)
+            try:
+                remaining = len(self.queries)
+                while remaining:
+                    item = pages.get()
+                    if item is finished:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                stop.set()
+
+    def iter_pages(self):
+        """
+        Yield article pages from all queries as soon as each one arrives.
+
+        :return: A generator of article lists.
+        """
+        for _, articles in self.iter_keyed_pages():
+            yield articles
+
+    def fetch_articles(self):
+        """
+        Fetch every page of every query.
+
+        :return: A list of all fetched articles.
+        """
+        return [article for page in self.iter_pages() for article in page]
 
 
 class ArticleService:
     """
-    Docstring for ArticleService
+    Normalizes raw NewsAPI payloads and writes them to the database in bulk.
     """
-    def process_and_save_article(self, article_data):
-        try:
-            # טיפול בתאריך
-            raw_date = article_data.get('publishedAt')
-            published_date = None
-            if raw_date:
-                published_date = timezone.datetime.fromisoformat(raw_date.replace('Z', '+00:00'))
-
-            # שמירה או עדכון ב-DB
-            article, created = Article.objects.update_or_create(
-                url=article_data['url'],
-                defaults={
-                    'title': article_data['title'],
-                    'content': article_data.get('content', ''),
-                    'published_date': published_date,
-                    'source': article_data.get('source', {}).get('name', 'N/A')
-                }
+    def normalize_article(self, article_data):
+        """
+        Convert a raw NewsAPI article into the field values of an Article row.
+
+        :param article_data: A single article dict as returned by NewsAPI.
+        :return: A dict of Article field values, or None if the article is unusable.
+        """
+        url = article_data.get('url')
+        title = article_data.get('title')
+        published_date = parse_published_at(article_data.get('publishedAt'))
+        if not url or not title or published_date is None:
+            return None
+
+        url_max_length = Article._meta.get_field('url').max_length
+        if len(url) > url_max_length:
+            return None
+
+        source = (article_data.get('source') or {}).get('name') or 'N/A'
+        title = title[:Article._meta.get_field('title').max_length]
+        content = article_data.get('content') or ''
+        return {
+            'url': url,
+            'title': title,
+            'content': content,
+            'published_date': published_date,
+            'source': source[:Article._meta.get_field('source').max_length],
+            'fingerprint': content_fingerprint(title, content),
+            **signature_fields(title, content),
+        }
+
+    def save_articles(self, articles_data):
+        """
+        Upsert a batch of raw NewsAPI articles with a single INSERT ... ON CONFLICT,
+        then link new articles that nearly duplicate earlier ones and invalidate
+        cached list pages.
+
+        :param articles_data: A list of article dicts as returned by NewsAPI.
+        :return: A tuple of (created article ids, updated article ids).
+        """
+        rows = {}
+        for article_data in articles_data:
+            row = self.normalize_article(article_data)
+            if row is None:
+                logger.warning("Skipping malformed article - URL: %s", article_data.get('url'))
+                continue
+            # Postgres refuses to update the same row twice in one statement,
+            # so repeated URLs inside a batch collapse to the last occurrence.
+            rows[row['url']] = row
+
+        if not rows:
+            return [], []
+
+        existing = set(
+            Article.objects.filter(url__in=list(rows)).values_list('url', flat=True)
+        )
+        with metrics.DB_UPSERT_SECONDS.time():
+            articles = Article.objects.bulk_create(
+                [Article(**row) for row in rows.values()],
+                update_conflicts=True,
+                unique_fields=['url'],
+                update_fields=UPSERT_UPDATE_FIELDS,
             )
-            return created
+        RecentUrlIndex().add(rows)
 
-        except Exception as e:
-            logger.error(f"Error processing or saving article: {e} - URL: {article_data.get('url')}")
-            return False
+        created_ids = [article.pk for article in articles if article.url not in existing]
+        updated_ids = [article.pk for article in articles if article.url in existing]
+        link_near_duplicates(created_ids)
+        bump_articles_generation()
+        return created_ids, updated_ids
+
+
+def _chunked(items, size):
+    """
+    Split a list into consecutive chunks of at most `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def load_watermarks(queries):
+    """
+    :param queries: NewsAPI query dicts.
+    :return: A dict of query_key -> last published date for the given queries.
+    """
+    keys = [query_key(query) for query in queries]
+    return dict(
+        FetchWatermark.objects.filter(query_key__in=keys).values_list('query_key', 'last_published_date')
+    )
+
+
+def advance_watermarks(queries, new_watermarks):
+    """
+    Move each query's watermark forward to the newest article fetched this run.
 
-def fetch_and_store_articles():
+    :param queries: NewsAPI query dicts.
+    :param new_watermarks: A dict of query_key -> newest published date.
+    """
+    by_key = {query_key(query): query for query in queries}
+    for key, published_date in new_watermarks.items():
+        watermark, created = FetchWatermark.objects.get_or_create(
+            query_key=key,
+            defaults={'query': by_key[key], 'last_published_date': published_date},
+        )
+        if not created and published_date > watermark.last_published_date:
+            watermark.last_published_date = published_date
+            watermark.save(update_fields=['last_published_date', 'updated_at'])
+
+
+def fetch_and_store_articles(wait=True):
     """
    The main function that manages the process:
-    1. Fetch data using the Client.
-    2. Send data for background processing using Celery.
+    1. Stream pages of articles newer than each query's watermark from the Client.
+    2. Drop URLs that were already ingested recently.
+    3. Send each page for background processing using Celery, one task per batch,
+       while the remaining pages are still being fetched.
+    4. Advance the watermarks of the queries whose articles were all saved:
+       here when waiting, otherwise from advance_watermarks_task once the
+       batches finish. A batch that could not be queued or failed to save
+       holds back the watermark of every query that returned one of its
+       articles, so the next run fetches them again.
+
+    :param wait: Block until the batch tasks finish and collect their counts.
+    :return: A dict with 'queued', 'created' and 'updated' counts. 'created' and
+             'updated' are None when not waiting for the workers.
     """
     logger.info("Starting to fetch new articles from NewsAPI...")
-    
+
     client = NewsApiClient()
-    articles_data = client.fetch_articles()
-    
-    if not articles_data:
-        logger.warning("No articles found or API failed.")
-        return 0
-    
+    client.watermarks = load_watermarks(client.queries)
+    url_index = RecentUrlIndex()
     articles_queued = 0
+    seen_urls = set()
+    # url -> keys of the queries that returned it, including ones deduplicated away.
+    url_queries = {}
+    failed_urls = set()
+    results = []
+
+    try:
+        for key, page in client.iter_keyed_pages():
+            page = [a for a in page if a.get('url')]
+            for article in page:
+                url_queries.setdefault(article['url'], set()).add(key)
+            # Overlapping queries return the same article more than once.
+            page = [a for a in page if a['url'] not in seen_urls]
+            seen_urls.update(a['url'] for a in page)
+            new_urls = url_index.filter_new([a['url'] for a in page])
+            page = [a for a in page if a['url'] in new_urls]
 
-    for article_data in articles_data:
+            for batch in _chunked(page, settings.ARTICLE_INGEST_BATCH_SIZE):
+                try:
+                    results.append((save_articles_batch_task.delay(batch), batch))
+                    articles_queued += len(batch)
+                except Exception as e:
+                    logger.error("Failed to queue batch of %s articles for processing: %s", len(batch), e)
+                    failed_urls.update(a['url'] for a in batch)
+    finally:
+        client.close()
+
+    created = updated = 0
+    if wait:
+        for result, batch in results:
+            try:
+                counts = result.get(timeout=settings.ARTICLE_INGEST_RESULT_TIMEOUT)
+            except Exception as e:
+                logger.error("Batch of %s articles failed to save: %s", len(batch), e)
+                failed_urls.update(a['url'] for a in batch)
+                continue
+            created += counts['created']
+            updated += counts['updated']
+
+    held_back = {key for url in failed_urls for key in url_queries[url]}
+    if held_back:
+        logger.warning("Keeping the watermarks of %s queries with unsaved articles.", len(held_back))
+    new_watermarks = {key: date for key, date in client.new_watermarks.items() if key not in held_back}
+    if wait or not results:
+        advance_watermarks(client.queries, new_watermarks)
+    elif new_watermarks:
+        # The batches are not saved yet; a batch lost on the way must still hold its queries back.
+        batches = [
+            (result.id, sorted({key for article in batch for key in url_queries[article['url']]}))
+            for result, batch in results
+        ]
         try:
-            process_and_save_article_task.delay(article_data) 
-            articles_queued += 1
+            advance_watermarks_task.delay(
+                client.queries,
+                {key: date.isoformat() for key, date in new_watermarks.items()},
+                batches,
+                time.time() + settings.ARTICLE_INGEST_WATERMARK_TIMEOUT,
+            )
         except Exception as e:
-            logger.error(f"Failed to queue article for processing: {e} - URL: {article_data.get('url')}")
+            logger.error("Failed to queue the watermark update; keeping the watermarks: %s", e)
+
+    if not articles_queued:
+        logger.warning("No new articles found or API failed.")
+        return {'queued': 0, 'created': 0, 'updated': 0}
+
+    logger.info(
+        "Finished pulling articles. %s articles sent to Celery queue in %s batches.",
+        articles_queued, len(results),
+    )
+
+    if not wait:
+        return {'queued': articles_queued, 'created': None, 'updated': None}
 
-    logger.info(f"Finished pulling articles. {articles_queued} articles sent to Celery queue.")
-    
-    return articles_queued
\ No newline at end of file
+    return {'queued': articles_queued, 'created': created, 'updated': updated}
@@ -0,0 +1,18 @@
+"""
+Signal receivers of the articles app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from articles.models import Article
+from articles.page_cache import bump_articles_generation
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_pages(sender, **kwargs):
+    """
+    Drop cached list pages when an article is saved or deleted one by one
+    (admin, shell). Bulk ingest bumps the generation itself, once per batch.
+    """
+    bump_articles_generation()
@@ -0,0 +1,150 @@
+"""
+Summarizer backends, chosen per request (`?backend=`) or by SUMMARY_BACKEND.
+
+`openai` is the ChatGPT service with its cache tiers, single-flight lock
+and stored summaries. `extractive` ranks each article's own sentences
+locally (articles/extractive.py): it needs no network or API key, and
+recomputing a summary costs less than caching it, so its summaries are
+never cached or stored. Other backends are SummarizerBackend subclasses
+listed by dotted path in SUMMARY_BACKENDS.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from articles import chatgpt_service, extractive
+
+
+class UnknownBackend(ValueError):
+    """
+    Raised for a backend name that is not a key of SUMMARY_BACKENDS.
+    """
+
+
+class SummarizerBackend:
+    """
+    Turns articles into summaries. Subclasses implement summarize_many,
+    model and version; the other methods default to summarize_many.
+    """
+    name = None
+
+    @property
+    def model(self):
+        """
+        Name of what produces the summaries, part of their ETag.
+        """
+        raise NotImplementedError
+
+    @property
+    def version(self):
+        """
+        Version of the summaries' prompt or algorithm, part of their ETag.
+        """
+        raise NotImplementedError
+
+    def summarize_many(self, articles, article_ids=None, fingerprints=None):
+        """
+        :param articles: A list of (title, content) pairs.
+        :param article_ids: Optional list of the articles' primary keys, in the same order.
+        :param fingerprints: Optional list of the articles' stored content fingerprints, in the same order.
+        :return: A list of (summary string, from_cache boolean) tuples, in input order.
+        """
+        raise NotImplementedError
+
+    def summary_if_ready(self, title, content, article_id=None, fingerprint=None):
+        """
+        :return: The summary if it is available without waiting on a remote call, otherwise None.
+        """
+        return None
+
+    async def asummarize(self, title, content, article_id=None, fingerprint=None):
+        """
+        :return: A tuple of (summary string, from_cache boolean).
+        """
+        results = await sync_to_async(self.summarize_many)([(title, content)], [article_id], [fingerprint])
+        return results[0]
+
+    async def astream(self, title, content, article_id=None, fingerprint=None):
+        """
+        :return: An async iterator of (text chunk, from_cache boolean, error)
+            tuples; `error` describes a failure on the stream's last chunk, otherwise None.
+        """
+        summary, cached = await self.asummarize(title, content, article_id, fingerprint)
+        yield summary, cached, None
+
+
+class OpenAIBackend(SummarizerBackend):
+    """
+    Summaries from ChatGPT, through the summary cache tiers and the Summary table.
+    """
+    name = 'openai'
+
+    @property
+    def model(self):
+        return settings.OPENAI_MODEL
+
+    @property
+    def version(self):
+        return chatgpt_service.summary_version()
+
+    def summarize_many(self, articles, article_ids=None, fingerprints=None):
+        return chatgpt_service.summarize_articles(articles, article_ids=article_ids, fingerprints=fingerprints)
+
+    def summary_if_ready(self, title, content, article_id=None, fingerprint=None):
+        return chatgpt_service.get_stored_summary(title, content, article_id=article_id, fingerprint=fingerprint)
+
+    async def asummarize(self, title, content, article_id=None, fingerprint=None):
+        return await chatgpt_service.aget_article_summary_with_caching(
+            title, content, article_id=article_id, fingerprint=fingerprint
+        )
+
+    async def astream(self, title, content, article_id=None, fingerprint=None):
+        async for chunk in chatgpt_service.astream_article_summary(
+            title, content, article_id=article_id, fingerprint=fingerprint
+        ):
+            yield chunk
+
+
+class ExtractiveBackend(SummarizerBackend):
+    """
+    Summaries ranked locally from each article's own sentences, never cached.
+    """
+    name = 'extractive'
+    model = 'extractive-textrank'
+
+    @property
+    def version(self):
+        return extractive.VERSION
+
+    def summarize_many(self, articles, article_ids=None, fingerprints=None):
+        return [(summary, False) for summary in extractive.summarize_batch(articles)]
+
+    def summary_if_ready(self, title, content, article_id=None, fingerprint=None):
+        return extractive.summarize_batch([(title, content)])[0]
+
+    async def asummarize(self, title, content, article_id=None, fingerprint=None):
+        # About a millisecond of CPU for one article: cheaper than a thread hop.
+        return self.summarize_many([(title, content)])[0]
+
+
+def backend_names():
+    """
+    :return: The names of the configured backends.
+    """
+    return list(settings.SUMMARY_BACKENDS)
+
+
+def get_backend(name=None):
+    """
+    :param name: A key of SUMMARY_BACKENDS, defaults to SUMMARY_BACKEND.
+    :return: An instance of that backend.
+    :raises UnknownBackend: If no backend has that name.
+    """
+    name = name or settings.SUMMARY_BACKEND
+    try:
+        path = settings.SUMMARY_BACKENDS[name]
+    except KeyError:
+        raise UnknownBackend(
+            f"Unknown summary backend '{name}'; choose one of: {', '.join(backend_names())}."
+        ) from None
+    return import_string(path)()
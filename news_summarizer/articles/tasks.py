@@ -1,42 +1,186 @@
 import logging
+import time
+import uuid
+from datetime import datetime
 from celery import shared_task
-from django.utils import timezone
+from django.conf import settings
+from django.core.cache import cache
 
+from articles import metrics, rate_limit
+from articles.chatgpt_service import claim_summaries, release_summary_claims, summarize_articles_with_status
 from articles.models import Article
 
 logger = logging.getLogger(__name__)
 
+# Held while a scheduled fetch runs, so slow runs never overlap.
+FETCH_LOCK_KEY = 'articles:fetch-lock'
+
+
+def summary_queued_key(article_id):
+    """
+    Set while a summarize task queued for a `Prefer: respond-async` client is pending.
+    """
+    return f"summary:queued:{article_id}"
+
+
+def summary_outcome_key(article_id):
+    """
+    Holds, for SUMMARY_OUTCOME_TTL seconds, the result of a summarize task that
+    stored no summary: {'summary': fallback text}, or {'summary': None} if it failed.
+    """
+    return f"summary:outcome:{article_id}"
+
+
+def _record_unstored_outcomes(rows, results, stored):
+    """
+    Leave the result of every article the task could not store a summary for,
+    so a client polling with `Prefer: respond-async` gets it instead of 202
+    forever, and let its next poll after that queue a new task.
+    """
+    # No results with rows left means the batch raised.
+    texts = [summary for summary, _, _ in results] if results else [None] * len(rows)
+    outcomes = {row[0]: text for row, text in zip(rows, texts) if row[3] not in stored}
+    if not outcomes:
+        return
+    cache.set_many(
+        {summary_outcome_key(pk): {'summary': text} for pk, text in outcomes.items()},
+        timeout=settings.SUMMARY_OUTCOME_TTL,
+    )
+    cache.delete_many([summary_queued_key(pk) for pk in outcomes])
+
+
 # ההערה @shared_task הופכת את הפונקציה למשימת Celery אסינכרונית
-@shared_task
-def process_and_save_article_task(article_data):
+# fetch_and_store_articles(wait=True) reads the counts, so they are stored.
+@shared_task(ignore_result=False)
+def save_articles_batch_task(articles_data):
     """
-    Gets data from a single article and saves it to the Database.
+    Gets a batch of raw NewsAPI articles and upserts them into the Database
+    with a single bulk statement.
     This function runs in a Celery Worker.
     """
+    # Imported here because articles.services imports this module.
+    from articles.services import ArticleService
+
     try:
-        raw_date = article_data.get('publishedAt')
-        published_date = None
-        if raw_date:
-            published_date = timezone.datetime.fromisoformat(raw_date.replace('Z', '+00:00'))
-
-        article, created = Article.objects.update_or_create(
-            url=article_data['url'],
-            defaults={
-                'title': article_data['title'],
-                'content': article_data.get('content', ''),
-                'published_date': published_date,
-                'source': article_data.get('source', {}).get('name', 'N/A')
-            }
+        with metrics.timed(metrics.INGEST_BATCH_SECONDS):
+            created_ids, updated_ids = ArticleService().save_articles(articles_data)
+        logger.info(
+            "Batch of %s articles saved: %s created, %s updated.",
+            len(articles_data), len(created_ids), len(updated_ids),
         )
-        
-        if created:
-            logger.info(f"Article saved successfully: {article.url}")
-        else:
-            logger.info(f"Article updated/skipped: {article.url}")
-
-        return created # Return True whether a new article was created
-
     except Exception as e:
-        logger.error(f"Error processing or saving article in Celery: {e} - URL: {article_data.get('url')}")
+        logger.error("Error saving batch of %s articles in Celery: %s", len(articles_data), e)
         # It's important not to return anything to allow Celery to handle the error
-        raise
\ No newline at end of file
+        raise
+
+    if created_ids and settings.SUMMARY_PRESUMMARIZE_ON_INGEST:
+        summarize_articles_task.delay(created_ids)
+
+    return {'created': len(created_ids), 'updated': len(updated_ids)}
+
+
+# Acknowledged only once done, so a summarize task lost with its worker is
+# redelivered; the claims below keep the redelivery, and duplicate tasks for
+# the same articles, from paying for a summary twice.
+@shared_task(
+    bind=True, acks_late=True, reject_on_worker_lost=True, priority=settings.SUMMARY_BACKGROUND_TASK_PRIORITY,
+)
+def summarize_articles_task(self, article_ids, interactive=False):
+    """
+    Summarizes a batch of articles ahead of time so the summary endpoint
+    is served from cache. Its OpenAI calls yield to interactive requests
+    unless a client is waiting for the result (`interactive`).
+    This function runs in a Celery Worker.
+    """
+    owner = self.request.id or uuid.uuid4().hex
+    # Near-duplicates are served their canonical article's summary.
+    rows = list(
+        Article.objects.filter(pk__in=article_ids, canonical__isnull=True)
+        .values_list('pk', 'title', 'content', 'fingerprint')
+    )
+    held = set(claim_summaries([fingerprint for _, _, _, fingerprint in rows], owner))
+    if len(held) < len(rows):
+        logger.info("Skipping %s articles claimed by another summarize task.", len(rows) - len(held))
+        rows = [row for row in rows if row[3] in held]
+
+    articles = [(title, content) for _, title, content, _ in rows]
+    results = []
+    try:
+        with rate_limit.priority(rate_limit.INTERACTIVE if interactive else rate_limit.BACKGROUND):
+            results = summarize_articles_with_status(
+                articles,
+                article_ids=[pk for pk, _, _, _ in rows],
+                fingerprints=[fingerprint for _, _, _, fingerprint in rows],
+            )
+    finally:
+        # Whatever was not stored (a fallback, or the whole batch if it
+        # raised) can be claimed again straight away by a retry or another task.
+        stored = {row[3] for row, (_, _, ok) in zip(rows, results) if ok}
+        release_summary_claims([fingerprint for fingerprint in held if fingerprint not in stored], owner)
+        _record_unstored_outcomes(rows, results, stored)
+    generated = sum(1 for _, cached, _ in results if not cached)
+    logger.info(
+        "Pre-summarized %s articles: %s generated, %s already cached.",
+        len(articles), generated, len(articles) - generated,
+    )
+    return generated
+
+
+@shared_task(bind=True, max_retries=None)
+def advance_watermarks_task(self, queries, new_watermarks, batches, deadline):
+    """
+    Advances the watermarks of a fetch that did not wait for its batches,
+    once they are saved. Polls the batch results every
+    ARTICLE_INGEST_WATERMARK_POLL_INTERVAL seconds until all are done or
+    `deadline` passes; a failed or unfinished batch holds back the watermark
+    of every query that returned one of its articles.
+    This function runs in a Celery Worker.
+
+    :param queries: NewsAPI query dicts.
+    :param new_watermarks: A dict of query_key -> newest published date, in ISO format.
+    :param batches: A list of (save task id, query keys of the batch's articles) pairs.
+    :param deadline: Unix time after which unfinished batches count as failed.
+    """
+    # Imported here because articles.services imports this module.
+    from articles.services import advance_watermarks
+
+    results = [(save_articles_batch_task.AsyncResult(task_id), keys) for task_id, keys in batches]
+    if time.time() < deadline and not all(result.ready() for result, _ in results):
+        raise self.retry(countdown=settings.ARTICLE_INGEST_WATERMARK_POLL_INTERVAL)
+
+    held_back = {key for result, keys in results if not result.successful() for key in keys}
+    if held_back:
+        logger.warning("Keeping the watermarks of %s queries with unsaved articles.", len(held_back))
+    advance_watermarks(queries, {
+        key: datetime.fromisoformat(published_date)
+        for key, published_date in new_watermarks.items() if key not in held_back
+    })
+
+
+@shared_task
+def fetch_articles_task():
+    """
+    Fetches new articles for every query and queues them for saving, without
+    waiting for the batches. Celery Beat runs it every NEWS_API_FETCH_INTERVAL
+    seconds; the watermarks make each run incremental.
+    This function runs in a Celery Worker.
+    """
+    # Imported here because articles.services imports this module.
+    from articles.services import fetch_and_store_articles
+
+    if not cache.add(FETCH_LOCK_KEY, True, timeout=settings.NEWS_API_FETCH_INTERVAL):
+        logger.info("Previous article fetch still running, skipping this one.")
+        return None
+    try:
+        return fetch_and_store_articles(wait=False)
+    finally:
+        cache.delete(FETCH_LOCK_KEY)
+
+
+@shared_task
+def process_and_save_article_task(article_data):
+    """
+    Gets data from a single article and saves it to the Database.
+    Kept so messages queued before the switch to batches still drain.
+    """
+    return save_articles_batch_task([article_data])['created'] > 0
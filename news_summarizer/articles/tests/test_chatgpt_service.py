@@ -0,0 +1,491 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+import httpx
+import openai
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from articles import chatgpt_service
+from articles.circuit_breaker import CircuitBreaker
+from articles.local_cache import LocalLRUCache, TierStats
+from articles.models import Article, Summary
+from articles.preprocessing import content_fingerprint
+from articles.fakes import FakeOpenAIServer
+
+
+def use_private_summary_caches(test):
+	"""
+	Give a test its own Redis stand-in and in-process tier for summaries.
+
+	:return: The LocMemCache standing in for SUMMARY_CACHE.
+	"""
+	summary_cache = LocMemCache(f'test-summaries-{id(test)}', {})
+	summary_cache.clear()
+	for name, value in (
+		('SUMMARY_CACHE', summary_cache),
+		('LOCAL_SUMMARY_CACHE', LocalLRUCache(maxsize=128, ttl=60)),
+		('TIER_STATS', TierStats()),
+		('LLM_BREAKER', CircuitBreaker('openai', summary_cache)),
+	):
+		patcher = mock.patch.object(chatgpt_service, name, value)
+		patcher.start()
+		test.addCleanup(patcher.stop)
+	return summary_cache
+
+
+class FakeOpenAIMixin:
+	"""
+	Points the ChatGPT service at a local fake OpenAI server and a private cache.
+	"""
+
+	def setUp(self):
+		self.server = FakeOpenAIServer()
+		self.server.start()
+		self.addCleanup(self.server.stop)
+
+		settings_override = override_settings(OPENAI_API_KEY='sk-test', OPENAI_BASE_URL=self.server.base_url)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.cache = use_private_summary_caches(self)
+
+
+class BatchSummarizationTests(FakeOpenAIMixin, SimpleTestCase):
+	"""
+	Tests for summarize_articles.
+	"""
+
+	def test_summarize_articles_only_generates_misses(self):
+		"""
+		Test that cached and repeated articles are not sent to ChatGPT again.
+		"""
+		self.cache.set(chatgpt_service._generate_cache_key(content_fingerprint('Title A', 'Content A')), 'Cached A')
+
+		results = chatgpt_service.summarize_articles([
+			('Title A', 'Content A'),
+			('Title B', 'Content B'),
+			('Title B', 'Content B'),
+			('Title C', 'Content C'),
+		])
+
+		self.assertEqual(results, [
+			('Cached A', True),
+			('Summary of Title B', False),
+			('Summary of Title B', False),
+			('Summary of Title C', False),
+		])
+		self.assertEqual(len(self.server.requests), 2)
+		self.assertEqual(
+			chatgpt_service._read_entry(self.cache.get(chatgpt_service._generate_cache_key(content_fingerprint('Title C', 'Content C')))),
+			('Summary of Title C', True)
+		)
+
+	def test_summarize_articles_generates_misses_concurrently(self):
+		"""
+		Test that misses are generated in parallel rather than one after another.
+		"""
+		self.server.delay = 0.3
+		articles = [(f'Title {i}', f'Content {i}') for i in range(6)]
+
+		started = time.monotonic()
+		with override_settings(SUMMARY_BATCH_MAX_WORKERS=6):
+			results = chatgpt_service.summarize_articles(articles)
+		elapsed = time.monotonic() - started
+
+		self.assertEqual([summary for summary, _ in results], [f'Summary of Title {i}' for i in range(6)])
+		self.assertLess(elapsed, 1.2)
+
+	def test_openai_client_is_reused_between_calls(self):
+		"""
+		Test that consecutive summaries share one OpenAI client.
+		"""
+		import openai
+
+		with mock.patch('openai.OpenAI', wraps=openai.OpenAI) as client_class:
+			chatgpt_service.summarize_article_with_chatgpt('Title A', 'Content A')
+			chatgpt_service.summarize_article_with_chatgpt('Title B', 'Content B')
+
+		self.assertEqual(client_class.call_count, 1)
+		self.assertEqual(len(self.server.requests), 2)
+
+
+class MapReduceSummaryTests(FakeOpenAIMixin, SimpleTestCase):
+	"""
+	Tests for summarizing articles longer than the input token budget.
+	"""
+
+	def setUp(self):
+		super().setUp()
+		settings_override = override_settings(
+			SUMMARY_INPUT_TOKEN_BUDGET=50, SUMMARY_CHUNK_TOKENS=40, SUMMARY_MAX_CHUNKS=3, SUMMARY_MAP_REDUCE=True
+		)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+		self.content = ' '.join(f'Sentence {i} of a very long article about the economy.' for i in range(60))
+
+	def _prompts(self):
+		return [request['messages'][0]['content'] for request in self.server.requests]
+
+	def test_long_article_is_summarized_in_chunks_then_merged(self):
+		"""
+		Test that a long article costs at most SUMMARY_MAX_CHUNKS chunk calls plus one merge call.
+		"""
+		summary = chatgpt_service.summarize_article_with_chatgpt('Long Read', self.content)
+
+		self.assertEqual(summary, 'Summary of Long Read')
+		self.assertEqual(self._prompts(), [chatgpt_service.CHUNK_PROMPT] * 3 + [chatgpt_service.MERGE_PROMPT])
+		self.assertTrue(all(request['max_tokens'] == settings.SUMMARY_MAX_OUTPUT_TOKENS for request in self.server.requests))
+
+	def test_chunks_are_summarized_concurrently(self):
+		self.server.delay = 0.3
+
+		started = time.monotonic()
+		chatgpt_service.summarize_article_with_chatgpt('Long Read', self.content)
+
+		# Three chunk calls in parallel plus the merge: two round-trips, not four.
+		self.assertLess(time.monotonic() - started, 1.1)
+
+	async def test_async_path_maps_and_merges(self):
+		summary = await chatgpt_service.asummarize_article_with_chatgpt('Long Read', self.content)
+
+		self.assertEqual(summary, 'Summary of Long Read')
+		self.assertEqual(self._prompts()[-1], chatgpt_service.MERGE_PROMPT)
+		self.assertEqual(len(self.server.requests), 4)
+
+
+class AsyncSummaryTests(FakeOpenAIMixin, SimpleTestCase):
+	"""
+	Tests for the async summary path used by the ASGI summary view.
+	"""
+
+	async def test_concurrent_misses_are_awaited_on_one_thread(self):
+		"""
+		Test that several slow completions overlap on the event loop instead of running back to back.
+		"""
+		self.server.delay = 0.3
+
+		started = time.monotonic()
+		results = await asyncio.gather(*[
+			chatgpt_service.aget_article_summary_with_caching(f'Title {i}', f'Content {i}') for i in range(5)
+		])
+		elapsed = time.monotonic() - started
+
+		self.assertEqual(results, [(f'Summary of Title {i}', False) for i in range(5)])
+		self.assertLess(elapsed, 1.0)
+		self.assertEqual(
+			await chatgpt_service.aget_article_summary_with_caching('Title 0', 'Content 0'),
+			('Summary of Title 0', True)
+		)
+		self.assertEqual(len(self.server.requests), 5)
+
+	async def test_async_openai_client_is_reused_between_calls(self):
+		"""
+		Test that consecutive async summaries on one event loop share one client.
+		"""
+		import openai
+
+		with mock.patch('openai.AsyncOpenAI', wraps=openai.AsyncOpenAI) as client_class:
+			await chatgpt_service.asummarize_article_with_chatgpt('Title A', 'Content A')
+			await chatgpt_service.asummarize_article_with_chatgpt('Title B', 'Content B')
+
+		self.assertEqual(client_class.call_count, 1)
+
+
+class StreamingSummaryTests(FakeOpenAIMixin, SimpleTestCase):
+	"""
+	Tests for astream_article_summary.
+	"""
+
+	async def _collect(self, title, content):
+		started = time.monotonic()
+		chunks, first_at = [], None
+		async for chunk, cached, error in chatgpt_service.astream_article_summary(title, content):
+			self.assertIsNone(error)
+			first_at = first_at if first_at is not None else time.monotonic() - started
+			chunks.append((chunk, cached))
+		return chunks, first_at, time.monotonic() - started
+
+	async def test_tokens_are_forwarded_before_the_completion_ends(self):
+		"""
+		Test that the first token arrives long before the stream finishes, and the result is cached.
+		"""
+		self.server.chunk_delay = 0.2
+
+		chunks, first_at, total = await self._collect('Breaking News Today', 'Content')
+
+		self.assertEqual(''.join(chunk for chunk, _ in chunks), 'Summary of Breaking News Today')
+		self.assertGreater(len(chunks), 1)
+		self.assertLess(first_at, 0.15)
+		self.assertGreater(total, 0.7)
+		cache_key = chatgpt_service._generate_cache_key(content_fingerprint('Breaking News Today', 'Content'))
+		self.assertEqual(chatgpt_service._read_entry(self.cache.get(cache_key)), ('Summary of Breaking News Today', True))
+
+		again, _, _ = await self._collect('Breaking News Today', 'Content')
+		self.assertEqual(again, [('Summary of Breaking News Today', True)])
+		self.assertEqual(len(self.server.requests), 1)
+
+	async def test_abandoned_stream_stores_nothing_and_releases_the_lock(self):
+		"""
+		Test that a client leaving mid-stream leaves no partial summary and no held lock.
+		"""
+		self.server.chunk_delay = 0.05
+		stream = chatgpt_service.astream_article_summary('Left Early', 'Content')
+
+		self.assertEqual(await anext(stream), ('Summary', False, None))
+		await stream.aclose()
+
+		cache_key = chatgpt_service._generate_cache_key(content_fingerprint('Left Early', 'Content'))
+		self.assertIsNone(self.cache.get(cache_key))
+		self.assertIsNone(self.cache.get(f'lock:{cache_key}'))
+
+	async def test_stream_failing_partway_stores_nothing_and_reports_the_error(self):
+		"""
+		Test that an OpenAI error after some tokens ends the stream with the error and stores nothing.
+		"""
+		async def broken_stream():
+			yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='Partial summary text'))])
+			raise openai.APIConnectionError(request=httpx.Request('POST', self.server.base_url))
+
+		async def create(client, request, **kwargs):
+			return broken_stream()
+
+		with mock.patch.object(chatgpt_service, '_acreate', create), \
+				mock.patch.object(chatgpt_service, '_save_generated') as save:
+			chunks = [chunk async for chunk in chatgpt_service.astream_article_summary('Cut Off', 'Content')]
+
+		self.assertEqual(chunks, [
+			('Partial summary text', False, None),
+			('OpenAI API Error: Connection error.', False, 'APIConnectionError: Connection error.'),
+		])
+		save.assert_not_called()
+		cache_key = chatgpt_service._generate_cache_key(content_fingerprint('Cut Off', 'Content'))
+		self.assertIsNone(self.cache.get(cache_key))
+		self.assertIsNone(self.cache.get(f'lock:{cache_key}'))
+
+
+class SingleFlightTests(SimpleTestCase):
+	"""
+	Tests for request coalescing and stale-while-revalidate in get_article_summary_with_caching.
+	"""
+
+	def setUp(self):
+		self.cache = use_private_summary_caches(self)
+
+		self.calls = 0
+		self.calls_lock = threading.Lock()
+
+	def _slow_summary(self, title, content):
+		with self.calls_lock:
+			self.calls += 1
+		time.sleep(0.2)
+		return f'Summary of {title}', True
+
+	def test_concurrent_misses_generate_once(self):
+		"""
+		Test that simultaneous misses for one article trigger a single ChatGPT call.
+		"""
+		with mock.patch.object(chatgpt_service, 'generate_summary', side_effect=self._slow_summary), \
+				override_settings(SUMMARY_LOCK_POLL_INTERVAL=0.01):
+			with ThreadPoolExecutor(max_workers=8) as executor:
+				results = list(executor.map(
+					lambda _: chatgpt_service.get_article_summary_with_caching('Hot', 'Hot content'),
+					range(8)
+				))
+
+		self.assertEqual(self.calls, 1)
+		self.assertEqual({summary for summary, _ in results}, {'Summary of Hot'})
+		self.assertEqual(sorted(cached for _, cached in results), [False] + [True] * 7)
+
+	def test_stale_summary_is_served_while_one_caller_refreshes(self):
+		"""
+		Test that an expired entry is returned immediately and regenerated once in the background.
+		"""
+		cache_key = chatgpt_service._generate_cache_key(content_fingerprint('Old', 'Old content'))
+		self.cache.set(cache_key, {'summary': 'Stale summary', 'fresh_until': time.time() - 1})
+
+		with mock.patch.object(chatgpt_service, 'generate_summary', side_effect=self._slow_summary):
+			first = chatgpt_service.get_article_summary_with_caching('Old', 'Old content')
+			second = chatgpt_service.get_article_summary_with_caching('Old', 'Old content')
+
+			deadline = time.monotonic() + 2
+			while self.cache.get(cache_key)['summary'] == 'Stale summary' and time.monotonic() < deadline:
+				time.sleep(0.01)
+
+		self.assertEqual(first, ('Stale summary', True))
+		self.assertEqual(second, ('Stale summary', True))
+		self.assertEqual(self.calls, 1)
+		summary, fresh = chatgpt_service._read_entry(self.cache.get(cache_key))
+		self.assertEqual((summary, fresh), ('Summary of Old', True))
+
+	def test_waiter_generates_itself_when_lock_holder_never_finishes(self):
+		"""
+		Test that a caller stuck behind an abandoned lock eventually generates the summary itself.
+		"""
+		cache_key = chatgpt_service._generate_cache_key(content_fingerprint('Stuck', 'Stuck content'))
+		self.cache.add(f'lock:{cache_key}', 'someone-else', timeout=60)
+
+		with mock.patch.object(chatgpt_service, 'generate_summary', side_effect=self._slow_summary), \
+				override_settings(SUMMARY_LOCK_WAIT_TIMEOUT=0.2, SUMMARY_LOCK_POLL_INTERVAL=0.01):
+			result = chatgpt_service.get_article_summary_with_caching('Stuck', 'Stuck content')
+
+		self.assertEqual(result, ('Summary of Stuck', False))
+		self.assertEqual(self.calls, 1)
+
+
+class PersistentSummaryTests(TestCase):
+	"""
+	Tests for the Postgres summary tier behind the cache.
+	"""
+
+	def setUp(self):
+		self.cache = use_private_summary_caches(self)
+
+		self.article = Article.objects.create(
+			title='Stored Title',
+			content='Stored content of the article',
+			url='https://example.com/stored',
+			published_date=timezone.now(),
+			source='Example'
+		)
+
+	def test_generated_summary_is_written_through_and_read_back_after_eviction(self):
+		"""
+		Test that a generated summary survives losing the cache entry.
+		"""
+		with mock.patch.object(chatgpt_service, 'generate_summary', return_value=('Durable summary', True)) as summarize:
+			first = chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+			self.cache.clear()
+			chatgpt_service.LOCAL_SUMMARY_CACHE.clear()
+			second = chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+
+		self.assertEqual(first, ('Durable summary', False))
+		self.assertEqual(second, ('Durable summary', True))
+		self.assertEqual(summarize.call_count, 1)
+		stored = Summary.objects.get(article=self.article)
+		self.assertEqual(stored.model_name, settings.OPENAI_MODEL)
+		self.assertEqual(stored.prompt_version, chatgpt_service.summary_version())
+		self.assertIsNotNone(self.cache.get(chatgpt_service._generate_cache_key(self.article.fingerprint)))
+
+	def test_fallback_summaries_are_not_persisted(self):
+		"""
+		Test that fallback and error strings never reach the Summary table.
+		"""
+		with override_settings(OPENAI_API_KEY=None):
+			summary, _ = chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+
+		self.assertIn('**Extractive Summary:**', summary)
+		self.assertFalse(Summary.objects.exists())
+
+	def test_caching_follows_the_outcome_of_the_call_not_the_text(self):
+		"""
+		Test that a failed call is never stored, whatever its text, and a generated summary always is.
+		"""
+		cache_key = chatgpt_service._generate_cache_key(self.article.fingerprint)
+		with mock.patch.object(chatgpt_service, 'generate_summary', return_value=('Looks fine', False)):
+			chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+			chatgpt_service.summarize_articles([(self.article.title, self.article.content)], article_ids=[self.article.pk])
+		self.assertIsNone(self.cache.get(cache_key))
+		self.assertFalse(Summary.objects.exists())
+
+		with mock.patch.object(chatgpt_service, 'generate_summary', return_value=('Rate limited: a story about quotas', True)):
+			chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+		self.assertEqual(Summary.objects.get().text, 'Rate limited: a story about quotas')
+		self.assertIsNotNone(self.cache.get(cache_key))
+
+	def test_summarize_articles_reads_stored_summaries_in_one_query(self):
+		"""
+		Test that batch summarization serves cache misses from the Summary table.
+		"""
+		Summary.objects.create(
+			article=self.article,
+			content_hash=self.article.fingerprint,
+			model_name=settings.OPENAI_MODEL,
+			prompt_version=chatgpt_service.summary_version(),
+			text='From the database'
+		)
+
+		with mock.patch.object(chatgpt_service, 'generate_summary') as summarize, \
+				self.assertNumQueries(1):
+			results = chatgpt_service.summarize_articles(
+				[(self.article.title, self.article.content)], article_ids=[self.article.pk]
+			)
+
+		self.assertEqual(results, [('From the database', True)])
+		summarize.assert_not_called()
+
+	def test_stored_summary_for_other_prompt_version_is_ignored(self):
+		"""
+		Test that a summary generated with another prompt version is not served.
+		"""
+		Summary.objects.create(
+			article=self.article,
+			content_hash=self.article.fingerprint,
+			model_name=settings.OPENAI_MODEL,
+			prompt_version='old',
+			text='Outdated'
+		)
+
+		with mock.patch.object(chatgpt_service, 'generate_summary', return_value=('Current', True)):
+			summary, cached = chatgpt_service.get_article_summary_with_caching(
+				self.article.title, self.article.content, article_id=self.article.pk
+			)
+
+		self.assertEqual((summary, cached), ('Current', False))
+
+
+class LocalSummaryTierTests(SimpleTestCase):
+	"""
+	Tests for the in-process LRU tier in front of the summary cache.
+	"""
+
+	def setUp(self):
+		self.cache = use_private_summary_caches(self)
+
+	def test_hot_summary_is_served_without_touching_redis(self):
+		"""
+		Test that a repeated lookup is answered from the process and counted per tier.
+		"""
+		with mock.patch.object(chatgpt_service, 'generate_summary', return_value=('Hot summary', True)):
+			chatgpt_service.get_article_summary_with_caching('Hot', 'Hot content')
+
+		with mock.patch.object(self.cache, 'get', wraps=self.cache.get) as redis_get, \
+				mock.patch.object(chatgpt_service, '_local_version_checked_at', time.monotonic()), \
+				override_settings(SUMMARY_LOCAL_CACHE_VERSION_INTERVAL=60):
+			result = chatgpt_service.get_article_summary_with_caching('Hot', 'Hot content')
+
+		self.assertEqual(result, ('Hot summary', True))
+		redis_get.assert_not_called()
+		stats = chatgpt_service.summary_cache_stats()
+		self.assertEqual(stats['local'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+		self.assertEqual(stats['redis']['misses'], 1)
+
+	def test_version_bump_clears_other_workers_local_summaries(self):
+		"""
+		Test that invalidate_local_summaries reaches processes that only share Redis.
+		"""
+		with override_settings(SUMMARY_LOCAL_CACHE_VERSION_INTERVAL=0):
+			chatgpt_service._sync_local_cache()
+			chatgpt_service.LOCAL_SUMMARY_CACHE.set('summary:abc', 'Old local copy')
+
+			# Another worker bumps the stamp in the shared cache.
+			self.cache.add(chatgpt_service.LOCAL_VERSION_KEY, 0, timeout=None)
+			self.cache.incr(chatgpt_service.LOCAL_VERSION_KEY)
+			chatgpt_service._sync_local_cache()
+
+		self.assertIsNone(chatgpt_service.LOCAL_SUMMARY_CACHE.get('summary:abc'))
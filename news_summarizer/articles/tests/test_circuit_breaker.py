@@ -0,0 +1,171 @@
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from articles import chatgpt_service
+from articles.circuit_breaker import (
+	CLOSED, FAILURE, HALF_OPEN, NEUTRAL, OPEN, SUCCESS, CircuitBreaker, CircuitOpen,
+)
+from articles.tests.test_chatgpt_service import FakeOpenAIMixin
+
+
+@override_settings(LLM_BREAKER_FAILURE_THRESHOLD=3, LLM_BREAKER_WINDOW=60, LLM_BREAKER_OPEN_SECONDS=30)
+class CircuitBreakerTests(SimpleTestCase):
+	"""
+	Tests for the shared circuit breaker state machine.
+	"""
+
+	def setUp(self):
+		self.cache = LocMemCache(f'test-breaker-{id(self)}', {})
+		self.cache.clear()
+		self.now = 1_000_000.0
+		patcher = mock.patch('articles.circuit_breaker.time.time', side_effect=lambda: self.now)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.breaker = CircuitBreaker('test', self.cache)
+
+	def _fail(self, times):
+		for _ in range(times):
+			self.breaker.record(FAILURE, self.breaker.before_call())
+
+	def test_opens_after_the_failure_threshold(self):
+		"""
+		Test that calls fail fast once enough failures were seen, in any process.
+		"""
+		self._fail(2)
+		self.assertEqual(self.breaker.state(), CLOSED)
+		self.assertFalse(self.breaker.before_call())
+
+		CircuitBreaker('test', self.cache).record(FAILURE)
+
+		self.assertEqual(self.breaker.state(), OPEN)
+		with self.assertRaises(CircuitOpen):
+			self.breaker.before_call()
+
+	def test_failures_outside_the_window_are_forgotten(self):
+		self._fail(2)
+		self.cache.delete(self.breaker.failures_key)  # What the window's expiry does.
+
+		self._fail(2)
+
+		self.assertEqual(self.breaker.state(), CLOSED)
+
+	def test_half_open_lets_a_single_probe_through(self):
+		"""
+		Test that after the open period exactly one caller probes while the others still fail fast.
+		"""
+		self._fail(3)
+		self.now += 31
+
+		self.assertEqual(self.breaker.state(), HALF_OPEN)
+		self.assertTrue(self.breaker.before_call())
+		with self.assertRaises(CircuitOpen):
+			CircuitBreaker('test', self.cache).before_call()
+
+	def test_successful_probe_closes_the_circuit(self):
+		self._fail(3)
+		self.now += 31
+
+		self.breaker.record(SUCCESS, self.breaker.before_call())
+
+		self.assertEqual(self.breaker.state(), CLOSED)
+		self.assertFalse(self.breaker.before_call())
+
+	def test_failed_probe_reopens_the_circuit(self):
+		self._fail(3)
+		self.now += 31
+
+		self.breaker.record(FAILURE, self.breaker.before_call())
+
+		self.assertEqual(self.breaker.state(), OPEN)
+		self.now += 31
+		self.assertTrue(self.breaker.before_call())
+
+	def test_neutral_probe_hands_the_probe_to_the_next_caller(self):
+		"""
+		Test that a probe that says nothing about the provider (e.g. a 429) neither closes nor reopens the circuit.
+		"""
+		self._fail(3)
+		self.now += 31
+
+		self.breaker.record(NEUTRAL, self.breaker.before_call())
+
+		self.assertEqual(self.breaker.state(), HALF_OPEN)
+		self.assertTrue(self.breaker.before_call())
+
+	def test_cache_failure_lets_calls_through(self):
+		self._fail(3)
+
+		with mock.patch.object(self.cache, 'get', side_effect=ConnectionError('down')):
+			self.assertFalse(self.breaker.before_call())
+
+
+@override_settings(
+	LLM_BREAKER_FAILURE_THRESHOLD=2, LLM_BREAKER_OPEN_SECONDS=30, LLM_BREAKER_SLOW_CALL_SECONDS=10,
+	OPENAI_MAX_RETRIES=0,
+)
+class BreakerSummaryTests(FakeOpenAIMixin, TestCase):
+	"""
+	Tests for the circuit breaker around OpenAI calls and the extractive fallback.
+	"""
+
+	content = "Markets rallied on Monday. Bonds fell. Oil was flat. Gold rose."
+
+	def test_server_errors_open_the_circuit_and_summaries_fail_fast(self):
+		"""
+		Test that once 5xx responses open the circuit, summaries are lead sentences,
+		served without calling OpenAI and never cached.
+		"""
+		self.server.failures = [500, 503]
+		for _ in range(2):
+			summary, _ = chatgpt_service.get_article_summary_with_caching('Down title', self.content)
+			self.assertTrue(summary.startswith('OpenAI API Error:'))
+
+		summary, cached = chatgpt_service.get_article_summary_with_caching('Down title', self.content)
+
+		self.assertEqual(summary, "**Extractive Summary:** Markets rallied on Monday. Bonds fell. Oil was flat.")
+		self.assertFalse(cached)
+		self.assertFalse(chatgpt_service.is_generated_summary(summary))
+		self.assertEqual(len(self.server.requests), 2)
+		self.assertIsNone(self.cache.get(chatgpt_service._generate_cache_key(
+			chatgpt_service._fingerprint('Down title', self.content)
+		)))
+
+	def test_client_errors_do_not_open_the_circuit(self):
+		self.server.failures = [400, 400, 429, 429]
+		for _ in range(4):
+			chatgpt_service.summarize_article_with_chatgpt('Bad title', self.content)
+
+		self.assertEqual(chatgpt_service.LLM_BREAKER.state(), CLOSED)
+
+	@override_settings(LLM_BREAKER_FAILURE_THRESHOLD=1, LLM_BREAKER_SLOW_CALL_SECONDS=0.05)
+	def test_slow_calls_count_as_failures(self):
+		"""
+		Test that a call slower than the threshold is served, but opens the circuit for the next ones.
+		"""
+		self.server.delay = 0.1
+
+		self.assertEqual(chatgpt_service.summarize_article_with_chatgpt('Slow title', self.content), 'Summary of Slow title')
+		self.assertTrue(
+			chatgpt_service.summarize_article_with_chatgpt('Slow title', self.content).startswith('**Extractive Summary:**')
+		)
+
+	async def test_async_and_streamed_summaries_fail_fast_too(self):
+		await sync_to_async(chatgpt_service.LLM_BREAKER._open)()
+
+		summary = await chatgpt_service.asummarize_article_with_chatgpt('Title', self.content)
+		streamed = [chunk async for chunk in chatgpt_service._astream_completion('Title', self.content)]
+
+		self.assertTrue(summary.startswith('**Extractive Summary:**'))
+		self.assertEqual([chunk for chunk, _ in streamed], [summary])
+		self.assertTrue(streamed[0][1].startswith('CircuitOpen:'))
+		self.assertEqual(self.server.requests, [])
+
+	def test_successful_probe_restores_generated_summaries(self):
+		chatgpt_service.LLM_BREAKER._open()
+		with mock.patch('articles.circuit_breaker.time.time', return_value=chatgpt_service.time.time() + 31):
+			summary, cached = chatgpt_service.get_article_summary_with_caching('Back title', self.content)
+
+		self.assertEqual((summary, cached), ('Summary of Back title', False))
+		self.assertEqual(chatgpt_service.LLM_BREAKER.state(), CLOSED)
@@ -0,0 +1,184 @@
+import json
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from articles import benchmarks, chatgpt_service
+from articles.models import Article, Summary
+from articles.tests.test_chatgpt_service import use_private_summary_caches
+
+
+class BenchmarkIndexesCommandTests(TestCase):
+    """
+    Tests for the benchmark_indexes management command.
+    """
+
+    def test_benchmark_reports_both_variants_and_rolls_back(self):
+        """
+        Test that the benchmark times every query with and without indexes and leaves no rows behind.
+        """
+        out = StringIO()
+        call_command('benchmark_indexes', rows=200, repeat=1, json=True, stdout=out, stderr=StringIO())
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {'with_indexes', 'without_indexes'})
+        self.assertEqual(set(results['with_indexes']), set(results['without_indexes']))
+        self.assertFalse(Article.objects.exists())
+        index_names = {index.name for index in Article._meta.indexes}
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Article._meta.db_table)
+        self.assertTrue(index_names <= set(constraints))
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+    """
+    Tests for the benchmark_serializers management command.
+    """
+
+    def test_benchmark_compares_both_paths_and_rolls_back(self):
+        """
+        Test that the benchmark times both serialization paths, finds identical output and leaves no rows.
+        """
+        out = StringIO()
+        call_command("benchmark_serializers", rows=20, repeat=1, json=True, stdout=out)
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {"list", "detail"})
+        for result in results.values():
+            self.assertTrue(result["identical"])
+            self.assertGreater(result["model_ms"], 0)
+        self.assertFalse(Article.objects.exists())
+
+class SummaryCacheCommandTests(TestCase):
+    """
+    Tests for the summary_cache management command.
+    """
+
+    def setUp(self):
+        self.cache = use_private_summary_caches(self)
+        self.articles = [
+            Article.objects.create(
+                title=f"Title {i}", content=f"Content {i}", url=f"https://example.com/{i}",
+                published_date=timezone.now(), source="Example",
+            )
+            for i in range(3)
+        ]
+
+    def test_prewarm_stored_only_copies_stored_summaries_without_openai(self):
+        """
+        Test that --stored-only caches summaries from Postgres and never generates.
+        """
+        stored = self.articles[0]
+        Summary.objects.create(
+            article=stored, content_hash=stored.fingerprint, model_name=settings.OPENAI_MODEL,
+            prompt_version=chatgpt_service.summary_version(), text="Stored summary",
+        )
+
+        with mock.patch.object(chatgpt_service, "generate_summary") as summarize:
+            call_command("summary_cache", "prewarm", "--stored-only", stdout=StringIO())
+
+        summarize.assert_not_called()
+        entry = self.cache.get(chatgpt_service._generate_cache_key(stored.fingerprint))
+        self.assertEqual(chatgpt_service._read_entry(entry), ("Stored summary", True))
+        self.assertIsNone(self.cache.get(chatgpt_service._generate_cache_key(self.articles[1].fingerprint)))
+
+    def test_prewarm_generates_missing_summaries(self):
+        """
+        Test that prewarm summarizes uncached articles so later requests hit the cache.
+        """
+        with mock.patch.object(chatgpt_service, "generate_summary", return_value=("Fresh", True)) as summarize:
+            call_command("summary_cache", "prewarm", "--limit", "2", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(summarize.call_count, 2)
+        self.assertEqual(
+            chatgpt_service.get_stored_summary("Title 2", "Content 2", fingerprint=self.articles[2].fingerprint),
+            "Fresh",
+        )
+
+    def test_invalidate_deletes_only_the_given_version(self):
+        """
+        Test that invalidate drops one prompt version's keys and stored rows and keeps the others.
+        """
+        article = self.articles[0]
+        old_key = chatgpt_service._generate_cache_key(article.fingerprint, prompt_version="old")
+        current_key = chatgpt_service._generate_cache_key(article.fingerprint)
+        self.cache.set(old_key, "Old summary")
+        self.cache.set(current_key, "Current summary")
+        for version in ("old", chatgpt_service.summary_version()):
+            Summary.objects.create(
+                article=article, content_hash=article.fingerprint, model_name=settings.OPENAI_MODEL,
+                prompt_version=version, text=f"Summary v{version}",
+            )
+
+        call_command(
+            "summary_cache", "invalidate", "--prompt-version", "old", "--batch-size", "2", "--purge-stored",
+            stdout=StringIO(),
+        )
+
+        self.assertIsNone(self.cache.get(old_key))
+        self.assertEqual(self.cache.get(current_key), "Current summary")
+        self.assertEqual(
+            list(Summary.objects.values_list("prompt_version", flat=True)), [chatgpt_service.summary_version()]
+        )
+
+
+class RunBenchmarksCommandTests(TransactionTestCase):
+    """
+    Tests for the run_benchmarks management command.
+    """
+
+    def test_suite_reports_every_scenario_and_cleans_up(self):
+        """
+        Test that a small run measures ingest, list, summary states and the extractive backend, and leaves no rows behind.
+        """
+        out = StringIO()
+        call_command(
+            "run_benchmarks", "--use-existing-db", "--articles", "30", "--ingest-articles", "15",
+            "--depths", "1,2", "--repeat", "2", "--llm-latency", "0", "--concurrency", "4",
+            stdout=out, stderr=StringIO(),
+        )
+
+        results = json.loads(out.getvalue())["results"]
+        self.assertEqual(results["ingest"]["cold"]["created"], 15)
+        self.assertEqual(results["ingest"]["repeat"]["queued"], 0)
+        self.assertEqual(
+            set(results["list"]),
+            {"cursor_page_1", "numbered_page_1", "cursor_page_2", "numbered_page_2", "cached_page_1", "detail"},
+        )
+        self.assertEqual(results["summary"]["cold"]["llm_calls"], 2)
+        self.assertEqual(results["summary"]["warm"]["llm_calls"], 0)
+        self.assertEqual(results["summary"]["stampede"]["llm_calls"], 1)
+        self.assertEqual(results["extractive"]["batch"]["articles"], 30)
+        self.assertEqual(results["extractive"]["endpoint"]["samples"], 2)
+        self.assertFalse(Article.objects.exists())
+
+
+class BenchmarkComparisonTests(SimpleTestCase):
+    """
+    Tests for comparing benchmark runs with a baseline.
+    """
+
+    def test_compare_flags_slower_latency_lower_throughput_and_new_llm_calls(self):
+        baseline = {
+            "list": {"detail": {"p50_ms": 10.0, "samples": 20}},
+            "ingest": {"cold": {"fetched_per_second": 100.0}},
+            "summary": {"warm": {"p50_ms": 5.0, "llm_calls": 0}},
+        }
+        current = {
+            "list": {"detail": {"p50_ms": 13.0, "samples": 20}},
+            "ingest": {"cold": {"fetched_per_second": 70.0}},
+            "summary": {"warm": {"p50_ms": 5.5, "llm_calls": 2}},
+        }
+
+        comparison, regressions = benchmarks.compare(current, baseline, tolerance=0.2)
+
+        self.assertEqual(
+            sorted(regressions),
+            ["ingest.cold.fetched_per_second", "list.detail.p50_ms", "summary.warm.llm_calls"],
+        )
+        self.assertAlmostEqual(comparison["summary.warm.p50_ms"]["change"], 0.1)
+        self.assertNotIn("list.detail.samples", comparison)
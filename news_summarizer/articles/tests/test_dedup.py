@@ -0,0 +1,135 @@
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from .. import chatgpt_service
+from ..dedup import link_near_duplicates, minhash, similarity
+from ..models import Article, Summary
+from ..services import ArticleService
+from .test_services import LOCMEM_CACHES
+
+WIRE_TITLE = 'Fed holds interest rates steady, signals two cuts later this year'
+WIRE_CONTENT = (
+	'The Federal Reserve held its benchmark interest rate steady on Wednesday and signalled that '
+	'policymakers still expect to cut rates twice before the end of the year, as inflation continues '
+	'to cool toward the central bank target… [+3412 chars]'
+)
+
+
+def raw_article(url, title=WIRE_TITLE, content=WIRE_CONTENT):
+	return {
+		'url': url,
+		'title': title,
+		'content': content,
+		'publishedAt': '2024-06-12T18:00:00Z',
+		'source': {'name': 'Example'},
+	}
+
+
+class MinHashTests(SimpleTestCase):
+	"""
+	Tests for the MinHash signatures.
+	"""
+
+	def test_syndicated_copies_are_similar(self):
+		"""
+		Test that copies differing in a source suffix, dateline and truncation marker stay above the threshold.
+		"""
+		original = minhash(WIRE_TITLE, WIRE_CONTENT)
+		reuters = minhash(f'{WIRE_TITLE} - Reuters', WIRE_CONTENT.replace('3412', '2977'))
+		ap = minhash(WIRE_TITLE.replace('interest ', ''), f'WASHINGTON (AP) {WIRE_CONTENT}')
+
+		self.assertGreaterEqual(similarity(original, reuters), settings.ARTICLE_NEAR_DUPLICATE_SIMILARITY)
+		self.assertGreaterEqual(similarity(original, ap), settings.ARTICLE_NEAR_DUPLICATE_SIMILARITY)
+
+	def test_related_stories_are_not_similar(self):
+		"""
+		Test that a different story on the same topic stays below the threshold.
+		"""
+		original = minhash(WIRE_TITLE, WIRE_CONTENT)
+		other = minhash(
+			'Fed signals rate cuts are coming as inflation cools',
+			'Federal Reserve officials on Wednesday left interest rates unchanged but said they expect '
+			'to lower borrowing costs later this year as inflation eases… [+1800 chars]',
+		)
+
+		self.assertLess(similarity(original, other), settings.ARTICLE_NEAR_DUPLICATE_SIMILARITY)
+
+	def test_empty_text_has_no_signature(self):
+		self.assertIsNone(minhash('', None))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NearDuplicateIngestTests(TestCase):
+	"""
+	Tests for linking near-duplicates at ingest.
+	"""
+
+	def test_save_articles_links_copies_to_the_first_article(self):
+		"""
+		Test that copies within a batch and in later batches point at the earliest article.
+		"""
+		service = ArticleService()
+		service.save_articles([
+			raw_article('https://example.com/original'),
+			raw_article('https://example.com/copy-1', title=f'{WIRE_TITLE} - Reuters'),
+			raw_article('https://example.com/other', title='Apple unveils new iPhone', content='Apple introduced a phone.'),
+		])
+		service.save_articles([raw_article('https://example.com/copy-2', content=f'WASHINGTON (AP) {WIRE_CONTENT}')])
+
+		original = Article.objects.get(url='https://example.com/original')
+		self.assertIsNone(original.canonical_id)
+		self.assertIsNone(Article.objects.get(url='https://example.com/other').canonical_id)
+		self.assertEqual(
+			set(original.duplicates.values_list('url', flat=True)),
+			{'https://example.com/copy-1', 'https://example.com/copy-2'},
+		)
+
+	def test_link_near_duplicates_uses_one_candidate_query(self):
+		"""
+		Test that a batch is linked with a fixed number of queries, whatever its size.
+		"""
+		service = ArticleService()
+		service.save_articles([raw_article('https://example.com/original')])
+		with mock.patch('articles.services.link_near_duplicates'):
+			created_ids, _ = service.save_articles([
+				raw_article(f'https://example.com/copy-{i}', title=f'{WIRE_TITLE} ({i})') for i in range(5)
+			])
+
+		# New signatures, candidates, and the bulk update.
+		with self.assertNumQueries(3):
+			links = link_near_duplicates(created_ids)
+
+		original = Article.objects.get(url='https://example.com/original')
+		self.assertEqual(links, {pk: original.pk for pk in created_ids})
+
+	def test_duplicates_reuse_the_canonical_summary(self):
+		"""
+		Test that the summary endpoint and ?include=summary serve the canonical article's summary.
+		"""
+		service = ArticleService()
+		service.save_articles([raw_article('https://example.com/original')])
+		service.save_articles([raw_article('https://example.com/copy', title=f'{WIRE_TITLE} - Reuters')])
+		original = Article.objects.get(url='https://example.com/original')
+		copy = Article.objects.get(url='https://example.com/copy')
+		Summary.objects.create(
+			article=original,
+			content_hash=original.fingerprint,
+			model_name=settings.OPENAI_MODEL,
+			prompt_version=chatgpt_service.summary_version(),
+			text='Stored summary',
+		)
+
+		with mock.patch(
+			'articles.chatgpt_service.aget_article_summary_with_caching', return_value=('Stored summary', True)
+		) as mock_summary:
+			self.client.get(f'/articles/{copy.pk}/summary')
+		mock_summary.assert_called_once_with(
+			original.title, original.content, article_id=original.pk, fingerprint=original.fingerprint
+		)
+
+		results = self.client.get('/articles/?include=summary').json()['results']
+		self.assertEqual({item['url']: item['summary'] for item in results}, {
+			'https://example.com/original': 'Stored summary',
+			'https://example.com/copy': 'Stored summary',
+		})
+		self.assertEqual(self.client.get(f'/articles/{copy.pk}/').json()['canonical'], original.pk)
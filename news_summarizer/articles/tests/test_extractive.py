@@ -0,0 +1,69 @@
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+
+from articles import extractive
+from articles.fakes import fake_text
+
+ARTICLE = (
+	"Rates",
+	"The weather in the capital was mild on Tuesday. "
+	"The central bank raised interest rates by half a point. "
+	"Higher interest rates should slow inflation, the central bank said. "
+	"Analysts expect the bank to raise rates again as inflation stays high. "
+	"A local team won its football match.",
+)
+
+
+@override_settings(SUMMARY_EXTRACTIVE_SENTENCES=2, SUMMARY_EXTRACTIVE_MAX_WORDS=100)
+class ExtractiveSummaryTests(SimpleTestCase):
+	"""
+	Tests for the local TF-IDF/TextRank summarizer.
+	"""
+
+	def test_central_sentences_are_kept_in_article_order(self):
+		"""
+		Test that the sentences sharing the article's topic win over the off-topic ones.
+		"""
+		summary, = extractive.summarize_batch([ARTICLE])
+
+		self.assertEqual(summary, (
+			"The central bank raised interest rates by half a point. "
+			"Higher interest rates should slow inflation, the central bank said."
+		))
+
+	def test_an_article_is_summarized_alike_in_any_batch(self):
+		others = [(f"Other {i}", f"{fake_text(i, 12)}. {fake_text(-i, 9)}. Rates and inflation.") for i in range(5)]
+
+		self.assertEqual(extractive.summarize_batch(others + [ARTICLE])[-1], extractive.summarize_batch([ARTICLE])[0])
+
+	@override_settings(SUMMARY_EXTRACTIVE_MAX_WORDS=12)
+	def test_summaries_stay_within_the_word_limit(self):
+		summary, = extractive.summarize_batch([ARTICLE])
+
+		self.assertLessEqual(len(summary.split()), 12)
+		self.assertTrue(summary)
+
+	def test_articles_without_content_are_summarized_by_their_title(self):
+		self.assertEqual(extractive.summarize_batch([("<b>Title</b>", None), ("Empty", "")]), ["Title", "Empty"])
+
+	def test_without_numpy_articles_are_summarized_by_their_lead(self):
+		with mock.patch.object(extractive, 'np', None):
+			summary, = extractive.summarize_batch([ARTICLE])
+
+		self.assertTrue(summary.startswith("The weather in the capital was mild on Tuesday."))
+
+	def test_a_thousand_articles_take_seconds(self):
+		"""
+		Test that a backfill-sized batch runs well within a few seconds on one CPU.
+		"""
+		articles = [
+			(f"Title {i}", ' '.join(f"{fake_text(f'{i}-{j}', 15)}." for j in range(20))) for i in range(1000)
+		]
+
+		started = time.monotonic()
+		summaries = extractive.summarize_batch(articles)
+
+		self.assertLess(time.monotonic() - started, 5)
+		self.assertEqual(len(summaries), 1000)
+		self.assertTrue(all(summaries))
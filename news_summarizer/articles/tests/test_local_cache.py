@@ -0,0 +1,70 @@
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+
+from articles.local_cache import LocalLRUCache, TierStats
+
+
+class LocalLRUCacheTests(SimpleTestCase):
+	"""
+	Tests for the per-process LRU cache.
+	"""
+
+	def test_least_recently_used_entry_is_evicted(self):
+		"""
+		Test that the cache never grows past maxsize and evicts the oldest unused key.
+		"""
+		lru = LocalLRUCache(maxsize=2, ttl=60)
+		lru.set('a', 1)
+		lru.set('b', 2)
+		lru.get('a')
+		lru.set('c', 3)
+
+		self.assertEqual(len(lru), 2)
+		self.assertIsNone(lru.get('b'))
+		self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+	def test_entries_expire_after_ttl_or_their_own_deadline(self):
+		"""
+		Test that an entry expires at the earlier of the cache TTL and its expires_at.
+		"""
+		lru = LocalLRUCache(maxsize=10, ttl=60)
+		now = time.time()
+		lru.set('ttl', 'x')
+		lru.set('deadline', 'y', expires_at=now + 5)
+
+		with mock.patch('articles.local_cache.time.time', return_value=now + 10):
+			self.assertIsNone(lru.get('deadline'))
+			self.assertEqual(lru.get('ttl'), 'x')
+		with mock.patch('articles.local_cache.time.time', return_value=now + 61):
+			self.assertIsNone(lru.get('ttl'))
+
+	def test_zero_size_disables_the_cache(self):
+		"""
+		Test that a cache with maxsize 0 stores nothing.
+		"""
+		lru = LocalLRUCache(maxsize=0, ttl=60)
+		lru.set('a', 1)
+
+		self.assertIsNone(lru.get('a'))
+
+
+class TierStatsTests(SimpleTestCase):
+	"""
+	Tests for the per-tier hit counters.
+	"""
+
+	def test_snapshot_reports_hit_rate_per_tier(self):
+		"""
+		Test that hits and misses are counted separately for each tier.
+		"""
+		stats = TierStats()
+		stats.record('local', True)
+		stats.record('local', True)
+		stats.record('local', False)
+		stats.record('redis', False)
+
+		self.assertEqual(stats.snapshot(), {
+			'local': {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3},
+			'redis': {'hits': 0, 'misses': 1, 'hit_rate': 0.0},
+		})
@@ -0,0 +1,161 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from articles import chatgpt_service, metrics
+from articles.models import Article
+from articles.tasks import summarize_articles_task
+from articles.tests.test_chatgpt_service import FakeOpenAIMixin
+from articles.tests.test_services import LOCMEM_CACHES
+
+
+def sample(name, **labels):
+	"""
+	:return: The current value of a sample in the default registry, 0 if absent.
+	"""
+	return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(CACHES=LOCMEM_CACHES, METRICS_CELERY_QUEUES=[])
+class MetricsEndpointTests(TestCase):
+	"""
+	Tests for the /metrics endpoint and the request metrics middleware.
+	"""
+
+	def setUp(self):
+		cache.clear()
+		for i in range(3):
+			Article.objects.create(
+				title=f'Metrics {i}', content='Body', url=f'https://example.com/metrics/{i}',
+				published_date=timezone.now(), source='Test',
+			)
+
+	def test_metrics_endpoint_exposes_the_registry(self):
+		"""
+		Test that /metrics answers in the Prometheus text format, uncached.
+		"""
+		chatgpt_service._record_lookup('redis', True)
+
+		response = self.client.get('/metrics')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response['Content-Type'].startswith('text/plain'))
+		self.assertEqual(response['Cache-Control'], 'no-store')
+		self.assertIn(b'summary_cache_lookups_total{result="hit",tier="redis"}', response.content)
+
+	def test_metrics_endpoint_without_prometheus_client(self):
+		"""
+		Test that /metrics answers 503 when prometheus_client is missing.
+		"""
+		with mock.patch.object(metrics, 'prometheus_client', None):
+			response = self.client.get('/metrics')
+
+		self.assertEqual(response.status_code, 503)
+
+	def test_middleware_records_duration_and_query_count_per_view(self):
+		"""
+		Test that each request is timed and its database queries counted under its view name.
+		"""
+		labels = {'view': 'article-list'}
+		requests_before = sample('http_request_seconds_count', **labels, method='GET', status='200')
+		queries_before = sample('http_request_db_queries_sum', **labels)
+
+		with self.assertNumQueries(2):
+			response = self.client.get('/articles/?page=1', HTTP_X_CACHE_BYPASS='1')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(sample('http_request_seconds_count', **labels, method='GET', status='200'), requests_before + 1)
+		self.assertEqual(sample('http_request_db_queries_sum', **labels), queries_before + 2)
+
+	def test_middleware_counts_queries_of_async_views(self):
+		"""
+		Test that queries run on sync_to_async threads count toward the request.
+		"""
+		queries_before = sample('http_request_db_queries_sum', view='article-summary')
+
+		with override_settings(OPENAI_API_KEY=None):
+			response = self.client.get(f'/articles/{Article.objects.first().pk}/summary')
+
+		self.assertEqual(response.status_code, 200)
+		self.assertGreater(sample('http_request_db_queries_sum', view='article-summary'), queries_before)
+
+
+@override_settings(METRICS_CELERY_QUEUES=[])
+class LLMMetricsTests(FakeOpenAIMixin, TestCase):
+	"""
+	Tests for the latency, token and cache tier metrics of the summary path.
+	"""
+
+	def test_completion_latency_and_tokens_are_recorded(self):
+		"""
+		Test that a generated summary observes one LLM call and adds its usage to the token counters.
+		"""
+		calls_before = sample('llm_call_seconds_count', mode='complete', outcome='ok')
+		prompt_before = sample('llm_tokens_total', kind='prompt')
+		completion_before = sample('llm_tokens_total', kind='completion')
+
+		chatgpt_service.get_article_summary_with_caching('Metrics title', 'Metrics content.')
+
+		self.assertEqual(sample('llm_call_seconds_count', mode='complete', outcome='ok'), calls_before + 1)
+		self.assertEqual(sample('llm_tokens_total', kind='prompt'), prompt_before + 10)
+		self.assertEqual(sample('llm_tokens_total', kind='completion'), completion_before + 5)
+
+	def test_cache_lookups_are_counted_per_tier(self):
+		"""
+		Test that a miss and then a hit are counted for the tiers they reach.
+		"""
+		local_miss = sample('summary_cache_lookups_total', tier='local', result='miss')
+		local_hit = sample('summary_cache_lookups_total', tier='local', result='hit')
+
+		chatgpt_service.get_article_summary_with_caching('Tier title', 'Tier content.')
+		chatgpt_service.get_article_summary_with_caching('Tier title', 'Tier content.')
+
+		self.assertEqual(sample('summary_cache_lookups_total', tier='local', result='miss'), local_miss + 1)
+		self.assertEqual(sample('summary_cache_lookups_total', tier='local', result='hit'), local_hit + 1)
+		self.assertEqual(chatgpt_service.summary_cache_stats()['local'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+	def test_celery_task_duration_is_recorded(self):
+		"""
+		Test that a task run observes its duration under its name and final state.
+		"""
+		labels = {'task': summarize_articles_task.name, 'state': 'SUCCESS'}
+		before = sample('celery_task_seconds_count', **labels)
+
+		summarize_articles_task.apply(args=([],))
+
+		self.assertEqual(sample('celery_task_seconds_count', **labels), before + 1)
+
+
+class QueueDepthCollectorTests(SimpleTestCase):
+	"""
+	Tests for the Celery queue depth gauge.
+	"""
+
+	@override_settings(METRICS_CELERY_QUEUES=['celery', 'summaries'])
+	def test_reports_the_message_count_of_each_queue(self):
+		"""
+		Test that each configured queue is reported with the broker's message count.
+		"""
+		connection = mock.MagicMock()
+		connection.__enter__.return_value = connection
+		connection.default_channel.queue_declare.side_effect = lambda queue, passive: mock.Mock(
+			message_count={'celery': 4, 'summaries': 0}[queue]
+		)
+		with mock.patch('news_summarizer.celery.app.connection_for_read', return_value=connection):
+			gauge, = metrics.QueueDepthCollector().collect()
+
+		self.assertEqual(
+			{s.labels['queue']: s.value for s in gauge.samples}, {'celery': 4, 'summaries': 0}
+		)
+
+	@override_settings(METRICS_CELERY_QUEUES=['celery'])
+	def test_unreachable_broker_reports_no_samples(self):
+		"""
+		Test that a scrape still succeeds when the broker is down.
+		"""
+		with mock.patch('news_summarizer.celery.app.connection_for_read', side_effect=OSError('down')):
+			gauge, = metrics.QueueDepthCollector().collect()
+
+		self.assertEqual(gauge.samples, [])
@@ -0,0 +1,117 @@
+from django.test import SimpleTestCase, override_settings
+
+from articles import chatgpt_service
+from articles.preprocessing import (
+	clean_text, content_fingerprint, count_tokens, lead_sentences, prepare_input, split_into_chunks,
+)
+
+LONG_CONTENT = "\n\n".join(
+	" ".join(f"Paragraph {p} sentence {s} reports on the ongoing story." for s in range(6))
+	for p in range(8)
+)
+
+
+class CleanTextTests(SimpleTestCase):
+	"""
+	Tests for clean_text.
+	"""
+
+	def test_markup_marker_and_boilerplate_are_removed(self):
+		raw = (
+			"<script>track()</script><p>Markets  rallied &amp; bonds fell.</p>\n"
+			"Advertisement\n"
+			"<b>Investors</b> cheered… [+1234 chars]"
+		)
+
+		self.assertEqual(clean_text(raw), "Markets rallied & bonds fell.\nInvestors cheered")
+
+	def test_equivalent_inputs_share_a_fingerprint(self):
+		"""
+		Test that markup and whitespace differences collapse to one fingerprint, and so one cache entry.
+		"""
+		self.assertEqual(
+			content_fingerprint("Title", "<p>Markets rallied &amp; bonds fell.</p>"),
+			content_fingerprint("Title", "Markets   rallied & bonds fell."),
+		)
+		self.assertNotEqual(content_fingerprint("Title", "Markets rallied."), content_fingerprint("Title", "Markets fell."))
+
+	def test_cache_key_names_model_and_prompt_version(self):
+		"""
+		Test that changing the model or prompt version changes the cache key.
+		"""
+		fingerprint = content_fingerprint("Title", "Markets rallied.")
+		key = chatgpt_service._generate_cache_key(fingerprint)
+
+		self.assertIn(fingerprint, key)
+		with override_settings(OPENAI_MODEL="other-model"):
+			self.assertNotEqual(chatgpt_service._generate_cache_key(fingerprint), key)
+		self.assertNotEqual(chatgpt_service._generate_cache_key(fingerprint, prompt_version="next"), key)
+
+	def test_cache_key_names_input_settings(self):
+		"""
+		Test that retuning the input budget, chunking or output cap changes the cache key.
+		"""
+		fingerprint = content_fingerprint("Title", "Markets rallied.")
+		key = chatgpt_service._generate_cache_key(fingerprint)
+
+		for name, value in (
+			("SUMMARY_INPUT_TOKEN_BUDGET", 3000), ("SUMMARY_MAP_REDUCE", False), ("SUMMARY_CHUNK_TOKENS", 500),
+			("SUMMARY_MAX_CHUNKS", 8), ("SUMMARY_MAX_OUTPUT_TOKENS", 400),
+		):
+			with self.subTest(setting=name), override_settings(**{name: value}):
+				self.assertNotEqual(chatgpt_service._generate_cache_key(fingerprint), key)
+		self.assertTrue(chatgpt_service.summary_version().startswith(f"{chatgpt_service.PROMPT_VERSION}."))
+
+
+@override_settings(SUMMARY_INPUT_TOKEN_BUDGET=100, SUMMARY_CHUNK_TOKENS=80, SUMMARY_MAX_CHUNKS=3)
+class PrepareInputTests(SimpleTestCase):
+	"""
+	Tests for the token budget applied by prepare_input.
+	"""
+
+	def test_short_content_is_sent_whole(self):
+		self.assertEqual(prepare_input("Title", "Short content."), ("Title", ("Short content.",)))
+
+	def test_long_content_is_truncated_to_the_budget_without_map_reduce(self):
+		with override_settings(SUMMARY_MAP_REDUCE=False):
+			_, chunks = prepare_input("Title", LONG_CONTENT)
+
+		self.assertEqual(len(chunks), 1)
+		self.assertLessEqual(count_tokens(chunks[0]), 100)
+		self.assertTrue(LONG_CONTENT.startswith(chunks[0]))
+
+	def test_long_content_is_cut_into_a_bounded_number_of_chunks(self):
+		with override_settings(SUMMARY_MAP_REDUCE=True):
+			_, chunks = prepare_input("Title", LONG_CONTENT)
+
+		self.assertEqual(len(chunks), 3)
+		self.assertTrue(all(count_tokens(chunk) <= 80 for chunk in chunks))
+
+	def test_chunks_keep_all_text_in_order(self):
+		chunks = split_into_chunks(LONG_CONTENT, 80)
+
+		self.assertEqual(" ".join(chunks).split(), LONG_CONTENT.split())
+		self.assertTrue(all(count_tokens(chunk) <= 80 for chunk in chunks))
+
+
+class LeadSentencesTests(SimpleTestCase):
+	"""
+	Tests for lead_sentences, the extractive fallback.
+	"""
+
+	@override_settings(SUMMARY_EXTRACTIVE_SENTENCES=2, SUMMARY_EXTRACTIVE_MAX_WORDS=100)
+	def test_takes_the_first_sentences_of_the_cleaned_content(self):
+		content = "<p>Markets rallied.</p>\nBonds fell! Oil was flat. Gold rose… [+1200 chars]"
+
+		self.assertEqual(lead_sentences("Title", content), "Markets rallied. Bonds fell!")
+
+	@override_settings(SUMMARY_EXTRACTIVE_SENTENCES=3, SUMMARY_EXTRACTIVE_MAX_WORDS=5)
+	def test_stays_within_the_word_limit(self):
+		"""
+		Test that whole sentences are dropped past the limit, and an overlong first one is cut.
+		"""
+		self.assertEqual(lead_sentences("Title", "One two three. Four five six."), "One two three.")
+		self.assertEqual(lead_sentences("Title", "One two three four five six seven."), "One two three four five…")
+
+	def test_falls_back_to_the_title(self):
+		self.assertEqual(lead_sentences("<b>Title</b>", None), "Title")
@@ -0,0 +1,203 @@
+from unittest import mock
+import fakeredis
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from articles import chatgpt_service, rate_limit
+from articles.rate_limit import BACKGROUND, INTERACTIVE, RateLimiter, RateLimitExceeded
+from articles.tests.test_chatgpt_service import FakeOpenAIMixin
+
+
+class RateLimiterTests(SimpleTestCase):
+	"""
+	Tests for the shared token buckets, against an in-memory Redis.
+	"""
+
+	def setUp(self):
+		self.redis = fakeredis.FakeRedis()
+		self.now = 1_000_000.0
+		patcher = mock.patch('articles.rate_limit.time.time', side_effect=lambda: self.now)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def _limiter(self, **quota):
+		return RateLimiter('test', self.redis, **quota)
+
+	def test_requests_and_tokens_are_taken_together_or_not_at_all(self):
+		"""
+		Test that a call short on tokens takes no request either, and is told how long to wait.
+		"""
+		limiter = self._limiter(requests_per_minute=10, tokens_per_minute=600)
+
+		self.assertEqual(limiter.try_acquire(tokens=500), 0)
+		wait = limiter.try_acquire(tokens=200)
+
+		self.assertAlmostEqual(wait, 10.0)
+		self.assertEqual(limiter.try_acquire(tokens=100), 0)
+		self.assertEqual(float(self.redis.hget('ratelimit:test:requests', 'level')), 8)
+
+	def test_buckets_refill_continuously(self):
+		"""
+		Test that capacity comes back at the per-minute rate, up to a minute's worth.
+		"""
+		limiter = self._limiter(requests_per_minute=60)
+		for _ in range(60):
+			self.assertEqual(limiter.try_acquire(), 0)
+		self.assertAlmostEqual(limiter.try_acquire(), 1.0)
+
+		self.now += 5
+		for _ in range(5):
+			self.assertEqual(limiter.try_acquire(), 0)
+		self.assertGreater(limiter.try_acquire(), 0)
+
+	def test_limiters_in_different_processes_share_the_quota(self):
+		"""
+		Test that two limiters on one Redis draw on the same buckets.
+		"""
+		web, worker = self._limiter(requests_per_minute=2), self._limiter(requests_per_minute=2)
+
+		self.assertEqual(web.try_acquire(), 0)
+		self.assertEqual(worker.try_acquire(), 0)
+		self.assertGreater(web.try_acquire(), 0)
+
+	@override_settings(RATE_LIMIT_INTERACTIVE_RESERVE=0.5)
+	def test_background_calls_leave_the_reserve_to_interactive_ones(self):
+		"""
+		Test that background work cannot take the reserved share of a bucket.
+		"""
+		limiter = self._limiter(requests_per_minute=4)
+
+		self.assertEqual(limiter.try_acquire(level=BACKGROUND), 0)
+		self.assertEqual(limiter.try_acquire(level=BACKGROUND), 0)
+		self.assertGreater(limiter.try_acquire(level=BACKGROUND), 0)
+		self.assertEqual(limiter.try_acquire(level=INTERACTIVE), 0)
+
+	def test_background_calls_wait_while_an_interactive_call_waits(self):
+		"""
+		Test that a waiting interactive caller preempts background callers.
+		"""
+		limiter = self._limiter(requests_per_minute=100)
+		limiter._mark_waiting(1)
+
+		self.assertGreater(limiter.try_acquire(level=BACKGROUND), 0)
+		self.assertEqual(limiter.try_acquire(level=INTERACTIVE), 0)
+
+		limiter._mark_waiting(-1)
+		self.assertEqual(limiter.try_acquire(level=BACKGROUND), 0)
+
+	def test_priority_follows_the_context(self):
+		"""
+		Test that calls made inside priority(BACKGROUND) are background calls, also on executor threads.
+		"""
+		with rate_limit.priority(BACKGROUND):
+			wrapped = rate_limit.with_current_priority(rate_limit.current_priority)
+		self.assertEqual(rate_limit.current_priority(), INTERACTIVE)
+		self.assertEqual(wrapped(), BACKGROUND)
+
+	def test_acquire_gives_up_when_capacity_is_too_far_off(self):
+		"""
+		Test that acquire fails fast instead of sleeping past its wait limit.
+		"""
+		limiter = self._limiter(requests_per_minute=1)
+		limiter.acquire()
+
+		with mock.patch('articles.rate_limit.time.sleep') as sleep:
+			with self.assertRaises(RateLimitExceeded):
+				limiter.acquire(timeout=5)
+		sleep.assert_not_called()
+		self.assertEqual(int(self.redis.get(limiter.waiters_key)), 0)
+
+	def test_adjust_settles_the_token_estimate(self):
+		"""
+		Test that unused tokens of an estimate go back to the bucket.
+		"""
+		limiter = self._limiter(tokens_per_minute=1000)
+		limiter.try_acquire(tokens=800)
+
+		limiter.adjust(100 - 800)
+
+		self.assertEqual(float(self.redis.hget('ratelimit:test:tokens', 'level')), 900)
+
+	def test_block_holds_off_every_caller(self):
+		"""
+		Test that after a 429 no caller is let through until the block lapses.
+		"""
+		limiter = self._limiter(requests_per_minute=100)
+
+		limiter.block(3)
+
+		self.assertAlmostEqual(self._limiter(requests_per_minute=100).try_acquire(), 3.0)
+
+	def test_no_redis_means_no_limit(self):
+		"""
+		Test that without a Redis client every call goes through.
+		"""
+		limiter = RateLimiter('test', None, requests_per_minute=1)
+
+		self.assertEqual([limiter.try_acquire(), limiter.try_acquire()], [0, 0])
+
+	def test_redis_failure_lets_calls_through(self):
+		"""
+		Test that a broken Redis does not stop outbound calls.
+		"""
+		limiter = self._limiter(requests_per_minute=1)
+		with mock.patch.object(self.redis, 'pipeline', side_effect=ConnectionError('down')):
+			limiter.acquire()
+
+
+@override_settings(RATE_LIMITS={'openai': {'requests_per_minute': 100, 'tokens_per_minute': 10_000}})
+class RateLimitedSummaryTests(FakeOpenAIMixin, TestCase):
+	"""
+	Tests for the rate limiter around OpenAI calls and for never caching errors.
+	"""
+
+	def setUp(self):
+		super().setUp()
+		self.redis = fakeredis.FakeRedis()
+		patcher = mock.patch('articles.rate_limit._redis', return_value=self.redis)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_calls_take_their_token_budget_and_settle_it_with_usage(self):
+		"""
+		Test that a completion is charged its prompt plus output cap, then refunded down to its usage.
+		"""
+		chatgpt_service.summarize_article_with_chatgpt('Budget title', 'Budget content.')
+
+		self.assertEqual(len(self.server.requests), 1)
+		# Charged over 200 tokens up front (the output cap), 15 once settled, plus what refilled meanwhile.
+		self.assertGreaterEqual(float(self.redis.hget('ratelimit:openai:tokens', 'level')), 10_000 - 15)
+
+	def test_429_blocks_every_worker_and_is_not_cached(self):
+		"""
+		Test that a throttled call returns an error summary that is not cached,
+		and holds off further calls for the provider's Retry-After.
+		"""
+		self.server.failures = [429, 429]
+		self.server.retry_after = '0.01'
+		with mock.patch.object(chatgpt_service.rate_limit.RateLimiter, 'block') as block:
+			summary, cached = chatgpt_service.get_article_summary_with_caching('Busy title', 'Busy content.')
+
+		self.assertTrue(summary.startswith('OpenAI API Error:'))
+		self.assertFalse(cached)
+		block.assert_called_once_with(0.01)
+
+		summary, cached = chatgpt_service.get_article_summary_with_caching('Busy title', 'Busy content.')
+		self.assertEqual((summary, cached), ('Summary of Busy title', False))
+
+	def test_exhausted_quota_fails_fast_without_calling_openai(self):
+		"""
+		Test that a call with no capacity in sight returns a rate-limited fallback that is not cached.
+		"""
+		limiter = rate_limit.get_limiter('openai')
+		limiter.block(60)
+
+		summary, cached = chatgpt_service.get_article_summary_with_caching('Late title', 'Late content.')
+
+		self.assertTrue(summary.startswith('Rate limited:'))
+		self.assertFalse(chatgpt_service.is_generated_summary(summary))
+		self.assertEqual(self.server.requests, [])
+		self.redis.delete(limiter.blocked_key)
+		self.assertEqual(
+			chatgpt_service.get_article_summary_with_caching('Late title', 'Late content.'),
+			('Summary of Late title', False),
+		)
@@ -1,41 +1,78 @@
-from django.test import TestCase, override_settings
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.test import SimpleTestCase, TestCase, override_settings
 from unittest import mock
 from django.utils import timezone
-from ..models import Article
-from ..services import fetch_and_store_articles
+from django.core.cache import cache
+from ..models import Article, FetchWatermark
+from ..services import ArticleService, NewsApiClient, RecentUrlIndex, fetch_and_store_articles, query_key
 import requests
 
+LOCMEM_CACHES = {
+	"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+	"summaries": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class ServicesTests(TestCase):
 	"""
 	Tests for article services.
 	"""
 
-	@mock.patch('articles.services.process_and_save_article_task')
-	@mock.patch('articles.services.requests.get')
-	def test_fetch_and_store_articles_sends_to_celery_task(self, mock_requests_get, mock_celery_task):
+	def setUp(self):
+		cache.clear()
+
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_and_store_articles_sends_one_task_per_batch(self, mock_fetch_page, mock_celery_task):
 		"""
-		Test that fetch_and_store_articles fetches articles and sends them to Celery task.
+		Test that fetch_and_store_articles sends the fetched articles to Celery in batches.
 		"""
 
-		fake_article = {
-			'url': 'https://example.com/new-1',
-			'title': 'New Article',
-			'content': 'Content here',
-			'publishedAt': '2020-01-01T12:00:00Z',
-			'source': {'name': 'Example'}
-		}
+		fake_articles = [
+			{
+				'url': f'https://example.com/new-{i}',
+				'title': f'New Article {i}',
+				'content': 'Content here',
+				'publishedAt': '2020-01-01T12:00:00Z',
+				'source': {'name': 'Example'}
+			}
+			for i in range(5)
+		]
+
+		mock_fetch_page.return_value = {'articles': fake_articles, 'totalResults': 5}
+		mock_celery_task.delay.return_value.get.side_effect = [
+			{'created': 2, 'updated': 0},
+			{'created': 1, 'updated': 1},
+			{'created': 0, 'updated': 1},
+		]
+
+		with override_settings(NEWS_API_URL='https://api.test', NEWS_API_KEY='key', NEWS_API_QUERY='q',
+							   ARTICLE_INGEST_BATCH_SIZE=2):
+			result = fetch_and_store_articles()
+
+		self.assertEqual(result, {'queued': 5, 'created': 3, 'updated': 2})
+		self.assertEqual(mock_celery_task.delay.call_count, 3)
+		self.assertEqual(mock_celery_task.delay.call_args_list[0].args[0], fake_articles[:2])
 
-		fake_response = mock.Mock()
-		fake_response.raise_for_status = mock.Mock()
-		fake_response.json.return_value = {'articles': [fake_article, fake_article]}
-		mock_requests_get.return_value = fake_response
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_and_store_articles_without_waiting(self, mock_fetch_page, mock_celery_task):
+		"""
+		Test that fetch_and_store_articles does not block on the workers when wait=False.
+		"""
+		mock_fetch_page.return_value = {'articles': [{'url': 'https://example.com/a'}], 'totalResults': 1}
 
 		with override_settings(NEWS_API_URL='https://api.test', NEWS_API_KEY='key', NEWS_API_QUERY='q'):
-			saved = fetch_and_store_articles()
+			result = fetch_and_store_articles(wait=False)
 
-		self.assertEqual(saved, 2)
-		mock_celery_task.delay.assert_called()
-		self.assertEqual(mock_celery_task.delay.call_count, 2)
+		self.assertEqual(result, {'queued': 1, 'created': None, 'updated': None})
+		mock_celery_task.delay.return_value.get.assert_not_called()
 
 	def test_fetch_and_store_articles_handles_request_exception(self):
 		"""
@@ -43,7 +80,419 @@ class ServicesTests(TestCase):
 		"""
 
 		with override_settings(NEWS_API_URL='https://api.test', NEWS_API_KEY='key', NEWS_API_QUERY='q'):
-			with mock.patch('articles.services.requests.get', side_effect=requests.exceptions.RequestException("fail")):
+			with mock.patch('articles.services.NewsApiClient.fetch_page', side_effect=requests.exceptions.RequestException("fail")):
 				result = fetch_and_store_articles()
 
-		self.assertEqual(result, 0)
\ No newline at end of file
+		self.assertEqual(result, {'queued': 0, 'created': 0, 'updated': 0})
+
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_and_store_articles_skips_articles_seen_in_another_query(self, mock_fetch_page, mock_celery_task):
+		"""
+		Test that an article returned by several queries is only queued once.
+		"""
+		shared = {'url': 'https://example.com/shared', 'title': 'Shared'}
+		mock_fetch_page.side_effect = lambda query, page, since=None: {
+			'articles': [shared, {'url': f"https://example.com/{query['q']}", 'title': query['q']}],
+			'totalResults': 2,
+		}
+
+		with override_settings(NEWS_API_QUERIES=['one', 'two'], NEWS_API_MAX_WORKERS=1):
+			result = fetch_and_store_articles(wait=False)
+
+		self.assertEqual(result['queued'], 3)
+		queued_urls = [a['url'] for call in mock_celery_task.delay.call_args_list for a in call.args[0]]
+		self.assertEqual(queued_urls.count('https://example.com/shared'), 1)
+
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_and_store_articles_skips_recently_ingested_urls(self, mock_fetch_page, mock_celery_task):
+		"""
+		Test that URLs already in the recent URL index never reach the Celery queue.
+		"""
+		RecentUrlIndex().add(['https://example.com/known'])
+		mock_fetch_page.return_value = {
+			'articles': [{'url': 'https://example.com/known'}, {'url': 'https://example.com/fresh'}],
+			'totalResults': 2,
+		}
+
+		result = fetch_and_store_articles(wait=False)
+
+		self.assertEqual(result['queued'], 1)
+		self.assertEqual(mock_celery_task.delay.call_args.args[0], [{'url': 'https://example.com/fresh'}])
+
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_and_store_articles_resumes_from_watermark(self, mock_fetch_page, mock_celery_task):
+		"""
+		Test that a run stores the newest publishedAt per query and the next run requests only newer articles.
+		"""
+		mock_fetch_page.return_value = {
+			'articles': [
+				{'url': 'https://example.com/b', 'publishedAt': '2024-01-02T08:00:00Z'},
+				{'url': 'https://example.com/a', 'publishedAt': '2024-01-01T08:00:00Z'},
+			],
+			'totalResults': 2,
+		}
+
+		mock_celery_task.delay.return_value.get.return_value = {'created': 2, 'updated': 0}
+
+		with override_settings(NEWS_API_QUERIES=['tech']):
+			fetch_and_store_articles()
+			watermark = FetchWatermark.objects.get(query_key=query_key({'q': 'tech'}))
+			self.assertEqual(watermark.last_published_date, datetime(2024, 1, 2, 8, tzinfo=dt_timezone.utc))
+
+			fetch_and_store_articles()
+
+		self.assertEqual(mock_fetch_page.call_args_list[0].kwargs['since'], None)
+		self.assertEqual(mock_fetch_page.call_args_list[1].kwargs['since'], watermark.last_published_date)
+
+	@mock.patch('articles.services.advance_watermarks_task')
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_fetch_without_waiting_defers_watermarks_until_saved(
+		self, mock_fetch_page, mock_celery_task, mock_advance_task
+	):
+		"""
+		Test that wait=False leaves the watermarks to a task that first checks the batches were saved.
+		"""
+		mock_fetch_page.return_value = {
+			'articles': [{'url': 'https://example.com/a', 'publishedAt': '2024-01-02T08:00:00Z'}],
+			'totalResults': 1,
+		}
+		mock_celery_task.delay.return_value.id = 'save-task'
+
+		with override_settings(NEWS_API_QUERIES=['tech']):
+			fetch_and_store_articles(wait=False)
+
+		self.assertFalse(FetchWatermark.objects.exists())
+		queries, new_watermarks, batches, _ = mock_advance_task.delay.call_args.args
+		self.assertEqual(queries, [{'q': 'tech'}])
+		self.assertEqual(new_watermarks, {query_key({'q': 'tech'}): '2024-01-02T08:00:00+00:00'})
+		self.assertEqual(batches, [('save-task', [query_key({'q': 'tech'})])])
+
+	@mock.patch('articles.services.advance_watermarks_task')
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_batch_that_fails_to_queue_holds_back_its_queries_watermarks(
+		self, mock_fetch_page, mock_celery_task, mock_advance_task
+	):
+		"""
+		Test that a broker error keeps the watermark of every query that returned an unqueued article.
+		"""
+		mock_fetch_page.side_effect = lambda query, page, since=None: {
+			'articles': [{'url': f"https://example.com/{query['q']}", 'publishedAt': '2024-01-02T08:00:00Z'}],
+			'totalResults': 1,
+		}
+
+		def delay(batch):
+			if batch[0]['url'].endswith('/down'):
+				raise ConnectionError('broker down')
+			return mock.Mock()
+		mock_celery_task.delay.side_effect = delay
+
+		with override_settings(NEWS_API_QUERIES=['down', 'up'], NEWS_API_MAX_WORKERS=1):
+			result = fetch_and_store_articles(wait=False)
+
+		self.assertEqual(result['queued'], 1)
+		self.assertEqual(list(mock_advance_task.delay.call_args.args[1]), [query_key({'q': 'up'})])
+
+	@mock.patch('articles.services.save_articles_batch_task')
+	@mock.patch('articles.services.NewsApiClient.fetch_page')
+	def test_batch_that_fails_to_save_holds_back_the_watermark(self, mock_fetch_page, mock_celery_task):
+		"""
+		Test that when waiting, a batch whose task failed keeps the watermark where it was.
+		"""
+		mock_fetch_page.return_value = {
+			'articles': [{'url': 'https://example.com/a', 'publishedAt': '2024-01-02T08:00:00Z'}],
+			'totalResults': 1,
+		}
+		mock_celery_task.delay.return_value.get.side_effect = RuntimeError('database down')
+
+		with override_settings(NEWS_API_QUERIES=['tech']):
+			result = fetch_and_store_articles(wait=True)
+
+		self.assertEqual(result, {'queued': 1, 'created': 0, 'updated': 0})
+		self.assertFalse(FetchWatermark.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ArticleServiceTests(TestCase):
+	"""
+	Tests for the bulk article upsert.
+	"""
+
+	def setUp(self):
+		cache.clear()
+
+	def _article(self, url, title='Some Article', published_at='2020-01-01T12:00:00Z'):
+		return {
+			'url': url,
+			'title': title,
+			'content': 'Content here',
+			'publishedAt': published_at,
+			'source': {'name': 'Example'}
+		}
+
+	def test_save_articles_reports_created_and_updated(self):
+		"""
+		Test that save_articles inserts new URLs and updates existing ones in one batch.
+		"""
+		Article.objects.create(
+			title='Old title',
+			content='Old content',
+			url='https://example.com/existing',
+			published_date=timezone.now(),
+			source='Old'
+		)
+
+		created_ids, updated_ids = ArticleService().save_articles([
+			self._article('https://example.com/existing', title='New title'),
+			self._article('https://example.com/fresh'),
+		])
+
+		self.assertEqual(created_ids, [Article.objects.get(url='https://example.com/fresh').pk])
+		self.assertEqual(updated_ids, [Article.objects.get(url='https://example.com/existing').pk])
+		self.assertEqual(Article.objects.count(), 2)
+		existing = Article.objects.get(url='https://example.com/existing')
+		self.assertEqual(existing.title, 'New title')
+		self.assertEqual(existing.source, 'Example')
+
+	def test_save_articles_collapses_duplicates_and_skips_malformed(self):
+		"""
+		Test that repeated URLs in one batch are written once and unusable articles are skipped.
+		"""
+		created_ids, updated_ids = ArticleService().save_articles([
+			self._article('https://example.com/dup', title='First'),
+			self._article('https://example.com/dup', title='Second'),
+			self._article('https://example.com/no-date', published_at=None),
+			{'title': 'No URL at all'},
+		])
+
+		self.assertEqual((len(created_ids), len(updated_ids)), (1, 0))
+		self.assertEqual(Article.objects.get().title, 'Second')
+
+	def test_save_articles_records_urls_in_recent_index(self):
+		"""
+		Test that stored URLs are added to the recent URL index.
+		"""
+		ArticleService().save_articles([self._article('https://example.com/stored')])
+
+		new_urls = RecentUrlIndex().filter_new(['https://example.com/stored', 'https://example.com/other'])
+
+		self.assertEqual(new_urls, {'https://example.com/other'})
+
+
+STUB_NEWEST = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class StubNewsApiHandler(BaseHTTPRequestHandler):
+	"""
+	Serves fake NewsAPI pages. Behaviour is driven by the server attributes:
+	`total_results`, `delay` and `failures` (status codes returned before succeeding).
+	"""
+
+	def do_GET(self):
+		params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+		server = self.server
+		with server.lock:
+			server.requests.append(params)
+			status = server.failures.pop(0) if server.failures else 200
+		time.sleep(server.delay)
+
+		if status != 200:
+			body = {'status': 'error'}
+		else:
+			page, page_size = int(params['page']), int(params['pageSize'])
+			first = (page - 1) * page_size
+			last = min(first + page_size, server.total_results)
+			body = {
+				'status': 'ok',
+				'totalResults': server.total_results,
+				'articles': [
+					{
+						'url': f"https://example.com/{params.get('q')}/{i}",
+						'title': f'Article {i}',
+						'publishedAt': (STUB_NEWEST - timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+					}
+					for i in range(first, last)
+				],
+			}
+
+		payload = json.dumps(body).encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(payload)))
+		self.end_headers()
+		self.wfile.write(payload)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class NewsApiClientTests(SimpleTestCase):
+	"""
+	Tests for NewsApiClient against a local stub NewsAPI server.
+	"""
+
+	def setUp(self):
+		self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubNewsApiHandler)
+		self.server.lock = threading.Lock()
+		self.server.requests = []
+		self.server.failures = []
+		self.server.total_results = 0
+		self.server.delay = 0
+		threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+		self.addCleanup(self.server.server_close)
+		self.addCleanup(self.server.shutdown)
+
+		settings_override = override_settings(
+			NEWS_API_URL=f'http://127.0.0.1:{self.server.server_address[1]}/v2/everything',
+			NEWS_API_KEY='key',
+			NEWS_API_PAGE_SIZE=10,
+			NEWS_API_MAX_PAGES=5,
+			NEWS_API_MAX_WORKERS=4,
+			NEWS_API_BACKOFF_FACTOR=0,
+		)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+	def test_fetch_articles_walks_all_pages(self):
+		"""
+		Test that the client keeps requesting pages until totalResults is exhausted.
+		"""
+		self.server.total_results = 25
+
+		articles = NewsApiClient(queries=['tech']).fetch_articles()
+
+		self.assertEqual(len(articles), 25)
+		self.assertEqual([r['page'] for r in self.server.requests], ['1', '2', '3'])
+		self.assertTrue(all(r['pageSize'] == '10' and r['q'] == 'tech' for r in self.server.requests))
+
+	def test_fetch_articles_stops_at_max_pages(self):
+		"""
+		Test that the client never requests more than NEWS_API_MAX_PAGES pages per query.
+		"""
+		self.server.total_results = 1000
+
+		with override_settings(NEWS_API_MAX_PAGES=2):
+			client = NewsApiClient(queries=['tech'])
+			articles = client.fetch_articles()
+
+		self.assertEqual(len(articles), 20)
+		# A first walk leaves no gap behind it, so it still records the newest article.
+		self.assertEqual(client.new_watermarks, {query_key({'q': 'tech'}): STUB_NEWEST})
+
+	def test_first_walk_past_the_result_cap_records_its_watermark(self):
+		"""
+		Test that a query with far more results than the walk can reach, ending in NewsAPI refusing
+		later pages, still gets a watermark on its first run.
+		"""
+		self.server.total_results = 10000
+		self.server.failures = [200, 200, 426]
+
+		client = NewsApiClient(queries=['tech'])
+		articles = client.fetch_articles()
+
+		self.assertEqual(len(articles), 20)
+		self.assertEqual(client.new_watermarks, {query_key({'q': 'tech'}): STUB_NEWEST})
+
+	def test_capped_walk_keeps_an_existing_watermark(self):
+		"""
+		Test that running into NEWS_API_MAX_PAGES before an existing watermark records nothing,
+		so the next run fetches the articles in between.
+		"""
+		self.server.total_results = 1000
+		watermark = STUB_NEWEST - timedelta(minutes=500)
+
+		with override_settings(NEWS_API_MAX_PAGES=2):
+			client = NewsApiClient(queries=['tech'], watermarks={query_key({'q': 'tech'}): watermark})
+			articles = client.fetch_articles()
+
+		self.assertEqual(len(articles), 20)
+		self.assertEqual(client.new_watermarks, {})
+
+	def test_queries_run_concurrently(self):
+		"""
+		Test that wall-clock time follows the slowest query rather than the sum of all queries.
+		"""
+		self.server.total_results = 5
+		self.server.delay = 0.3
+
+		started = time.monotonic()
+		articles = NewsApiClient(queries=['a', 'b', 'c', {'q': 'd', 'sources': 'bbc-news'}]).fetch_articles()
+		elapsed = time.monotonic() - started
+
+		self.assertEqual(len(articles), 20)
+		self.assertLess(elapsed, 0.9)
+		self.assertIn('bbc-news', [r.get('sources') for r in self.server.requests])
+
+	def test_retries_on_rate_limit_and_server_errors(self):
+		"""
+		Test that 429 and 5xx responses are retried before giving up.
+		"""
+		self.server.total_results = 3
+		self.server.failures = [429, 503]
+
+		articles = NewsApiClient(queries=['tech']).fetch_articles()
+
+		self.assertEqual(len(articles), 3)
+		self.assertEqual(len(self.server.requests), 3)
+
+	def test_failed_query_does_not_stop_the_others(self):
+		"""
+		Test that a query failing after all retries only drops that query's pages.
+		"""
+		self.server.total_results = 3
+		self.server.failures = [400]
+
+		with override_settings(NEWS_API_MAX_WORKERS=1):
+			articles = NewsApiClient(queries=['bad', 'good']).fetch_articles()
+
+		self.assertEqual([a['url'] for a in articles], [f'https://example.com/good/{i}' for i in range(3)])
+
+	def test_iter_pages_yields_before_all_queries_finish(self):
+		"""
+		Test that the first page is available while other pages are still being fetched.
+		"""
+		self.server.total_results = 30
+		self.server.delay = 0.2
+
+		started = time.monotonic()
+		pages = NewsApiClient(queries=['tech']).iter_pages()
+		first_page = next(pages)
+		first_page_at = time.monotonic() - started
+		rest = list(pages)
+
+		self.assertEqual(len(first_page), 10)
+		self.assertEqual(len(rest), 2)
+		self.assertLess(first_page_at, 0.4)
+
+	def test_stops_paginating_at_watermark(self):
+		"""
+		Test that the client sends `from` and stops at the first article not newer than the watermark.
+		"""
+		self.server.total_results = 30
+		watermark = STUB_NEWEST - timedelta(minutes=14)
+
+		client = NewsApiClient(queries=['tech'], watermarks={query_key({'q': 'tech'}): watermark})
+		articles = client.fetch_articles()
+
+		self.assertEqual(len(articles), 14)
+		self.assertEqual(len(self.server.requests), 2)
+		self.assertEqual(self.server.requests[0]['from'], '2024-01-01T11:46:00')
+		self.assertEqual(client.new_watermarks, {query_key({'q': 'tech'}): STUB_NEWEST})
+
+	def test_failed_walk_does_not_advance_watermark(self):
+		"""
+		Test that a query that errors part-way leaves its watermark untouched.
+		"""
+		self.server.total_results = 30
+		self.server.failures = [200, 400]
+		watermark = STUB_NEWEST - timedelta(minutes=25)
+
+		client = NewsApiClient(queries=['tech'], watermarks={query_key({'q': 'tech'}): watermark})
+		articles = client.fetch_articles()
+
+		self.assertEqual(len(articles), 10)
+		self.assertEqual(client.new_watermarks, {})
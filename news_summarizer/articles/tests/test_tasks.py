@@ -0,0 +1,288 @@
+import time
+from unittest import mock
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from articles import chatgpt_service
+from articles.models import Article, FetchWatermark
+from articles.services import query_key
+from articles.tasks import (
+	FETCH_LOCK_KEY, advance_watermarks_task, fetch_articles_task, save_articles_batch_task, summarize_articles_task,
+	summary_outcome_key, summary_queued_key,
+)
+from articles.tests.test_chatgpt_service import use_private_summary_caches
+from articles.tests.test_services import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TasksTests(TestCase):
+	"""
+	Tests for the article Celery tasks.
+	"""
+
+	def setUp(self):
+		cache.clear()
+
+	def _article(self, url):
+		return {
+			'url': url,
+			'title': 'Some Article',
+			'content': 'Content here',
+			'publishedAt': '2020-01-01T12:00:00Z',
+			'source': {'name': 'Example'}
+		}
+
+	@mock.patch('articles.tasks.summarize_articles_task')
+	def test_save_batch_queues_presummarization_of_created_articles(self, mock_summarize_task):
+		"""
+		Test that only newly created articles are sent for pre-summarization.
+		"""
+		existing = Article.objects.create(
+			title='Old title',
+			content='Old content',
+			url='https://example.com/existing',
+			published_date=timezone.now(),
+			source='Old'
+		)
+
+		with override_settings(SUMMARY_PRESUMMARIZE_ON_INGEST=True):
+			counts = save_articles_batch_task([
+				self._article('https://example.com/existing'),
+				self._article('https://example.com/fresh'),
+			])
+
+		self.assertEqual(counts, {'created': 1, 'updated': 1})
+		created = Article.objects.exclude(pk=existing.pk).get()
+		mock_summarize_task.delay.assert_called_once_with([created.pk])
+
+	@mock.patch('articles.tasks.summarize_articles_task')
+	def test_save_batch_skips_presummarization_when_disabled(self, mock_summarize_task):
+		"""
+		Test that the pre-summarization task is not queued when the setting is off.
+		"""
+		with override_settings(SUMMARY_PRESUMMARIZE_ON_INGEST=False):
+			save_articles_batch_task([self._article('https://example.com/fresh')])
+
+		mock_summarize_task.delay.assert_not_called()
+
+	def test_summarize_articles_task_summarizes_in_one_batch(self):
+		"""
+		Test that the task passes all requested articles to summarize_articles_with_status at once.
+		"""
+		article = Article.objects.create(
+			title='Batch title',
+			content='Batch content',
+			url='https://example.com/batch',
+			published_date=timezone.now(),
+			source='Example'
+		)
+
+		with mock.patch(
+			'articles.tasks.summarize_articles_with_status',
+			return_value=[('Summary', False, True)]
+		) as mock_summarize:
+			generated = summarize_articles_task([article.pk])
+
+		mock_summarize.assert_called_once_with(
+			[('Batch title', 'Batch content')], article_ids=[article.pk], fingerprints=[article.fingerprint]
+		)
+		self.assertEqual(generated, 1)
+
+	def test_summarize_task_skips_articles_claimed_by_another_task(self):
+		"""
+		Test that a duplicate task leaves articles another task is summarizing alone,
+		while a redelivery of the claiming task still summarizes them.
+		"""
+		claimed, free = [
+			Article.objects.create(
+				title=f'Claim {i}', content=f'Claim content {i}', url=f'https://example.com/claim/{i}',
+				published_date=timezone.now(), source='Example'
+			)
+			for i in range(2)
+		]
+		use_private_summary_caches(self)
+		chatgpt_service.claim_summaries([claimed.fingerprint], 'first-task')
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', return_value=[('Summary', False, True)]) as mock_summarize:
+			summarize_articles_task.apply(args=([claimed.pk, free.pk],), task_id='second-task')
+		mock_summarize.assert_called_once_with(
+			[(free.title, free.content)], article_ids=[free.pk], fingerprints=[free.fingerprint]
+		)
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', return_value=[('Summary', False, True)]) as mock_summarize:
+			summarize_articles_task.apply(args=([claimed.pk],), task_id='first-task')
+		mock_summarize.assert_called_once_with(
+			[(claimed.title, claimed.content)], article_ids=[claimed.pk], fingerprints=[claimed.fingerprint]
+		)
+
+	def test_failed_summarize_task_releases_its_claims(self):
+		"""
+		Test that a task that fails lets the next task summarize its articles.
+		"""
+		article = Article.objects.create(
+			title='Failing', content='Failing content', url='https://example.com/failing',
+			published_date=timezone.now(), source='Example'
+		)
+		use_private_summary_caches(self)
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', side_effect=RuntimeError('boom')):
+			result = summarize_articles_task.apply(args=([article.pk],), task_id='failing-task')
+
+		self.assertTrue(result.failed())
+		self.assertEqual(chatgpt_service.claim_summaries([article.fingerprint], 'next-task'), [article.fingerprint])
+
+	def test_summarize_task_releases_claims_of_summaries_it_could_not_store(self):
+		"""
+		Test that articles that only got a fallback (rate limited, circuit open) can be claimed again
+		at once, while stored summaries keep their claim.
+		"""
+		stored, fallback = [
+			Article.objects.create(
+				title=f'Outcome {i}', content=f'Outcome content {i}', url=f'https://example.com/outcome/{i}',
+				published_date=timezone.now(), source='Example'
+			)
+			for i in range(2)
+		]
+		use_private_summary_caches(self)
+
+		def summarize(articles, article_ids, fingerprints):
+			return [
+				('Summary', False, True) if pk == stored.pk else ('Rate limited: no capacity', False, False)
+				for pk in article_ids
+			]
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', side_effect=summarize):
+			summarize_articles_task.apply(args=([stored.pk, fallback.pk],), task_id='partial-task')
+
+		self.assertEqual(
+			chatgpt_service.claim_summaries([stored.fingerprint, fallback.fingerprint], 'next-task'),
+			[fallback.fingerprint]
+		)
+
+	def test_summarize_task_records_outcomes_it_could_not_store(self):
+		"""
+		Test that a fallback or a failure is left for respond-async polls and the queued marker is
+		cleared, while a stored summary leaves no outcome.
+		"""
+		stored, fallback = [
+			Article.objects.create(
+				title=f'Polled {i}', content=f'Polled content {i}', url=f'https://example.com/polled/{i}',
+				published_date=timezone.now(), source='Example'
+			)
+			for i in range(2)
+		]
+		use_private_summary_caches(self)
+		cache.set(summary_queued_key(fallback.pk), True)
+
+		def summarize(articles, article_ids, fingerprints):
+			return [
+				('Summary', False, True) if pk == stored.pk else ('Rate limited: no capacity', False, False)
+				for pk in article_ids
+			]
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', side_effect=summarize):
+			summarize_articles_task.apply(args=([stored.pk, fallback.pk],), task_id='polled-task')
+
+		self.assertIsNone(cache.get(summary_outcome_key(stored.pk)))
+		self.assertEqual(cache.get(summary_outcome_key(fallback.pk)), {'summary': 'Rate limited: no capacity'})
+		self.assertIsNone(cache.get(summary_queued_key(fallback.pk)))
+
+		with mock.patch('articles.tasks.summarize_articles_with_status', side_effect=RuntimeError('boom')):
+			summarize_articles_task.apply(args=([fallback.pk],), task_id='failing-polled-task')
+
+		self.assertEqual(cache.get(summary_outcome_key(fallback.pk)), {'summary': None})
+
+	def test_summarize_task_is_late_acked_and_routed_to_its_queue(self):
+		"""
+		Test the delivery options that make redelivered summarize tasks safe.
+		"""
+		self.assertTrue(summarize_articles_task.acks_late)
+		self.assertTrue(summarize_articles_task.reject_on_worker_lost)
+		self.assertEqual(
+			settings.CELERY_TASK_ROUTES[summarize_articles_task.name], {'queue': 'summarize'}
+		)
+		self.assertEqual(
+			settings.CELERY_TASK_ROUTES[save_articles_batch_task.name], {'queue': 'ingest'}
+		)
+
+	def _advance_watermarks(self, states, deadline):
+		"""
+		Run advance_watermarks_task for the queries 'up' and 'down', whose batch results are in `states`.
+		"""
+		results = {
+			task_id: mock.Mock(**{
+				'ready.return_value': state != 'PENDING', 'successful.return_value': state == 'SUCCESS',
+			})
+			for task_id, state in states.items()
+		}
+		up, down = query_key({'q': 'up'}), query_key({'q': 'down'})
+		with mock.patch.object(save_articles_batch_task, 'AsyncResult', side_effect=results.get):
+			return advance_watermarks_task.apply(args=(
+				[{'q': 'up'}, {'q': 'down'}],
+				{up: '2024-01-02T08:00:00+00:00', down: '2024-01-02T09:00:00+00:00'},
+				[('up-batch', [up]), ('down-batch', [down])],
+				deadline,
+			))
+
+	def test_advance_watermarks_task_holds_back_queries_with_failed_batches(self):
+		"""
+		Test that once every batch finished, only the queries whose batches all saved advance.
+		"""
+		self._advance_watermarks({'up-batch': 'SUCCESS', 'down-batch': 'FAILURE'}, time.time() + 60)
+
+		self.assertEqual(
+			list(FetchWatermark.objects.values_list('query_key', flat=True)), [query_key({'q': 'up'})]
+		)
+
+	def test_advance_watermarks_task_waits_for_pending_batches(self):
+		"""
+		Test that the task retries while a batch is pending, and gives up on it after the deadline.
+		"""
+		with mock.patch.object(advance_watermarks_task, 'retry', side_effect=Retry()) as retry:
+			self._advance_watermarks({'up-batch': 'SUCCESS', 'down-batch': 'PENDING'}, time.time() + 60)
+
+		retry.assert_called_once_with(countdown=settings.ARTICLE_INGEST_WATERMARK_POLL_INTERVAL)
+		self.assertFalse(FetchWatermark.objects.exists())
+
+		self._advance_watermarks({'up-batch': 'SUCCESS', 'down-batch': 'PENDING'}, time.time() - 1)
+
+		self.assertEqual(
+			list(FetchWatermark.objects.values_list('query_key', flat=True)), [query_key({'q': 'up'})]
+		)
+
+	def test_fetch_task_queues_without_waiting(self):
+		"""
+		Test that the scheduled fetch does not block on the batches it queues.
+		"""
+		with mock.patch(
+			'articles.services.fetch_and_store_articles',
+			return_value={'queued': 3, 'created': None, 'updated': None}
+		) as mock_fetch:
+			result = fetch_articles_task()
+
+		mock_fetch.assert_called_once_with(wait=False)
+		self.assertEqual(result['queued'], 3)
+		self.assertIsNone(cache.get(FETCH_LOCK_KEY))
+
+	def test_fetch_task_skips_while_another_fetch_runs(self):
+		"""
+		Test that overlapping scheduled fetches do not run twice.
+		"""
+		cache.add(FETCH_LOCK_KEY, True)
+
+		with mock.patch('articles.services.fetch_and_store_articles') as mock_fetch:
+			self.assertIsNone(fetch_articles_task())
+
+		mock_fetch.assert_not_called()
+
+	def test_fetch_task_is_scheduled_by_beat(self):
+		"""
+		Test that Celery Beat runs the incremental fetch every NEWS_API_FETCH_INTERVAL seconds.
+		"""
+		entry = settings.CELERY_BEAT_SCHEDULE['fetch-articles']
+
+		self.assertEqual(entry['task'], fetch_articles_task.name)
+		self.assertEqual(entry['schedule'], settings.NEWS_API_FETCH_INTERVAL)
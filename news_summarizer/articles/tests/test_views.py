@@ -1,12 +1,18 @@
 from unittest import mock
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from articles.models import Article
+from articles.tests.test_services import LOCMEM_CACHES
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class ArticleViewsTest(TestCase):
     """
     Tests for article-related views.
     """
+    def setUp(self):
+        cache.clear()
+
     def test_article_summary_view_returns_summary_and_cached_flag(self):
         """
         Test that the article summary view returns the summary and cached flag.
@@ -22,9 +28,8 @@ class ArticleViewsTest(TestCase):
             source="Example"
         )
 
-        # Patch the function imported in the views module
         with mock.patch(
-            "articles.views.get_article_summary_with_caching",
+            "articles.chatgpt_service.aget_article_summary_with_caching",
             return_value=("View summary", True)
         ):
             client = self.client
@@ -33,4 +38,614 @@ class ArticleViewsTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
         self.assertEqual(data.get("summary"), "View summary")
-        self.assertTrue(data.get("cached"))
\ No newline at end of file
+        self.assertTrue(data.get("cached"))
+
+    def test_article_summary_view_accepts_and_queues_when_client_prefers_async(self):
+        """
+        Test that `Prefer: respond-async` gets 202 and one queued task until the summary is stored.
+        """
+        from django.utils import timezone
+
+        article = Article.objects.create(
+            title="Async Test",
+            content="Some content for the async test",
+            url="https://example.com/async",
+            published_date=timezone.now(),
+            source="Example"
+        )
+        url = f"/articles/{article.pk}/summary"
+
+        with mock.patch("articles.chatgpt_service.get_stored_summary", return_value=None), \
+                mock.patch("articles.views.summarize_articles_task") as task:
+            first = self.client.get(url, headers={"Prefer": "respond-async"})
+            second = self.client.get(url, headers={"Prefer": "respond-async"})
+
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        self.assertTrue(first["Location"].endswith(url))
+        self.assertEqual(first.json()["status"], "pending")
+        task.apply_async.assert_called_once_with(([article.pk],), {'interactive': True}, priority=0)
+
+        with mock.patch("articles.chatgpt_service.get_stored_summary", return_value="Ready summary"):
+            done = self.client.get(url, headers={"Prefer": "respond-async"})
+
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(done.json(), {"summary": "Ready summary", "cached": True})
+
+    def test_article_summary_async_poll_ends_with_the_task_outcome(self):
+        """
+        Test that once the task could only produce a fallback, or failed, `Prefer: respond-async`
+        polls get that fallback or 503 instead of 202, and queue a new task once the outcome expires.
+        """
+        from django.utils import timezone
+        from articles.tasks import summary_outcome_key
+
+        article = Article.objects.create(
+            title="Outcome Test",
+            content="Some content for the outcome test",
+            url="https://example.com/outcome",
+            published_date=timezone.now(),
+            source="Example"
+        )
+        url = f"/articles/{article.pk}/summary"
+        fallback = "**Extractive Summary:** Some content for the outcome test"
+
+        with mock.patch("articles.chatgpt_service.get_stored_summary", return_value=None), \
+                mock.patch("articles.views.summarize_articles_task") as task:
+            cache.set(summary_outcome_key(article.pk), {"summary": fallback})
+            degraded = self.client.get(url, headers={"Prefer": "respond-async"})
+            cache.set(summary_outcome_key(article.pk), {"summary": None})
+            failed = self.client.get(url, headers={"Prefer": "respond-async"})
+            cache.delete(summary_outcome_key(article.pk))
+            retried = self.client.get(url, headers={"Prefer": "respond-async"})
+
+        self.assertEqual(degraded.status_code, 200)
+        self.assertEqual(degraded.json(), {"summary": fallback, "cached": False})
+        self.assertEqual(degraded["Cache-Control"], "no-store")
+        self.assertEqual(failed.status_code, 503)
+        self.assertIn("Retry-After", failed)
+        self.assertEqual(retried.status_code, 202)
+        task.apply_async.assert_called_once()
+
+    def test_article_summary_view_returns_404_for_unknown_article(self):
+        """
+        Test that the async summary view answers 404 in JSON for a missing article.
+        """
+        resp = self.client.get("/articles/999999/summary")
+
+        self.assertEqual(resp.status_code, 404)
+        self.assertIn("detail", resp.json())
+
+    async def test_article_summary_stream_sends_deltas_then_done(self):
+        """
+        Test that the stream view relays summary chunks as SSE messages and ends with a done event.
+        """
+        from asgiref.sync import sync_to_async
+        from django.utils import timezone
+
+        article = await sync_to_async(Article.objects.create)(
+            title="Stream Test",
+            content="Some content for the stream test",
+            url="https://example.com/stream",
+            published_date=timezone.now(),
+            source="Example"
+        )
+
+        async def fake_stream(title, content, article_id=None, fingerprint=None):
+            for chunk in ("Streamed", " summary"):
+                yield chunk, False, None
+
+        with mock.patch("articles.chatgpt_service.astream_article_summary", fake_stream):
+            resp = await self.async_client.get(f"/articles/{article.pk}/summary/stream")
+            body = b"".join([chunk async for chunk in resp.streaming_content]).decode()
+
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertEqual(body, (
+            'data: {"delta": "Streamed"}\n\n'
+            'data: {"delta": " summary"}\n\n'
+            'event: done\ndata: {"cached": false, "error": null}\n\n'
+        ))
+
+    async def test_article_summary_stream_reports_a_failure_in_the_done_event(self):
+        """
+        Test that a stream failing partway ends with a done event carrying its error.
+        """
+        from asgiref.sync import sync_to_async
+        from django.utils import timezone
+
+        article = await sync_to_async(Article.objects.create)(
+            title="Broken Stream",
+            content="Some content for the broken stream test",
+            url="https://example.com/broken-stream",
+            published_date=timezone.now(),
+            source="Example"
+        )
+
+        async def fake_stream(title, content, article_id=None, fingerprint=None):
+            yield "Partial", False, None
+            yield "OpenAI API Error: Connection error.", False, "APIConnectionError: Connection error."
+
+        with mock.patch("articles.chatgpt_service.astream_article_summary", fake_stream):
+            resp = await self.async_client.get(f"/articles/{article.pk}/summary/stream")
+            body = b"".join([chunk async for chunk in resp.streaming_content]).decode()
+
+        self.assertTrue(body.endswith(
+            'event: done\ndata: {"cached": false, "error": "APIConnectionError: Connection error."}\n\n'
+        ))
+
+    def test_bulk_summaries_resolve_many_articles_in_one_round_trip(self):
+        """
+        Test that cached summaries cost one query in total and only misses reach ChatGPT.
+        """
+        from django.utils import timezone
+        from articles import chatgpt_service
+        from articles.tests.test_chatgpt_service import use_private_summary_caches
+
+        summary_cache = use_private_summary_caches(self)
+        articles = [
+            Article.objects.create(
+                title=f"Bulk Test {i}",
+                content=f"Some content for bulk test {i}",
+                url=f"https://example.com/bulk-{i}",
+                published_date=timezone.now(),
+                source="Example"
+            )
+            for i in range(3)
+        ]
+        for article in articles[:2]:
+            summary_cache.set(
+                chatgpt_service._generate_cache_key(article.fingerprint), f"Cached {article.title}"
+            )
+
+        ids = [article.pk for article in articles[:2]]
+        with self.assertNumQueries(1):
+            data = self.client.get("/articles/summaries", {"ids": ",".join(map(str, ids))}).json()
+        self.assertEqual(data["results"], [
+            {"id": article.pk, "summary": f"Cached {article.title}", "cached": True} for article in articles[:2]
+        ])
+
+        with mock.patch.object(
+            chatgpt_service, "generate_summary", return_value=("Fresh summary", True)
+        ) as summarize:
+            data = self.client.post(
+                "/articles/summaries", {"ids": [articles[2].pk, articles[0].pk, 999999]}, content_type="application/json"
+            ).json()
+
+        summarize.assert_called_once_with(articles[2].title, articles[2].content)
+        self.assertEqual(data["results"], [
+            {"id": articles[2].pk, "summary": "Fresh summary", "cached": False},
+            {"id": articles[0].pk, "summary": "Cached Bulk Test 0", "cached": True},
+        ])
+        self.assertEqual(data["missing"], [999999])
+
+    def test_bulk_summaries_validate_ids(self):
+        """
+        Test that missing, malformed or too many ids are rejected.
+        """
+        self.assertEqual(self.client.get("/articles/summaries").status_code, 400)
+        self.assertEqual(self.client.get("/articles/summaries", {"ids": "1,abc"}).status_code, 400)
+        too_many = {"ids": list(range(1, 102))}
+        self.assertEqual(
+            self.client.post("/articles/summaries", too_many, content_type="application/json").status_code, 400
+        )
+
+    def test_article_list_includes_stored_summaries_in_one_query(self):
+        """
+        Test that ?include=summary joins stored summaries without extra queries per article.
+        """
+        from django.conf import settings
+        from django.utils import timezone
+        from articles import chatgpt_service
+        from articles.models import Summary
+
+        articles = [
+            Article.objects.create(
+                title=f"List Test {i}",
+                content=f"Some content for list test {i}",
+                url=f"https://example.com/list-{i}",
+                published_date=timezone.now(),
+                source="Example"
+            )
+            for i in range(3)
+        ]
+        Summary.objects.create(
+            article=articles[0],
+            content_hash=articles[0].fingerprint,
+            model_name=settings.OPENAI_MODEL,
+            prompt_version=chatgpt_service.summary_version(),
+            text="Stored summary"
+        )
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/articles/?include=summary")
+
+        self.assertEqual(resp.status_code, 200)
+        summaries = {item["id"]: item["summary"] for item in resp.json()["results"]}
+        self.assertEqual(summaries, {articles[0].pk: "Stored summary", articles[1].pk: None, articles[2].pk: None})
+
+        plain = self.client.get("/articles/").json()["results"]
+        self.assertNotIn("summary", plain[0])
+
+    def _create_articles(self, count, published_date=None):
+        """
+        Create `count` articles, all published at `published_date` if given.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+
+        now = timezone.now()
+        return [
+            Article.objects.create(
+                title=f"Paged Article {i}",
+                content=f"Some content for paged article {i}",
+                url=f"https://example.com/paged-{i}",
+                published_date=published_date or now - timedelta(minutes=i),
+                source="Example"
+            )
+            for i in range(count)
+        ]
+
+    def test_article_list_uses_cursor_pagination_without_count(self):
+        """
+        Test that the default list walks every article once via cursors and never runs COUNT(*).
+        """
+        from django.utils import timezone
+
+        # Identical publish dates force the id tie-breaker to keep pages stable.
+        articles = self._create_articles(7, published_date=timezone.now())
+
+        seen = []
+        url = "/articles/?page_size=3"
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            self.assertNotIn("count", data)
+            seen.extend(item["id"] for item in data["results"])
+            url = data["next"]
+
+        self.assertEqual(seen, sorted((a.pk for a in articles), reverse=True))
+
+    def test_article_list_keeps_page_numbers_for_old_clients(self):
+        """
+        Test that ?page=N still returns page-number pagination with a total count.
+        """
+        self._create_articles(12)
+
+        data = self.client.get("/articles/?page=2").json()
+
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertEqual(data["results"][0]["title"], "Paged Article 10")
+
+    def test_article_search_ranks_title_matches_first(self):
+        """
+        Test that search matches stemmed terms and ranks title hits above content hits.
+        """
+        from django.utils import timezone
+
+        now = timezone.now()
+        in_content = Article.objects.create(
+            title="Weekly roundup", content="Several elections were held this week.",
+            url="https://example.com/roundup", published_date=now, source="Example"
+        )
+        in_title = Article.objects.create(
+            title="Election results announced", content="Counting finished overnight.",
+            url="https://example.com/results", published_date=now, source="Example"
+        )
+        Article.objects.create(
+            title="Weather", content="Rain all weekend.",
+            url="https://example.com/weather", published_date=now, source="Example"
+        )
+
+        response = self.client.get("/articles/search/", {"q": "election"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["id"] for item in response.json()["results"]], [in_title.pk, in_content.pk])
+
+    def test_article_search_pages_with_cursors(self):
+        """
+        Test that search results are walked once, in rank order, across cursor pages.
+        """
+        articles = self._create_articles(7)
+
+        seen = []
+        url = "/articles/search/?q=paged&page_size=3"
+        while url:
+            with self.assertNumQueries(1):
+                data = self.client.get(url).json()
+            seen.extend(item["id"] for item in data["results"])
+            url = data["next"]
+
+        self.assertEqual(sorted(seen), sorted(a.pk for a in articles))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_article_search_requires_query(self):
+        """
+        Test that a missing or blank q is rejected.
+        """
+        self.assertEqual(self.client.get("/articles/search/").status_code, 400)
+        self.assertEqual(self.client.get("/articles/search/", {"q": "  "}).status_code, 400)
+
+    def test_article_search_vector_follows_upserts(self):
+        """
+        Test that the stored search vector is refreshed when an upsert rewrites the title.
+        """
+        from articles.services import ArticleService
+
+        raw = {
+            "title": "Old headline", "description": "Body", "url": "https://example.com/upsert",
+            "publishedAt": "2024-01-01T00:00:00Z", "source": {"name": "Example"},
+        }
+        ArticleService().save_articles([raw])
+        ArticleService().save_articles([dict(raw, title="Volcano erupts")])
+
+        data = self.client.get("/articles/search/", {"q": "volcano"}).json()
+        self.assertEqual([item["url"] for item in data["results"]], ["https://example.com/upsert"])
+        self.assertEqual(self.client.get("/articles/search/", {"q": "headline"}).json()["results"], [])
+
+    def test_article_list_revalidates_with_etag(self):
+        """
+        Test that an unchanged page answers If-None-Match with 304 and a changed one with the new page.
+        """
+        articles = self._create_articles(3)
+
+        first = self.client.get("/articles/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("max-age=", first["Cache-Control"])
+        self.assertIn("Last-Modified", first)
+
+        # The page cache answers the revalidation without touching Postgres.
+        with self.assertNumQueries(0):
+            repeat = self.client.get("/articles/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat["ETag"], first["ETag"])
+        self.assertEqual(repeat.content, b"")
+
+        articles[0].title = "Rewritten headline"
+        articles[0].save()
+        changed = self.client.get("/articles/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+        from django.utils import timezone
+
+        Article.objects.create(
+            title="Breaking", content="Just in", url="https://example.com/breaking",
+            published_date=timezone.now(), source="Example"
+        )
+        self.assertEqual(self.client.get("/articles/", HTTP_IF_NONE_MATCH=changed["ETag"]).status_code, 200)
+
+    def test_article_list_etag_depends_on_the_page(self):
+        """
+        Test that pages and summary inclusion get distinct ETags.
+        """
+        self._create_articles(3)
+
+        etags = {
+            self.client.get(url)["ETag"]
+            for url in ("/articles/?page_size=2", "/articles/?page=1", "/articles/?include=summary")
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_article_detail_revalidates_with_etag_and_last_modified(self):
+        """
+        Test that the detail view honours If-None-Match and If-Modified-Since.
+        """
+        article = self._create_articles(1)[0]
+        url = f"/articles/{article.pk}/"
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_article_summary_revalidates_without_looking_up_the_summary(self):
+        """
+        Test that a matching If-None-Match gets 304 before the summary is fetched or generated.
+        """
+        article = self._create_articles(1)[0]
+        url = f"/articles/{article.pk}/summary"
+
+        with mock.patch(
+            "articles.chatgpt_service.aget_article_summary_with_caching", return_value=("Generated summary", False)
+        ) as summarize:
+            first = self.client.get(url)
+            repeat = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertTrue(first["ETag"].startswith("W/"))
+        self.assertIn("Prefer", first["Vary"])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(summarize.call_count, 1)
+
+        with mock.patch("articles.chatgpt_service.PROMPT_VERSION", "next"), mock.patch(
+            "articles.chatgpt_service.aget_article_summary_with_caching", return_value=("New prompt summary", False)
+        ):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_article_summary_fallbacks_are_not_cacheable(self):
+        """
+        Test that an extractive fallback or error summary is sent with no-store and no ETag.
+        """
+        article = self._create_articles(1)[0]
+
+        with mock.patch(
+            "articles.chatgpt_service.aget_article_summary_with_caching",
+            return_value=("**Extractive Summary:** nothing to see", False),
+        ):
+            resp = self.client.get(f"/articles/{article.pk}/summary")
+
+        self.assertEqual(resp["Cache-Control"], "no-store")
+        self.assertNotIn("ETag", resp)
+
+    def test_article_summary_backend_is_chosen_per_request(self):
+        """
+        Test that ?backend=extractive summarizes locally, with its own ETag, and never calls OpenAI.
+        """
+        from django.utils import timezone
+
+        article = Article.objects.create(
+            title="Backend Test",
+            content="Rates rose again. Rates rose faster than expected. Markets fell on rates.",
+            url="https://example.com/backend",
+            published_date=timezone.now(),
+            source="Example"
+        )
+        url = f"/articles/{article.pk}/summary"
+
+        with mock.patch("articles.chatgpt_service.aget_article_summary_with_caching") as summarize:
+            resp = self.client.get(url, {"backend": "extractive"})
+
+        summarize.assert_not_called()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"summary": article.content, "cached": False})
+        self.assertIn("max-age", resp["Cache-Control"])
+        with mock.patch(
+            "articles.chatgpt_service.aget_article_summary_with_caching", return_value=("Generated summary", False)
+        ):
+            self.assertNotEqual(self.client.get(url)["ETag"], resp["ETag"])
+        with override_settings(SUMMARY_BACKEND="extractive"):
+            self.assertEqual(self.client.get(url)["ETag"], resp["ETag"])
+
+    def test_unknown_summary_backend_is_rejected(self):
+        """
+        Test that an unknown backend gets 400 from the single, stream and bulk summary endpoints.
+        """
+        article = self._create_articles(1)[0]
+
+        self.assertEqual(self.client.get(f"/articles/{article.pk}/summary", {"backend": "nope"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(f"/articles/{article.pk}/summary/stream", {"backend": "nope"}).status_code, 400
+        )
+        resp = self.client.get("/articles/summaries", {"ids": str(article.pk), "backend": "nope"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("backend", resp.json())
+
+    def test_bulk_summaries_with_the_extractive_backend(self):
+        """
+        Test that bulk summaries can come from the extractive backend, in one batch and uncached.
+        """
+        articles = self._create_articles(3)
+
+        with mock.patch("articles.chatgpt_service.summarize_articles") as summarize:
+            data = self.client.post(
+                "/articles/summaries", {"ids": [a.pk for a in articles], "backend": "extractive"},
+                content_type="application/json",
+            ).json()
+
+        summarize.assert_not_called()
+        self.assertEqual(data["results"], [
+            {"id": article.pk, "summary": article.content, "cached": False} for article in articles
+        ])
+
+    def test_article_list_pages_are_served_from_cache_until_ingest(self):
+        """
+        Test that a repeated list page costs no queries and that an ingest batch invalidates it.
+        """
+        from articles.services import ArticleService
+
+        self._create_articles(3)
+
+        first = self.client.get("/articles/?page=1")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            repeat = self.client.get("/articles/?page=1")
+        self.assertEqual(repeat["X-Cache"], "HIT")
+        self.assertEqual(repeat.json(), first.json())
+        self.assertEqual(repeat["ETag"], first["ETag"])
+
+        ArticleService().save_articles([{
+            "title": "Fresh story", "description": "Body", "url": "https://example.com/fresh",
+            "publishedAt": "2099-01-01T00:00:00Z", "source": {"name": "Example"},
+        }])
+
+        after_ingest = self.client.get("/articles/?page=1")
+        self.assertEqual(after_ingest["X-Cache"], "MISS")
+        self.assertEqual(after_ingest.json()["count"], 4)
+        self.assertEqual(after_ingest.json()["results"][0]["title"], "Fresh story")
+
+    def test_article_list_cache_can_be_bypassed(self):
+        """
+        Test that X-Cache-Bypass skips the page cache, and that summary pages are never cached.
+        """
+        self._create_articles(2)
+        self.client.get("/articles/")
+
+        with self.assertNumQueries(1):
+            bypassed = self.client.get("/articles/", HTTP_X_CACHE_BYPASS="1")
+        self.assertEqual(bypassed["X-Cache"], "BYPASS")
+
+        self.client.get("/articles/?include=summary")
+        self.assertNotIn("X-Cache", self.client.get("/articles/?include=summary"))
+
+    def test_list_page_cache_survives_an_evicted_generation(self):
+        """
+        Test that bumping a generation that was evicted neither raises nor serves an older page.
+        """
+        from articles.page_cache import GENERATION_KEY, bump_articles_generation
+
+        self._create_articles(2)
+        self.client.get("/articles/")
+        cache.delete(GENERATION_KEY)
+
+        with mock.patch.object(cache, "incr", side_effect=ValueError("evicted")):
+            bump_articles_generation()
+        bump_articles_generation()
+
+        self.assertEqual(self.client.get("/articles/")["X-Cache"], "MISS")
+
+    @override_settings(ALLOWED_HOSTS=["news.example.com", "internal"])
+    def test_article_list_pages_are_cached_per_scheme_and_host(self):
+        """
+        Test that a page cached through one host or scheme is not served, with its links, through another.
+        """
+        self._create_articles(3)
+
+        public = self.client.get("/articles/?page_size=1", HTTP_HOST="news.example.com", secure=True)
+        internal = self.client.get("/articles/?page_size=1", HTTP_HOST="internal")
+        plain = self.client.get("/articles/?page_size=1", HTTP_HOST="news.example.com")
+        repeat = self.client.get("/articles/?page_size=1", HTTP_HOST="news.example.com", secure=True)
+
+        self.assertEqual([public["X-Cache"], internal["X-Cache"], plain["X-Cache"]], ["MISS"] * 3)
+        self.assertEqual(repeat["X-Cache"], "HIT")
+        self.assertTrue(public.json()["next"].startswith("https://news.example.com/"))
+        self.assertTrue(internal.json()["next"].startswith("http://internal/"))
+        self.assertTrue(plain.json()["next"].startswith("http://news.example.com/"))
+
+    def test_fast_path_output_is_byte_identical_to_model_serializers(self):
+        """
+        Test that list, summary list and detail bodies match the ModelSerializers rendered by JSONRenderer.
+        """
+        from datetime import datetime, timezone as dt_timezone
+        from rest_framework.renderers import JSONRenderer
+        from articles.chatgpt_service import annotate_stored_summaries
+        from articles.serializers import (
+            ArticleDetailSerializer, ArticleListSerializer, ArticleListWithSummarySerializer
+        )
+
+        original = Article.objects.create(
+            title='Quotes "and" backslashes \\ with émigré ✓ and separators',
+            content="Line one\nLine two\u2028and\u2029 <b>tags</b> 🚀",
+            url="https://example.com/unicode",
+            published_date=datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            source="Ünïcode Source",
+        )
+        copy = Article.objects.create(
+            title="Whole seconds", content="", url="https://example.com/copy",
+            published_date=datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc), source="Example",
+            canonical=original,
+        )
+        ordered = Article.objects.order_by("-published_date", "-id")
+
+        def expected(serializer_class, instance, many=False):
+            return JSONRenderer().render(serializer_class(instance, many=many).data)
+
+        listed = self.client.get("/articles/?page=1", HTTP_X_CACHE_BYPASS="1").content
+        self.assertIn(expected(ArticleListSerializer, ordered, many=True), listed)
+        with_summaries = self.client.get("/articles/?page=1&include=summary").content
+        self.assertIn(
+            expected(ArticleListWithSummarySerializer, annotate_stored_summaries(ordered), many=True), with_summaries
+        )
+        for article in (original, copy):
+            self.assertEqual(
+                self.client.get(f"/articles/{article.pk}/").content, expected(ArticleDetailSerializer, article)
+            )
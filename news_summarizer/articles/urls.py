@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ArticleViewSet, ArticleSummaryView
+from .views import ArticleViewSet, ArticleBulkSummaryView, ArticleSummaryStreamView, ArticleSummaryView, MetricsView
 
 router = DefaultRouter()
 router.register(r'articles', ArticleViewSet, basename='article')
@@ -8,5 +8,8 @@ router.register(r'articles', ArticleViewSet, basename='article')
 urlpatterns = [
     path('', include(router.urls)),
     
+    path('articles/summaries', ArticleBulkSummaryView.as_view(), name='article-summaries'),
     path('articles/<int:pk>/summary', ArticleSummaryView.as_view(), name='article-summary'),
+    path('articles/<int:pk>/summary/stream', ArticleSummaryStreamView.as_view(), name='article-summary-stream'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
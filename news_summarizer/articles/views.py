@@ -1,21 +1,85 @@
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
 from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from . import metrics
 from .models import Article
-from .serializers import ArticleListSerializer, ArticleDetailSerializer, ArticleSummarySerializer
-from .chatgpt_service import get_article_summary_with_caching
-from .pagination import StandardResultsSetPagination
+from .serializers import (
+    ArticleListRowSerializer, ArticleListWithSummaryRowSerializer, ArticleDetailRowSerializer,
+    ArticleSummarySerializer, ArticleBulkSummarySerializer, BulkSummaryRequestSerializer
+)
+from .chatgpt_service import annotate_stored_summaries, is_generated_summary, summary_version
+from .http_cache import article_etag, not_modified, page_etag, set_cache_headers, summary_etag
+from .page_cache import BYPASS_HEADER, articles_generation, get_page, page_cache_key, store_page
+from .renderers import FastJSONRenderer
+from .summarizers import UnknownBackend, get_backend
+from .pagination import ArticleCursorPagination, ArticleSearchPagination, StandardResultsSetPagination
+from .tasks import summarize_articles_task, summary_outcome_key, summary_queued_key
 
 class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for listing and retrieving articles.
     Endpoints:
-    - GET /articles: paginated list.
+    - GET /articles: cursor-paginated list (follow `next`/`previous`).
+    - GET /articles?page=N: page-number list with `count`, for older clients.
+    - GET /articles?include=summary: paginated list with stored summaries.
+    - GET /articles/search?q=: full-text search, best match first.
     - GET /articles/{id}: article details.
+    Responses carry an ETag, Last-Modified and Cache-Control; a conditional
+    GET whose validators still match gets 304 Not Modified, unserialized.
+    Reads take a fast path: `values()` rows, dict-based serializers with the
+    ModelSerializers' exact output, and orjson rendering.
     """
     queryset = Article.objects.all()
-    pagination_class = StandardResultsSetPagination
+    pagination_class = ArticleCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @property
+    def paginator(self):
+        """
+        Use page numbers when the client asks for a page, keyset cursors otherwise.
+        Returns:
+            Paginator instance.
+        """
+        if not hasattr(self, '_paginator'):
+            if self.action == 'search':
+                self._paginator = ArticleSearchPagination()
+            elif 'page' in self.request.query_params:
+                self._paginator = StandardResultsSetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def _includes_summary(self):
+        """
+        Whether the client asked for summaries inline (`?include=summary`).
+        """
+        include = self.request.query_params.get('include', '')
+        return self.action in ('list', 'search') and 'summary' in include.split(',')
+
+    def get_queryset(self):
+        """
+        Rows come back as dicts (`values()`) holding only what the response
+        and its ETag need, so no model instances are built and lists never
+        load `content`. Stored summaries are joined in when requested.
+        Returns:
+            Article values queryset.
+        """
+        queryset = super().get_queryset()
+        if self._includes_summary():
+            queryset = annotate_stored_summaries(queryset)
+        return queryset.values(*self.get_serializer_class().row_fields(), 'fingerprint')
 
     def get_serializer_class(self):
         """
@@ -23,32 +87,370 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
         Returns:
             Serializer class based on action.
         """
-        if self.action == 'list':
-            return ArticleListSerializer
-        return ArticleDetailSerializer
+        if self.action in ('list', 'search'):
+            if self._includes_summary():
+                return ArticleListWithSummaryRowSerializer
+            return ArticleListRowSerializer
+        return ArticleDetailRowSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        List one page of articles.
+        JSON pages without summaries are served from the page cache, which
+        ingest invalidates; send `X-Cache-Bypass: 1` to skip it. The
+        `X-Cache` response header says HIT, MISS or BYPASS.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            Response: The page, or 304 if the client's copy is current.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if self._includes_summary() or request.accepted_renderer.format != 'json':
+            return self._page_response(queryset)
+        if request.headers.get(BYPASS_HEADER):
+            response = self._page_response(queryset)
+            response['X-Cache'] = 'BYPASS'
+            return response
+
+        # Read the generation before the query, so a page rendered from rows
+        # that an ingest batch is replacing is stored under the old generation.
+        cache_key = page_cache_key(
+            articles_generation(), f"{request.scheme}://{request.get_host()}",
+            request.query_params, request.accepted_media_type,
+        )
+        cached = get_page(cache_key)
+        if cached is None:
+            response = self._page_response(queryset, cache_key)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        body, content_type, etag, last_modified = cached
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = set_cache_headers(HttpResponse(body, content_type=content_type), etag, last_modified)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve one article.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            Response: The article, or 304 if the client's copy is current.
+        """
+        article = self.get_object()
+        etag = article_etag(article)
+        response = not_modified(request, etag, article['published_date'])
+        if response is None:
+            response = set_cache_headers(
+                Response(self.get_serializer(article).data), etag, article['published_date']
+            )
+        return response
+
+    def _page_response(self, queryset, cache_key=None):
+        """
+        Paginate `queryset` and answer with the serialized page, unless the
+        page's ETag matches If-None-Match.
+        Args:
+            queryset: The queryset to paginate.
+            cache_key: Page cache key to store the rendered page under, if any.
+        Returns:
+            Response: The paginated response, or 304.
+        """
+        page = self.paginate_queryset(queryset)
+        extra = ()
+        if isinstance(self.paginator, PageNumberPagination):
+            # The total count is part of page-number responses.
+            extra = (self.paginator.page.paginator.count,)
+        if self._includes_summary():
+            extra += (settings.OPENAI_MODEL, summary_version())
+        etag = page_etag(self.request.get_full_path(), page, *extra)
+        last_modified = max((article['published_date'] for article in page), default=None)
+
+        response = not_modified(self.request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if cache_key is not None:
+            renderer = self.request.accepted_renderer
+            body = renderer.render(response.data, self.request.accepted_media_type, self.get_renderer_context())
+            content_type = self.request.accepted_media_type
+            if renderer.charset:
+                content_type = f"{content_type}; charset={renderer.charset}"
+            store_page(cache_key, body, content_type, etag, last_modified)
+            response = HttpResponse(body, content_type=content_type)
+        return set_cache_headers(response, etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over article titles (weighted higher) and content,
+        using the stored, GIN-indexed search vector.
+        Args:
+            request: The HTTP request object; `q` holds web-search style terms.
+        Returns:
+            Response: Cursor-paginated matches ranked by relevance.
+        """
+        terms = request.query_params.get('q', '').strip()
+        if not terms:
+            return Response({'detail': "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        query = SearchQuery(terms, search_type='websearch', config='english')
+        queryset = (
+            self.get_queryset()
+            .filter(search_vector=query)
+            # ts_rank returns a real; widen it so the cursor round-trips exactly.
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+        )
+        return self._page_response(queryset)
+
+
+class ArticleBulkSummaryView(APIView):
+    """
+    View for retrieving the summaries of many articles in one request.
+    Articles are loaded with one query and cached summaries with one cache
+    round-trip; only the misses are sent to ChatGPT, concurrently.
+    `backend` picks the summarizer backend, e.g. `extractive` to summarize
+    locally in one batch; it defaults to SUMMARY_BACKEND.
+    Endpoints:
+    - GET /articles/summaries?ids=1,2,3&backend=extractive
+    - POST /articles/summaries with {"ids": [1, 2, 3], "backend": "extractive"}
+    """
+    def get(self, request):
+        """
+        Get summaries for the comma-separated article ids in `ids`.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            Response: JSON response with the summaries and any unknown ids.
+        """
+        data = {'ids': [value for value in request.query_params.get('ids', '').split(',') if value.strip()]}
+        if 'backend' in request.query_params:
+            data['backend'] = request.query_params['backend']
+        return self._summaries(data)
+
+    def post(self, request):
+        """
+        Get summaries for the article ids in the request body.
+        Args:
+            request: The HTTP request object.
+        Returns:
+            Response: JSON response with the summaries and any unknown ids.
+        """
+        return self._summaries(request.data)
+
+    def _summaries(self, data):
+        """
+        Validate the ids and resolve all their summaries in one batch.
+        Args:
+            data: The request data holding `ids`, and optionally `backend`.
+        Returns:
+            Response: `results` in request order, and `missing` ids with no article.
+        """
+        request_serializer = BulkSummaryRequestSerializer(data=data)
+        request_serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(request_serializer.validated_data['ids']))
+        backend = request_serializer.validated_data.get('backend') or get_backend()
 
+        articles = (
+            Article.objects.select_related('canonical')
+            .only('title', 'content', 'fingerprint', 'canonical__title', 'canonical__content', 'canonical__fingerprint')
+            .in_bulk(ids)
+        )
+        found = [articles[pk] for pk in ids if pk in articles]
+        # Near-duplicates reuse the summary of the article they copy.
+        sources = [article.canonical or article for article in found]
+        summaries = backend.summarize_many(
+            [(source.title, source.content) for source in sources],
+            article_ids=[source.pk for source in sources],
+            fingerprints=[source.fingerprint for source in sources],
+        )
 
-class ArticleSummaryView(APIView):
+        serializer = ArticleBulkSummarySerializer([
+            {'id': article.pk, 'summary': summary_text, 'cached': cached}
+            for article, (summary_text, cached) in zip(found, summaries)
+        ], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in articles],
+        }, status=status.HTTP_200_OK)
+
+
+class ArticleSummaryView(View):
     """
     View for retrieving article summaries.
     Returns the article summary, using Caching and the ChatGPT service.
+    The view is async, so under ASGI a slow ChatGPT call is awaited without
+    holding a worker thread.
+    Clients sending `Prefer: respond-async` are never kept waiting: when no
+    summary is stored yet they get 202 Accepted, a Celery task generates it,
+    and they poll the `Location` URL until it answers 200. If the task could
+    only produce a fallback, the poll answers 200 with that fallback; if it
+    failed, 503 with Retry-After. Either outcome is kept SUMMARY_OUTCOME_TTL
+    seconds, after which the next poll queues a new task.
+    Generated summaries carry a weak ETag of the source text, model and prompt
+    version, checked before any summary lookup, so polling an unchanged
+    summary costs one primary-key query. There is no Last-Modified: a new
+    prompt version changes the summary without changing any article date.
+    `?backend=` picks the summarizer backend (default SUMMARY_BACKEND); the
+    ETag names the backend's model and version.
     Endpoint: GET /articles/{id}/summary
     """
-    def get(self, request, pk):
+    async def get(self, request, pk):
         """
         Get the summary for a specific article by its ID.
         Args:
             request: The HTTP request object.
             pk: Primary key of the article.
         Returns:
-            Response: JSON response containing the article summary.
-        """ 
-        article = get_object_or_404(Article, pk=pk)
-        summary_text, cached = get_article_summary_with_caching(article.title, article.content)
+            JsonResponse: The article summary, 202 with a poll URL, or 503.
+        """
+        try:
+            backend = get_backend(request.GET.get('backend'))
+        except UnknownBackend as e:
+            return JsonResponse({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            article = await Article.objects.select_related('canonical').aget(pk=pk)
+        except Article.DoesNotExist:
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # A near-duplicate reuses the summary of the article it copies.
+        source = article.canonical or article
+        etag = summary_etag(source, backend.model, backend.version)
+        response = not_modified(request, etag, max_age=settings.SUMMARY_HTTP_MAX_AGE, vary=('Prefer',))
+        if response is not None:
+            return response
+
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            summary_text = await sync_to_async(backend.summary_if_ready)(
+                source.title, source.content, article_id=source.pk, fingerprint=source.fingerprint
+            )
+            if summary_text is not None:
+                cached = True
+            else:
+                outcome = await cache.aget(summary_outcome_key(source.pk))
+                if outcome is None:
+                    return await self._accepted(request, source)
+                if outcome['summary'] is None:
+                    return self._unavailable()
+                summary_text, cached = outcome['summary'], False
+        else:
+            summary_text, cached = await backend.asummarize(
+                source.title, source.content, article_id=source.pk, fingerprint=source.fingerprint
+            )
 
         serializer = ArticleSummarySerializer({
             'summary': summary_text,
             'cached': cached
         })
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        response = JsonResponse(serializer.data, status=status.HTTP_200_OK)
+        if not is_generated_summary(summary_text):
+            # An extractive or error fallback must not be revalidated as current later.
+            response['Cache-Control'] = 'no-store'
+            return response
+        return set_cache_headers(response, etag, max_age=settings.SUMMARY_HTTP_MAX_AGE, vary=('Prefer',))
+
+    async def _accepted(self, request, article):
+        """
+        Queue the summary of `article` (once per lock period) and tell the client where to poll.
+        Returns:
+            JsonResponse: 202 Accepted.
+        """
+        if await cache.aadd(summary_queued_key(article.pk), True, timeout=settings.SUMMARY_LOCK_TIMEOUT):
+            # Ahead of queued pre-summarization, and at interactive rate-limit priority.
+            await sync_to_async(summarize_articles_task.apply_async)(([article.pk],), {'interactive': True}, priority=0)
+
+        location = request.build_absolute_uri(request.path)
+        response = JsonResponse({'status': 'pending', 'location': location}, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = location
+        response['Retry-After'] = str(settings.SUMMARY_PENDING_RETRY_AFTER)
+        response['Preference-Applied'] = 'respond-async'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def _unavailable(self):
+        """
+        Tell a `Prefer: respond-async` client its summarize task failed.
+        Returns:
+            JsonResponse: 503 Service Unavailable.
+        """
+        response = JsonResponse(
+            {'detail': 'The summary could not be generated. Retry later.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = str(settings.SUMMARY_OUTCOME_TTL)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class ArticleSummaryStreamView(View):
+    """
+    View streaming an article summary as Server-Sent Events.
+    Each `message` event carries `{"delta": "..."}` with the next piece of
+    text as ChatGPT produces it; a final `done` event carries
+    `{"cached": bool, "error": str or null}`. When `error` is set, the
+    summary failed partway and the last delta is a fallback or error string.
+    A stored summary arrives as a single delta, as does the summary of a
+    backend that does not stream (`?backend=`, default SUMMARY_BACKEND).
+    Endpoint: GET /articles/{id}/summary/stream
+    """
+    async def get(self, request, pk):
+        """
+        Stream the summary for a specific article by its ID.
+        Args:
+            request: The HTTP request object.
+            pk: Primary key of the article.
+        Returns:
+            StreamingHttpResponse: A `text/event-stream` response.
+        """
+        try:
+            backend = get_backend(request.GET.get('backend'))
+        except UnknownBackend as e:
+            return JsonResponse({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            article = await Article.objects.select_related('canonical').aget(pk=pk)
+        except Article.DoesNotExist:
+            return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        source = article.canonical or article
+
+        async def events():
+            cached, error = True, None
+            async for delta, cached, chunk_error in backend.astream(
+                source.title, source.content, article_id=source.pk, fingerprint=source.fingerprint
+            ):
+                error = error or chunk_error
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'cached': cached, 'error': error})}\n\n"
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class MetricsView(View):
+    """
+    View exposing the Prometheus metrics of this process (or of all worker
+    processes, under PROMETHEUS_MULTIPROC_DIR) in the text exposition format.
+    Endpoint: GET /metrics
+    """
+    def get(self, request):
+        """
+        Args:
+            request: The HTTP request object.
+        Returns:
+            HttpResponse: The metrics, or 503 if prometheus_client is not installed.
+        """
+        latest = metrics.render_latest()
+        if latest is None:
+            return HttpResponse(
+                "prometheus_client is not installed.\n", status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content_type='text/plain',
+            )
+        body, content_type = latest
+        response = HttpResponse(body, content_type=content_type)
+        response['Cache-Control'] = 'no-store'
+        return response
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'articles',
     'django_redis',
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so the request metrics cover every other middleware.
+    'articles.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -151,8 +154,135 @@ CACHES = {
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 NEWS_API_URL = 'https://newsapi.org/v2/everything'
 NEWS_API_QUERY = 'Technology'
+# Every entry is fetched on each run; strings are shorthand for {'q': ...}.
+# Dicts may carry any NewsAPI filter, e.g. {'sources': 'bbc-news,the-verge'}.
+NEWS_API_QUERIES = [NEWS_API_QUERY]
+NEWS_API_PAGE_SIZE = 100
+NEWS_API_MAX_PAGES = 5
+NEWS_API_MAX_WORKERS = 4
+NEWS_API_MAX_RETRIES = 3
+NEWS_API_BACKOFF_FACTOR = 0.5
+# Seconds an ingested URL is remembered so later runs skip it before queueing.
+NEWS_API_SEEN_URL_TTL = 7 * 24 * 60 * 60
+# Seconds between the incremental fetches Celery Beat schedules.
+NEWS_API_FETCH_INTERVAL = 15 * 60
+
+# Articles per bulk upsert task; NewsAPI pages hold at most 100 articles.
+ARTICLE_INGEST_BATCH_SIZE = 100
+# Seconds the fetch_articles command waits for each batch result.
+ARTICLE_INGEST_RESULT_TIMEOUT = 60
+# A fetch that does not wait (the scheduled one) advances its watermarks from
+# a task polling the batch results every ARTICLE_INGEST_WATERMARK_POLL_INTERVAL
+# seconds; batches unfinished after ARTICLE_INGEST_WATERMARK_TIMEOUT seconds
+# hold their queries' watermarks back.
+ARTICLE_INGEST_WATERMARK_POLL_INTERVAL = 5
+ARTICLE_INGEST_WATERMARK_TIMEOUT = 10 * 60
+# Estimated Jaccard similarity of word shingles above which a new article is
+# linked to an earlier one as a near-duplicate and reuses its summary.
+ARTICLE_NEAR_DUPLICATE_SIMILARITY = 0.6
+# Cache-Control max-age, in seconds, of article list/detail responses and of
+# generated summaries. Responses also carry an ETag, so once stale a client or
+# proxy revalidates with If-None-Match and gets 304 Not Modified if unchanged.
+ARTICLE_HTTP_MAX_AGE = 60
+SUMMARY_HTTP_MAX_AGE = 5 * 60
+# Seconds a rendered list page is kept in the default cache. Ingest makes
+# cached pages unreachable as soon as it writes, so this only bounds memory.
+ARTICLE_PAGE_CACHE_TIMEOUT = 10 * 60
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = "gpt-4o-mini"
+# Point at any OpenAI-compatible server; None uses the official API.
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+# Seconds one OpenAI request may take, and how often the client retries a
+# failed one, so a summary waits at most about (retries + 1) * timeout.
+OPENAI_TIMEOUT = 15
+OPENAI_MAX_RETRIES = 1
+# Circuit breaker around OpenAI, shared by every process through the
+# summaries cache. LLM_BREAKER_FAILURE_THRESHOLD failures (connection errors,
+# timeouts, 5xx, calls slower than LLM_BREAKER_SLOW_CALL_SECONDS) within
+# LLM_BREAKER_WINDOW seconds open it; summaries then fail fast to an
+# extractive summary, which is never cached. After
+# LLM_BREAKER_OPEN_SECONDS one probe call decides whether it closes again.
+LLM_BREAKER_FAILURE_THRESHOLD = 5
+LLM_BREAKER_WINDOW = 60
+LLM_BREAKER_OPEN_SECONDS = 30
+LLM_BREAKER_SLOW_CALL_SECONDS = 10
+# Summarizer backends by name (dotted paths to SummarizerBackend subclasses),
+# and the one used when a request names none with `?backend=`. `extractive`
+# summarizes locally, with no API key or network.
+SUMMARY_BACKENDS = {
+    'openai': 'articles.summarizers.OpenAIBackend',
+    'extractive': 'articles.summarizers.ExtractiveBackend',
+}
+SUMMARY_BACKEND = os.getenv('SUMMARY_BACKEND', 'openai')
+# Size of extractive summaries (the extractive backend, and the OpenAI
+# fallback without an API key or while the circuit is open): at most this
+# many sentences and words.
+SUMMARY_EXTRACTIVE_SENTENCES = 3
+SUMMARY_EXTRACTIVE_MAX_WORDS = 100
+# Seconds a summary is served as fresh.
+SUMMARY_CACHE_TIMEOUT = 24 * 60 * 60
+# Seconds an expired summary is still served while one worker regenerates it.
+SUMMARY_STALE_TTL = 60 * 60
+# Per-process LRU in front of Redis: entry count (0 disables it), seconds an
+# entry is kept, and how often workers check Redis for an invalidation.
+SUMMARY_LOCAL_CACHE_SIZE = 1024
+SUMMARY_LOCAL_CACHE_TTL = 60
+SUMMARY_LOCAL_CACHE_VERSION_INTERVAL = 5
+# Single-flight lock: how long it is held at most, and how long other
+# callers wait (polling the cache) for the lock holder's result.
+SUMMARY_LOCK_TIMEOUT = 60
+SUMMARY_LOCK_WAIT_TIMEOUT = 35
+SUMMARY_LOCK_POLL_INTERVAL = 0.1
+# Retry-After seconds sent with 202 Accepted to `Prefer: respond-async` clients.
+SUMMARY_PENDING_RETRY_AFTER = 2
+# Seconds a summarize task's fallback or failure is kept for those clients'
+# polls, after which the next poll queues a new task.
+SUMMARY_OUTCOME_TTL = 30
+# Concurrent ChatGPT calls per batch summarization.
+SUMMARY_BATCH_MAX_WORKERS = 8
+# Most article ids accepted by one bulk summaries request.
+SUMMARY_BULK_MAX_IDS = 100
+# ChatGPT input per summary: content up to SUMMARY_INPUT_TOKEN_BUDGET tokens
+# is sent whole. Longer content is map-reduced in chunks of
+# SUMMARY_CHUNK_TOKENS (the first SUMMARY_MAX_CHUNKS, summarized on up to
+# SUMMARY_MAP_MAX_WORKERS threads) or, with SUMMARY_MAP_REDUCE off, truncated.
+SUMMARY_INPUT_TOKEN_BUDGET = 1500
+SUMMARY_MAP_REDUCE = True
+SUMMARY_CHUNK_TOKENS = 1000
+SUMMARY_MAX_CHUNKS = 4
+SUMMARY_MAP_MAX_WORKERS = 4
+# Cap on the tokens ChatGPT may generate per call.
+SUMMARY_MAX_OUTPUT_TOKENS = 200
+# Queue a bulk summarization task for articles created by each ingest batch.
+SUMMARY_PRESUMMARIZE_ON_INGEST = bool(OPENAI_API_KEY)
+# Seconds a summarize task's claim on an article lasts, so a duplicate task
+# skips it; a redelivery of the same task keeps the claim.
+SUMMARY_TASK_CLAIM_TIMEOUT = 10 * 60
+# Celery rate limit of summarize tasks, per worker process (None for none).
+SUMMARY_TASK_RATE_LIMIT = '30/m'
+
+# Client-side rate limits of outbound calls, shared by every web and Celery
+# process through Redis (the RATE_LIMIT_CACHE_ALIAS cache, which must be
+# django-redis; otherwise calls are not limited). Set them to the provider's
+# quota: each is a token bucket refilled continuously up to a minute's worth.
+RATE_LIMITS = {
+    'openai': {'requests_per_minute': 500, 'tokens_per_minute': 200_000},
+    'newsapi': {'requests_per_minute': 60},
+}
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# Share of each bucket background work (pre-summarization, stale refreshes)
+# leaves to interactive requests; background also waits while any
+# interactive request does.
+RATE_LIMIT_INTERACTIVE_RESERVE = 0.2
+# Seconds a caller waits for capacity before giving up, per priority.
+RATE_LIMIT_MAX_WAIT = {'interactive': 10, 'background': 5 * 60}
+# Seconds every process holds off after a 429 without a Retry-After header.
+RATE_LIMIT_BACKOFF = 5
+# Celery message priority of pre-summarization tasks. The Redis broker
+# delivers lower numbers first and untagged messages as 0, so summaries a
+# user is waiting for (`Prefer: respond-async`) jump the ingest backlog.
+SUMMARY_BACKGROUND_TASK_PRIORITY = 9
 
 if not OPENAI_API_KEY:
     print("var OPENAI_API_KEY isn't define!")
@@ -166,4 +296,36 @@ CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = 'UTC'
\ No newline at end of file
+CELERY_TIMEZONE = 'UTC'
+# Bulk ingest writes, LLM summarization and everything else (scheduled
+# fetches, housekeeping) go to separate queues, consumed by separate workers
+# (see docker-compose.yml), so slow summaries never hold up ingest.
+CELERY_TASK_DEFAULT_QUEUE = 'maintenance'
+CELERY_TASK_ROUTES = {
+    'articles.tasks.save_articles_batch_task': {'queue': 'ingest'},
+    'articles.tasks.process_and_save_article_task': {'queue': 'ingest'},
+    'articles.tasks.summarize_articles_task': {'queue': 'summarize'},
+}
+CELERY_TASK_ANNOTATIONS = {
+    'articles.tasks.summarize_articles_task': {'rate_limit': SUMMARY_TASK_RATE_LIMIT},
+}
+# Reserve one message per worker process; the ingest worker raises this on
+# its command line since its tasks are short.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Late-acked summarize tasks are redelivered once unacknowledged this long,
+# so it must exceed the longest such task.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 60 * 60}
+# Only tasks whose results are read opt back in with ignore_result=False.
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXPIRES = 60 * 60
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'fetch-articles': {
+        'task': 'articles.tasks.fetch_articles_task',
+        'schedule': NEWS_API_FETCH_INTERVAL,
+        # Drop runs that could not start before the next one is due.
+        'options': {'expires': NEWS_API_FETCH_INTERVAL},
+    },
+}
+# Celery queues whose depth /metrics reports, read from the broker per scrape.
+METRICS_CELERY_QUEUES = ['ingest', 'summarize', 'maintenance']
\ No newline at end of file